@@ -1,8 +1,34 @@
 import os
 import json
+import tempfile
+import threading
 
 
 class ConfigManager:
+    """
+    配置管理
+    
+    config.json 只在第一次使用时读取一次，之后所有 load_* 都从内存中的配置读取，
+    截图等高频操作不再访问文件。save_* 先写临时文件再替换，保存成功后通知订阅者；
+    文件被外部修改时调用 reload() 重新读取，只通知内容有变化的配置项。
+    """
+    
+    # 可订阅的配置项 -> config.json 中对应的键
+    SECTIONS = {
+        "region": ("x", "y", "width", "height"),
+        "user_level": ("user_level",),
+        "font_size": ("font_size",),
+        "zoom_scale": ("zoom_scale",),
+        "llm": ("llm",),
+        "pipeline": ("pipeline",),
+        "tracing": ("tracing",),
+    }
+    
+    _config = None
+    _lock = threading.RLock()
+    # 配置项 -> 回调列表
+    _subscribers = {}
+    
     @staticmethod
     def get_config_path():
         current_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -10,14 +36,12 @@ class ConfigManager:
     
     @staticmethod
     def save_region(x, y, width, height):
-        config = ConfigManager._load_config()
-        config.update({
+        return ConfigManager._update_config({
             "x": x,
             "y": y,
             "width": width,
             "height": height
         })
-        return ConfigManager._save_config(config)
     
     @staticmethod
     def load_region():
@@ -30,9 +54,7 @@ class ConfigManager:
     
     @staticmethod
     def save_user_level(level):
-        config = ConfigManager._load_config()
-        config["user_level"] = level
-        return ConfigManager._save_config(config)
+        return ConfigManager._update_config({"user_level": level})
     
     @staticmethod
     def load_user_level():
@@ -45,9 +67,7 @@ class ConfigManager:
     
     @staticmethod
     def save_font_size(font_size):
-        config = ConfigManager._load_config()
-        config["font_size"] = font_size
-        return ConfigManager._save_config(config)
+        return ConfigManager._update_config({"font_size": font_size})
     
     @staticmethod
     def load_font_size():
@@ -60,9 +80,7 @@ class ConfigManager:
     
     @staticmethod
     def save_zoom_scale(zoom_scale):
-        config = ConfigManager._load_config()
-        config["zoom_scale"] = zoom_scale
-        return ConfigManager._save_config(config)
+        return ConfigManager._update_config({"zoom_scale": zoom_scale})
     
     @staticmethod
     def load_zoom_scale():
@@ -75,13 +93,14 @@ class ConfigManager:
     
     @staticmethod
     def save_llm_config(base_url, api_key, model):
-        config = ConfigManager._load_config()
-        config["llm"] = {
+        # 保留 llm 中的其他设置（如 structured_output）
+        llm_config = dict(ConfigManager._load_config().get("llm", {}))
+        llm_config.update({
             "base_url": base_url,
             "api_key": api_key,
             "model": model
-        }
-        return ConfigManager._save_config(config)
+        })
+        return ConfigManager._update_config({"llm": llm_config})
     
     @staticmethod
     def load_llm_config():
@@ -91,34 +110,179 @@ class ConfigManager:
             return {
                 "base_url": llm_config.get("base_url", "https://spark-api-open.xf-yun.com/v1"),
                 "api_key": llm_config.get("api_key", ""),
-                "model": llm_config.get("model", "4.0Ultra")
+                "model": llm_config.get("model", "4.0Ultra"),
+                # 结构化输出：auto（自动检测）/ json_schema / json_object / off
+                "structured_output": llm_config.get("structured_output", "auto"),
+                # 翻译提示词的 token 上限，超出时裁剪专有名词；0 表示不限制
+                "prompt_token_budget": llm_config.get("prompt_token_budget", 800),
+                # 额外的接口（如本地的 OpenAI 兼容服务）：[{name, base_url, api_key, model, structured_output}]
+                "backends": llm_config.get("backends", []),
+                # 截图翻译在主接口超过 p95 延迟后同时请求下一个接口
+                "hedge": llm_config.get("hedge", True)
             }
         except Exception as e:
             print(f"加载LLM配置失败: {e}")
             return {
                 "base_url": "https://spark-api-open.xf-yun.com/v1",
                 "api_key": "",
-                "model": "4.0Ultra"
+                "model": "4.0Ultra",
+                "structured_output": "auto",
+                "prompt_token_budget": 800,
+                "backends": [],
+                "hedge": True
             }
     
     @staticmethod
-    def _load_config():
+    def load_pipeline_settings():
+        """截图翻译流水线的队列设置：队列长度与溢出策略（drop_oldest / coalesce）"""
+        try:
+            config = ConfigManager._load_config()
+            pipeline_config = config.get("pipeline", {})
+            return {
+                "queue_size": pipeline_config.get("queue_size", 4),
+                "overflow_policy": pipeline_config.get("overflow_policy", "drop_oldest")
+            }
+        except Exception as e:
+            print(f"加载流水线设置失败: {e}")
+            return {"queue_size": 4, "overflow_policy": "drop_oldest"}
+    
+    @staticmethod
+    def load_tracing_settings():
+        """阶段耗时统计设置：是否显示浮层、导出格式（jsonl / prometheus）"""
         try:
-            config_path = ConfigManager.get_config_path()
-            if os.path.exists(config_path):
-                with open(config_path, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+            config = ConfigManager._load_config()
+            tracing_config = config.get("tracing", {})
+            return {
+                "overlay": tracing_config.get("overlay", False),
+                "export_format": tracing_config.get("export_format", "jsonl")
+            }
+        except Exception as e:
+            print(f"加载耗时统计设置失败: {e}")
+            return {"overlay": False, "export_format": "jsonl"}
+    
+    @staticmethod
+    def subscribe(section, callback):
+        """
+        订阅配置项的变化（保存或 reload 后内容有变化时调用 callback()）
+        
+        Args:
+            section: SECTIONS 中的配置项，如 "region"、"llm"、"font_size"
+            callback: 无参数的回调，在保存/重新加载配置的线程中调用
+        """
+        if section not in ConfigManager.SECTIONS:
+            raise ValueError(f"未知的配置项: {section}")
+        with ConfigManager._lock:
+            ConfigManager._subscribers.setdefault(section, []).append(callback)
+    
+    @staticmethod
+    def unsubscribe(section, callback):
+        with ConfigManager._lock:
+            callbacks = ConfigManager._subscribers.get(section, [])
+            if callback in callbacks:
+                callbacks.remove(callback)
+    
+    @staticmethod
+    def reload():
+        """
+        重新读取 config.json（文件被外部修改时调用）
+        
+        文件暂时不存在（编辑器保存时先删除再写入）或内容不是合法的 JSON 时保留当前配置，
+        等下一次修改后再重新读取。
+        
+        Returns:
+            list: 内容有变化的配置项
+        """
+        if not os.path.exists(ConfigManager.get_config_path()):
+            print("配置文件不存在，保留当前配置")
+            return []
+        config = ConfigManager._read_config_file()
+        if config is None:
+            print("配置文件无法解析，保留当前配置")
+            return []
+        with ConfigManager._lock:
+            old_config = ConfigManager._config or {}
+            ConfigManager._config = config
+        changed = ConfigManager._changed_sections(old_config, config)
+        if changed:
+            print(f"配置已重新加载，变化的配置项: {', '.join(changed)}")
+            ConfigManager._notify(changed)
+        return changed
+    
+    @staticmethod
+    def _changed_sections(old_config, new_config):
+        return [section for section, keys in ConfigManager.SECTIONS.items()
+                if any(old_config.get(key) != new_config.get(key) for key in keys)]
+    
+    @staticmethod
+    def _notify(sections):
+        with ConfigManager._lock:
+            callbacks = [callback for section in sections
+                         for callback in ConfigManager._subscribers.get(section, [])]
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"配置变化通知失败: {e}")
+    
+    @staticmethod
+    def _load_config():
+        """内存中的配置（只读，修改请使用 _update_config）"""
+        with ConfigManager._lock:
+            if ConfigManager._config is None:
+                # 配置文件无法解析时使用默认值
+                ConfigManager._config = ConfigManager._read_config_file() or {}
+            return ConfigManager._config
+    
+    @staticmethod
+    def _read_config_file():
+        """
+        读取 config.json
+        
+        Returns:
+            dict: 配置内容，文件不存在时为空字典；文件无法读取或不是 JSON 对象时返回 None
+        """
+        config_path = ConfigManager.get_config_path()
+        if not os.path.exists(config_path):
             return {}
+        try:
+            with open(config_path, 'r', encoding='utf-8') as f:
+                config = json.load(f)
         except Exception as e:
             print(f"加载配置失败: {e}")
-            return {}
+            return None
+        if not isinstance(config, dict):
+            print("加载配置失败: 配置文件内容不是 JSON 对象")
+            return None
+        return config
+    
+    @staticmethod
+    def _update_config(changes):
+        """合并修改并保存，成功后替换内存中的配置并通知订阅者"""
+        with ConfigManager._lock:
+            old_config = ConfigManager._load_config()
+            config = dict(old_config)
+            config.update(changes)
+            if not ConfigManager._save_config(config):
+                return False
+            ConfigManager._config = config
+        
+        ConfigManager._notify(ConfigManager._changed_sections(old_config, config))
+        return True
     
     @staticmethod
     def _save_config(config):
+        """先写入同目录的临时文件再替换，写入中断不会损坏原配置文件"""
+        config_path = ConfigManager.get_config_path()
+        temp_path = None
         try:
-            with open(ConfigManager.get_config_path(), 'w', encoding='utf-8') as f:
+            fd, temp_path = tempfile.mkstemp(prefix=".config-", suffix=".tmp",
+                                             dir=os.path.dirname(config_path))
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
                 json.dump(config, f, ensure_ascii=False, indent=2)
+            os.replace(temp_path, config_path)
             return True
         except Exception as e:
             print(f"保存配置失败: {e}")
+            if temp_path and os.path.exists(temp_path):
+                os.remove(temp_path)
             return False
@@ -2,9 +2,29 @@ import os
 import json
 import time
 import shutil
+import tempfile
 from datetime import datetime
 
 
+class _RecordIndex:
+    """原文 -> 记录的索引和下一个可用 id，批量合并时避免每条记录都扫描全部笔记"""
+    
+    def __init__(self, records):
+        self.by_text = {}
+        for record in records:
+            # 重复的原文保留第一条，与逐条查找的结果一致
+            self.by_text.setdefault(record.get("original_text", "").strip(), record)
+        # 删除记录后数量会小于最大 id，按最大 id 递增避免与现有记录重复
+        self.next_id = max((record.get("id", 0) for record in records), default=0) + 1
+    
+    def find(self, original_text):
+        return self.by_text.get(original_text.strip())
+    
+    def add(self, record):
+        self.by_text.setdefault(record["original_text"].strip(), record)
+        self.next_id = max(self.next_id, record["id"] + 1)
+
+
 class NotesManager:
     @staticmethod
     def get_notes_path():
@@ -14,77 +34,139 @@ class NotesManager:
     @staticmethod
     def save_translation_record(original_text, translation, important_words, grammar_points):
         try:
-            notes_path = NotesManager.get_notes_path()
-            
-            if os.path.exists(notes_path):
-                with open(notes_path, 'r', encoding='utf-8') as f:
-                    notes_data = json.load(f)
-            else:
-                notes_data = {"records": []}
-            
-            existing_record = None
-            for record in notes_data["records"]:
-                if record.get("original_text", "").strip() == original_text.strip():
-                    existing_record = record
-                    break
-            
-            if existing_record:
-                print(f"发现重复句子，更新现有记录: {original_text[:50]}...")
-                
-                existing_record["timestamp"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                existing_record["date"] = datetime.now().strftime("%Y-%m-%d")
-                existing_record["learn_count"] = existing_record.get("learn_count", 1) + 1
-                
-                existing_words = existing_record.get("important_words", {})
-                for word, meaning in important_words.items():
-                    if word not in existing_words:
-                        existing_words[word] = meaning
-                    else:
-                        if isinstance(meaning, dict) and isinstance(existing_words[word], dict):
-                            if meaning != existing_words[word]:
-                                existing_words[word] = meaning
-                        elif isinstance(meaning, str) and isinstance(existing_words[word], str):
-                            if meaning != existing_words[word] and meaning not in existing_words[word]:
-                                existing_words[word] += f"; {meaning}"
-                existing_record["important_words"] = existing_words
-                
-                existing_grammar = existing_record.get("grammar_points", {})
-                for sentence, explanation in grammar_points.items():
-                    if sentence not in existing_grammar:
-                        existing_grammar[sentence] = explanation
-                    else:
-                        if isinstance(explanation, str) and isinstance(existing_grammar[sentence], str):
-                            if explanation != existing_grammar[sentence] and explanation not in existing_grammar[sentence]:
-                                existing_grammar[sentence] += f"\n\n补充：{explanation}"
-                existing_record["grammar_points"] = existing_grammar
-                
-                print(f"已更新重复句子的单词和语法信息，学习次数：{existing_record['learn_count']}")
-                
-            else:
-                new_record = {
-                    "id": len(notes_data["records"]) + 1,
-                    "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                    "original_text": original_text,
-                    "translation": translation,
-                    "important_words": important_words,
-                    "grammar_points": grammar_points,
-                    "date": datetime.now().strftime("%Y-%m-%d"),
-                    "learn_count": 1
-                }
-                
-                notes_data["records"].append(new_record)
-                print(f"添加新句子记录: {original_text[:50]}...")
-            
-            with open(notes_path, 'w', encoding='utf-8') as f:
-                json.dump(notes_data, f, ensure_ascii=False, indent=2)
+            notes_data = NotesManager._read_notes_data()
+            saved_record = NotesManager._merge_record(notes_data, original_text, translation,
+                                                      important_words, grammar_points)
+            NotesManager._write_notes_data(notes_data)
             
             print(f"翻译记录已保存到笔记文件")
-            return True
+            # 返回保存后的记录，供已打开的笔记窗口增量更新
+            return saved_record
             
         except Exception as e:
             print(f"保存翻译记录失败: {e}")
             return False
     
+    @staticmethod
+    def save_translation_records(records, progress=None):
+        """
+        批量保存翻译记录：笔记文件只读写一次
+        
+        Args:
+            records: [{"original_text", "translation", "important_words", "grammar_points"}]
+            progress: (任务标识, 已写入的数量)，与记录在同一次写入中保存，
+                      批量任务中断后据此判断这批记录是否已经合并过，避免重复合并
+        
+        Returns:
+            list: 保存后的记录，失败时返回 False
+        """
+        try:
+            notes_data = NotesManager._read_notes_data()
+            index = _RecordIndex(notes_data["records"])
+            saved_records = [
+                NotesManager._merge_record(notes_data, record["original_text"], record["translation"],
+                                           record.get("important_words", {}), record.get("grammar_points", {}),
+                                           index)
+                for record in records
+            ]
+            if progress is not None:
+                job_id, count = progress
+                notes_data.setdefault("batch_progress", {})[job_id] = count
+            NotesManager._write_notes_data(notes_data)
+            print(f"已批量保存 {len(saved_records)} 条翻译记录到笔记文件")
+            return saved_records
+        except Exception as e:
+            print(f"批量保存翻译记录失败: {e}")
+            return False
+    
+    @staticmethod
+    def load_batch_progress(job_id):
+        """批量任务已写入笔记的记录数量（见 save_translation_records 的 progress 参数）"""
+        try:
+            return NotesManager._read_notes_data().get("batch_progress", {}).get(job_id, 0)
+        except Exception as e:
+            print(f"读取批量任务进度失败: {e}")
+            return 0
+    
+    @staticmethod
+    def _read_notes_data():
+        notes_path = NotesManager.get_notes_path()
+        if os.path.exists(notes_path):
+            with open(notes_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        return {"records": []}
+    
+    @staticmethod
+    def _write_notes_data(notes_data):
+        """先写入同目录的临时文件再替换，写入中断不会损坏笔记文件"""
+        notes_path = NotesManager.get_notes_path()
+        fd, temp_path = tempfile.mkstemp(prefix=".learning_notes-", suffix=".tmp",
+                                         dir=os.path.dirname(notes_path))
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(notes_data, f, ensure_ascii=False, indent=2)
+            os.replace(temp_path, notes_path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+    
+    @staticmethod
+    def _merge_record(notes_data, original_text, translation, important_words, grammar_points, index=None):
+        """把一条翻译记录合并进笔记数据：重复句子更新已有记录，否则追加新记录"""
+        if index is None:
+            index = _RecordIndex(notes_data["records"])
+        existing_record = index.find(original_text)
+        
+        if existing_record:
+            print(f"发现重复句子，更新现有记录: {original_text[:50]}...")
+            
+            existing_record["timestamp"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            existing_record["date"] = datetime.now().strftime("%Y-%m-%d")
+            existing_record["learn_count"] = existing_record.get("learn_count", 1) + 1
+            
+            existing_words = existing_record.get("important_words", {})
+            for word, meaning in important_words.items():
+                if word not in existing_words:
+                    existing_words[word] = meaning
+                else:
+                    if isinstance(meaning, dict) and isinstance(existing_words[word], dict):
+                        if meaning != existing_words[word]:
+                            existing_words[word] = meaning
+                    elif isinstance(meaning, str) and isinstance(existing_words[word], str):
+                        if meaning != existing_words[word] and meaning not in existing_words[word]:
+                            existing_words[word] += f"; {meaning}"
+            existing_record["important_words"] = existing_words
+            
+            existing_grammar = existing_record.get("grammar_points", {})
+            for sentence, explanation in grammar_points.items():
+                if sentence not in existing_grammar:
+                    existing_grammar[sentence] = explanation
+                else:
+                    if isinstance(explanation, str) and isinstance(existing_grammar[sentence], str):
+                        if explanation != existing_grammar[sentence] and explanation not in existing_grammar[sentence]:
+                            existing_grammar[sentence] += f"\n\n补充：{explanation}"
+            existing_record["grammar_points"] = existing_grammar
+            
+            print(f"已更新重复句子的单词和语法信息，学习次数：{existing_record['learn_count']}")
+            return existing_record
+        
+        new_record = {
+            "id": index.next_id,
+            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "original_text": original_text,
+            "translation": translation,
+            "important_words": important_words,
+            "grammar_points": grammar_points,
+            "date": datetime.now().strftime("%Y-%m-%d"),
+            "learn_count": 1
+        }
+        
+        notes_data["records"].append(new_record)
+        index.add(new_record)
+        print(f"添加新句子记录: {original_text[:50]}...")
+        return new_record
+    
     @staticmethod
     def load_all_records():
         try:
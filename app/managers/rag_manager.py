@@ -123,27 +123,41 @@ class RAGManager:
             return 0.0
     
     def add_new_record_to_index(self, original_text, translation, important_words, grammar_points):
-        if not self.is_loaded or not self.index_module:
-            return
+        if self.add_records_to_index([{
+            "original_text": original_text,
+            "translation": translation,
+            "important_words": important_words,
+            "grammar_points": grammar_points
+        }]):
+            print("新记录已添加到RAG索引")
+    
+    def add_records_to_index(self, records):
+        """批量添加记录到RAG索引：一次向量化、一次保存索引"""
+        if not self.is_loaded or not self.index_module or not records:
+            return False
         
         try:
-            doc = Document(
-                page_content=original_text,
-                metadata={
-                    "translation": translation,
-                    "important_words": important_words,
-                    "grammar_points": grammar_points,
-                    "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                    "learn_count": 1
-                }
-            )
+            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            docs = [
+                Document(
+                    page_content=record["original_text"],
+                    metadata={
+                        "translation": record["translation"],
+                        "important_words": record.get("important_words", {}),
+                        "grammar_points": record.get("grammar_points", {}),
+                        "timestamp": timestamp,
+                        "learn_count": 1
+                    }
+                )
+                for record in records
+            ]
             
-            self.index_module.add_documents([doc])
+            self.index_module.add_documents(docs)
             self.index_module.save_index()
-            print("新记录已添加到RAG索引")
+            return True
             
         except Exception as e:
             print(f"添加记录到RAG索引失败: {e}")
-
+            return False
 
 rag_manager = RAGManager()
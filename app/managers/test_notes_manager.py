@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+学习笔记管理器测试脚本
+
+使用临时笔记文件，不会修改 learning_notes.json
+"""
+
+import os
+import sys
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from app.managers.notes_manager import NotesManager
+
+
+def use_temp_notes_file():
+    """把笔记路径指向临时文件，返回恢复函数"""
+    temp_dir = tempfile.mkdtemp()
+    original = NotesManager.get_notes_path
+    NotesManager.get_notes_path = staticmethod(lambda: os.path.join(temp_dir, "learning_notes.json"))
+    
+    def restore():
+        NotesManager.get_notes_path = original
+    return restore
+
+
+def test_new_record_id_after_delete():
+    """删除记录后新增的记录不能复用现有记录的 id"""
+    restore = use_temp_notes_file()
+    try:
+        for text in ("First sentence.", "Second sentence.", "Third sentence."):
+            NotesManager.save_translation_record(text, "译文", {}, {})
+        assert NotesManager.delete_record(1)
+        
+        new_record = NotesManager.save_translation_record("Fourth sentence.", "译文", {}, {})
+        ids = [record["id"] for record in NotesManager.load_all_records()]
+        assert new_record["id"] == 4, new_record["id"]
+        assert len(ids) == len(set(ids)), ids
+        
+        saved = NotesManager.save_translation_records([
+            {"original_text": "Fifth sentence.", "translation": "译文"},
+            {"original_text": "Sixth sentence.", "translation": "译文"},
+        ])
+        assert [record["id"] for record in saved] == [5, 6]
+    finally:
+        restore()
+
+
+def test_batch_progress_saved_with_records():
+    """批量保存时任务进度与记录一起写入，重复句子只在已有记录上累加"""
+    restore = use_temp_notes_file()
+    try:
+        assert NotesManager.load_batch_progress("job") == 0
+        records = [
+            {"original_text": "First sentence.", "translation": "译文"},
+            {"original_text": " First sentence. ", "translation": "译文"},
+            {"original_text": "Second sentence.", "translation": "译文"},
+        ]
+        saved = NotesManager.save_translation_records(records, progress=("job", 3))
+        assert [record["id"] for record in saved] == [1, 1, 2]
+        assert NotesManager.load_batch_progress("job") == 3
+        
+        learn_counts = {record["original_text"]: record["learn_count"] for record in NotesManager.load_all_records()}
+        assert learn_counts == {"First sentence.": 2, "Second sentence.": 1}, learn_counts
+    finally:
+        restore()
+
+
+def main():
+    tests = [test_new_record_id_after_delete, test_batch_progress_saved_with_records]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+    return failed == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
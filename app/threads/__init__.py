@@ -1,4 +1,6 @@
-from .processing_thread import ProcessingThread
 from .text_correction_thread import TextCorrectionThread
+from .search_thread import SearchThread
+from .export_thread import ExportThread
+from .capture_pipeline import CapturePipeline, StageQueue
 
-__all__ = ['ProcessingThread', 'TextCorrectionThread']
+__all__ = ['TextCorrectionThread', 'SearchThread', 'ExportThread', 'CapturePipeline', 'StageQueue']
@@ -0,0 +1,246 @@
+import os
+import sys
+import json
+import threading
+from collections import deque
+from PyQt5.QtCore import QObject, QThread, pyqtSignal
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from ocr.ocr_download import get_ocr_text_without_first_word
+from llm.call_api import chat
+from app.managers import rag_manager, special_terms_manager
+from app.utils.language_detect import is_english_text
+from app.utils.tracing import tracer
+
+
+class StageQueue:
+    """
+    流水线阶段之间的有界队列
+    
+    - drop_oldest: 队列满时丢弃最早的一项，保留最新的 maxsize 项
+    - coalesce: 只保留最新的一项，新的截图直接替换还没处理的旧截图
+    被丢弃的项交给 on_drop 回调（用于删除临时图片等）。
+    """
+    
+    DROP_OLDEST = "drop_oldest"
+    COALESCE = "coalesce"
+    
+    def __init__(self, maxsize=4, policy=DROP_OLDEST, on_drop=None):
+        if policy not in (self.DROP_OLDEST, self.COALESCE):
+            raise ValueError(f"不支持的队列策略: {policy}")
+        self.maxsize = 1 if policy == self.COALESCE else max(int(maxsize), 1)
+        self.policy = policy
+        self.on_drop = on_drop
+        self._items = deque()
+        self._condition = threading.Condition()
+        self._closed = False
+    
+    def put(self, item):
+        dropped = []
+        with self._condition:
+            if self._closed:
+                dropped.append(item)
+            else:
+                while len(self._items) >= self.maxsize:
+                    dropped.append(self._items.popleft())
+                self._items.append(item)
+                self._condition.notify()
+        
+        if self.on_drop:
+            for dropped_item in dropped:
+                self.on_drop(dropped_item)
+    
+    def get(self):
+        """取出一项，队列关闭后返回 None"""
+        with self._condition:
+            while not self._items and not self._closed:
+                self._condition.wait()
+            if self._closed:
+                return None
+            return self._items.popleft()
+    
+    def close(self):
+        """关闭队列，剩余的项交给 on_drop"""
+        with self._condition:
+            self._closed = True
+            remaining = list(self._items)
+            self._items.clear()
+            self._condition.notify_all()
+        
+        if self.on_drop:
+            for item in remaining:
+                self.on_drop(item)
+    
+    def __len__(self):
+        with self._condition:
+            return len(self._items)
+
+
+class PipelineStage(QThread):
+    """流水线中的一个阶段：从输入队列取出一项，处理后放入输出队列（返回 None 表示该项到此结束）"""
+    
+    def __init__(self, name, handler, input_queue, output_queue=None, on_error=None):
+        super().__init__()
+        self.name = name
+        self.handler = handler
+        self.input_queue = input_queue
+        self.output_queue = output_queue
+        self.on_error = on_error
+    
+    def run(self):
+        while True:
+            item = self.input_queue.get()
+            if item is None:
+                return
+            
+            try:
+                result = self.handler(item)
+            except Exception as e:
+                print(f"流水线阶段[{self.name}]出错: {e}")
+                if self.on_error:
+                    self.on_error(f"{self.name}出错: {e}")
+                result = None
+            
+            if result is not None and self.output_queue is not None:
+                self.output_queue.put(result)
+
+
+class CapturePipeline(QObject):
+    """
+    截图翻译流水线：截图 → OCR → 语言检测/专有名词/RAG → LLM → 界面显示
+    
+    截图在界面线程完成后放入队列，后面三个阶段各自运行在独立线程中，
+    阶段之间通过有界队列衔接。翻译上一句的同时就可以识别下一句，
+    LLM 较慢时新截图按队列策略排队或合并，而不是直接被忽略。
+    每张截图带一个 trace_id，各阶段的耗时记录到 tracer 中。
+    """
+    
+    # 原文, 翻译结果, trace_id
+    text_processed = pyqtSignal(str, str, int)
+    error_occurred = pyqtSignal(str)
+    status_changed = pyqtSignal(str)
+    
+    def __init__(self, user_level="中级", queue_size=4, overflow_policy=StageQueue.DROP_OLDEST):
+        super().__init__()
+        self.user_level = user_level
+        self._next_seq = 0
+        self._last_text = None
+        
+        self.ocr_queue = StageQueue(queue_size, overflow_policy, on_drop=self._drop_capture)
+        self.analysis_queue = StageQueue(queue_size, overflow_policy, on_drop=self._drop_item)
+        self.llm_queue = StageQueue(queue_size, overflow_policy, on_drop=self._drop_item)
+        
+        self.stages = [
+            PipelineStage("OCR", self._run_ocr, self.ocr_queue, self.analysis_queue, self.error_occurred.emit),
+            PipelineStage("分析", self._run_analysis, self.analysis_queue, self.llm_queue, self.error_occurred.emit),
+            PipelineStage("翻译", self._run_llm, self.llm_queue, on_error=self.error_occurred.emit),
+        ]
+    
+    def start(self):
+        for stage in self.stages:
+            stage.start()
+    
+    def stop(self, timeout=3000):
+        """关闭所有队列并等待阶段线程退出（正在进行的 OCR/LLM 调用完成后退出）"""
+        for stage in self.stages:
+            stage.input_queue.close()
+        for stage in self.stages:
+            stage.wait(timeout)
+    
+    def submit(self, image_path, skip_duplicates=False, trace_id=None):
+        """
+        提交一张截图
+        
+        Args:
+            image_path: 截图的临时文件，处理完或被丢弃后删除
+            skip_duplicates: OCR结果与上一句相同时跳过（自动截图时字幕没有变化）
+            trace_id: 截图阶段的 trace_id，不传时新建
+        """
+        self._next_seq += 1
+        self.ocr_queue.put({"seq": self._next_seq, "image_path": image_path,
+                            "skip_duplicates": skip_duplicates,
+                            "trace_id": trace_id if trace_id is not None else tracer.new_trace_id()})
+        return self._next_seq
+    
+    def pending_count(self):
+        return sum(len(stage.input_queue) for stage in self.stages)
+    
+    def _drop_capture(self, item):
+        print(f"截图 #{item['seq']} 排队过久，已丢弃")
+        self._remove_image(item["image_path"])
+    
+    def _drop_item(self, item):
+        print(f"截图 #{item['seq']} 排队过久，已丢弃")
+    
+    @staticmethod
+    def _remove_image(image_path):
+        if image_path and os.path.exists(image_path):
+            os.unlink(image_path)
+    
+    def _run_ocr(self, item):
+        self.status_changed.emit("正在识别文字...")
+        try:
+            with tracer.span("ocr", item["trace_id"]):
+                ocr_text = get_ocr_text_without_first_word(item["image_path"])
+        finally:
+            self._remove_image(item["image_path"])
+        
+        print("=" * 50)
+        print("OCR识别结果:")
+        print(ocr_text)
+        print("=" * 50)
+        
+        if not ocr_text:
+            self.error_occurred.emit("OCR未识别到文本")
+            return None
+        
+        item["ocr_text"] = ocr_text
+        return item
+    
+    def _run_analysis(self, item):
+        ocr_text = item["ocr_text"]
+        if item["skip_duplicates"] and ocr_text == self._last_text:
+            print("字幕没有变化，跳过翻译")
+            return None
+        self._last_text = ocr_text
+        
+        with tracer.span("language_detect", item["trace_id"]):
+            is_english = is_english_text(ocr_text)
+        if not is_english:
+            print("检测到非英文内容，跳过翻译")
+            self.error_occurred.emit("检测到非英文内容，只支持英文翻译")
+            return None
+        
+        with tracer.span("term_match", item["trace_id"]):
+            matched_terms = special_terms_manager.find_matched_terms(ocr_text)
+        if matched_terms:
+            print("发现专有名词:", matched_terms)
+        item["matched_terms"] = matched_terms
+        
+        with tracer.span("rag", item["trace_id"]):
+            rag_result = rag_manager.search_similar_translation(ocr_text)
+        if rag_result:
+            print("使用RAG检索结果进行翻译")
+            item["result"] = json.dumps({
+                "translation": rag_result["translation"],
+                "important_words": rag_result["important_words"],
+                "important_grammar": rag_result["grammar_points"],
+                "from_rag": True,
+                "similarity": rag_result["similarity"],
+                "special_terms": matched_terms if matched_terms else {}
+            }, ensure_ascii=False, indent=2)
+        return item
+    
+    def _run_llm(self, item):
+        # RAG 命中的结果同样经过这一阶段，保证显示顺序与截图顺序一致
+        if "result" not in item:
+            self.status_changed.emit("正在翻译...")
+            print("未找到相似翻译，使用API翻译...")
+            with tracer.span("llm", item["trace_id"]):
+                item["result"] = chat(item["ocr_text"], item["matched_terms"], self.user_level)
+            print("LLM API返回结果:")
+            print(item["result"])
+            print("=" * 50)
+        
+        self.text_processed.emit(item["ocr_text"], item["result"], item["trace_id"])
+        return None
@@ -0,0 +1,39 @@
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from app.utils import NotesExporter
+
+
+class ExportThread(QThread):
+    """在后台流式导出学习笔记，定期报告进度"""
+    
+    progress_updated = pyqtSignal(int, int)
+    export_completed = pyqtSignal(str, int)
+    export_failed = pyqtSignal(str)
+    
+    def __init__(self, records, export_path, export_format):
+        super().__init__()
+        self.records = records
+        self.export_path = export_path
+        self.export_format = export_format
+        self._cancelled = False
+    
+    def cancel(self):
+        self._cancelled = True
+    
+    def run(self):
+        try:
+            exporter = NotesExporter(self.export_format)
+            written = exporter.export(
+                self.records,
+                self.export_path,
+                progress_callback=self.progress_updated.emit,
+                is_cancelled=lambda: self._cancelled
+            )
+            if self._cancelled:
+                print(f"导出已取消，已写入 {written} 条: {self.export_path}")
+                return
+            self.export_completed.emit(self.export_path, written)
+            
+        except Exception as e:
+            print(f"导出线程出错: {e}")
+            self.export_failed.emit(str(e))
@@ -0,0 +1,65 @@
+import heapq
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from app.utils import FuzzySearchEngine
+
+
+class SearchThread(QThread):
+    """
+    学习笔记搜索线程
+    
+    在后台对索引筛选出的候选记录打分排序。打分达到首屏数量后先发送一页临时结果，
+    全部完成后再发送完整排序；新的搜索开始时旧线程通过 cancel() 尽快退出。
+    候选记录由界面线程从索引中取出后传入（元组快照），线程运行期间索引可以继续增量更新。
+    出错时也会发送最终结果（已完成打分的部分），列表不会停留在临时结果上。
+    """
+    
+    # (搜索序号, [(记录, 分数), ...], 是否为最终结果)
+    page_ready = pyqtSignal(int, list, bool)
+    
+    FIRST_PAGE_SIZE = 50
+    CHUNK_SIZE = 200
+    MIN_SCORE = 0.1
+    
+    def __init__(self, generation, search_text, date_filter, candidates):
+        super().__init__()
+        self.generation = generation
+        self.search_text = search_text
+        self.date_filter = date_filter
+        self.candidates = tuple(candidates)
+        self._cancelled = False
+    
+    def cancel(self):
+        self._cancelled = True
+    
+    def run(self):
+        scored_records = []
+        try:
+            first_page_sent = False
+            
+            for i, record in enumerate(self.candidates, 1):
+                if self._cancelled:
+                    return
+                
+                # 日期筛选
+                if self.date_filter != "全部日期" and record.get("date", "") != self.date_filter:
+                    continue
+                
+                score = FuzzySearchEngine.search_in_record(self.search_text, record)
+                # 只保留有一定匹配度的结果
+                if score > self.MIN_SCORE:
+                    scored_records.append((record, score))
+                
+                if not first_page_sent and i % self.CHUNK_SIZE == 0 and len(scored_records) >= self.FIRST_PAGE_SIZE:
+                    first_page = heapq.nlargest(self.FIRST_PAGE_SIZE, scored_records, key=lambda x: x[1])
+                    self.page_ready.emit(self.generation, first_page, False)
+                    first_page_sent = True
+            
+        except Exception as e:
+            print(f"搜索线程出错: {e}")
+
+        # 按照分数排序（由高到低）
+        scored_records.sort(key=lambda x: x[1], reverse=True)
+        if not self._cancelled:
+            self.page_ready.emit(self.generation, scored_records, True)
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+截图翻译流水线队列（StageQueue）的测试脚本
+
+只测试队列的溢出策略和关闭行为，不加载OCR模型、不调用LLM
+"""
+
+import os
+import sys
+import threading
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from app.threads.capture_pipeline import StageQueue
+
+
+def test_drop_oldest():
+    """队列满时丢弃最早的项，保留最新的 maxsize 项"""
+    dropped = []
+    queue = StageQueue(maxsize=3, policy=StageQueue.DROP_OLDEST, on_drop=dropped.append)
+    for item in range(5):
+        queue.put(item)
+    
+    assert dropped == [0, 1], dropped
+    assert len(queue) == 3
+    assert [queue.get() for _ in range(3)] == [2, 3, 4]
+
+
+def test_coalesce():
+    """只保留最新的一项，未处理的旧项被替换"""
+    dropped = []
+    queue = StageQueue(maxsize=4, policy=StageQueue.COALESCE, on_drop=dropped.append)
+    assert queue.maxsize == 1
+    for item in ("a", "b", "c"):
+        queue.put(item)
+    
+    assert dropped == ["a", "b"], dropped
+    assert queue.get() == "c"
+    queue.put("d")
+    assert queue.get() == "d"
+    assert dropped == ["a", "b"]
+
+
+def test_close():
+    """关闭后剩余项和新放入的项都交给 on_drop，阻塞中的 get 返回 None"""
+    dropped = []
+    queue = StageQueue(maxsize=2, on_drop=dropped.append)
+    queue.put("left")
+    queue.close()
+    queue.put("late")
+    assert dropped == ["left", "late"], dropped
+    assert queue.get() is None
+    
+    queue = StageQueue(maxsize=2)
+    results = []
+    waiter = threading.Thread(target=lambda: results.append(queue.get()))
+    waiter.start()
+    queue.put("first")
+    waiter.join(2)
+    assert results == ["first"], results
+    
+    waiter = threading.Thread(target=lambda: results.append(queue.get()))
+    waiter.start()
+    waiter.join(0.2)
+    assert waiter.is_alive()
+    queue.close()
+    waiter.join(2)
+    assert not waiter.is_alive()
+    assert results == ["first", None], results
+
+
+def test_invalid_policy():
+    try:
+        StageQueue(policy="newest")
+    except ValueError:
+        return
+    raise AssertionError("未知的策略应当抛出 ValueError")
+
+
+def main():
+    tests = [test_drop_oldest, test_coalesce, test_close, test_invalid_policy]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+    return failed == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -1,6 +1,7 @@
+import os
 from PyQt5.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QLabel,
                              QPushButton, QComboBox, QMessageBox, QDialog)
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QFileSystemWatcher
 from app.managers import ConfigManager
 from app.ui.region_input_dialog import RegionInputDialog
 from app.ui.translation_window import TranslationWindow
@@ -11,6 +12,25 @@ class MainWindow(QMainWindow):
         self.current_region = None  # 存储当前设置的区域
         self.init_ui()
         
+        # config.json 被外部修改时重新加载配置，由订阅者各自更新
+        self.config_watcher = QFileSystemWatcher(self)
+        config_path = ConfigManager.get_config_path()
+        if os.path.exists(config_path):
+            self.config_watcher.addPath(config_path)
+        self.config_watcher.fileChanged.connect(self.on_config_file_changed)
+        ConfigManager.subscribe("region", self.on_region_config_changed)
+    
+    def on_config_file_changed(self, path):
+        # 配置文件被替换（包括本程序的原子写入）后监听会失效，需要重新添加
+        if path not in self.config_watcher.files() and os.path.exists(path):
+            self.config_watcher.addPath(path)
+        ConfigManager.reload()
+    
+    def on_region_config_changed(self):
+        x, y, width, height = ConfigManager.load_region()
+        self.current_region = (x, y, width, height)
+        self.region_label.setText(f"当前截图区域: ({x}, {y}) - 大小: {width}x{height}")
+        
     def init_ui(self):
         self.setWindowTitle("二游英语翻译助手")
         self.setGeometry(100, 100, 500, 400)
@@ -187,9 +207,8 @@ class MainWindow(QMainWindow):
         
     def on_region_selected(self, x, y, width, height):
         """处理区域选择完成"""
+        # 保存成功后由 on_region_config_changed 更新区域显示
         if ConfigManager.save_region(x, y, width, height):
-            self.current_region = (x, y, width, height)
-            self.region_label.setText(f"当前截图区域: ({x}, {y}) - 大小: {width}x{height}")
             QMessageBox.information(self, "设置成功", f"截图区域已设置为:\n位置: ({x}, {y})\n大小: {width} x {height}")
         else:
             QMessageBox.warning(self, "设置失败", "保存截图区域设置失败，请重试")
@@ -0,0 +1,272 @@
+from PyQt5.QtWidgets import QStyledItemDelegate, QStyle
+from PyQt5.QtCore import Qt, QAbstractListModel, QModelIndex, QRect, QRectF, QSize, QEvent, pyqtSignal
+from PyQt5.QtGui import QColor, QFont, QFontMetrics, QTextDocument, QPen, QPainter
+from app.utils import FuzzySearchEngine
+
+
+def make_font(pixel_size, bold=False):
+    font = QFont()
+    font.setPixelSize(pixel_size)
+    font.setBold(bold)
+    return font
+
+
+class NotesListModel(QAbstractListModel):
+    """学习笔记列表模型（句子记录或单词统计），数据本身通过 Qt.UserRole 取出"""
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.items = []
+        self.search_query = ""
+        self.search_scores = {}
+    
+    def set_items(self, items, search_query="", search_scores=None):
+        """整体替换列表内容"""
+        self.beginResetModel()
+        self.items = list(items)
+        self.search_query = search_query
+        self.search_scores = search_scores or {}
+        self.endResetModel()
+    
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.items)
+    
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or not 0 <= index.row() < len(self.items):
+            return None
+        
+        item = self.items[index.row()]
+        if role == Qt.UserRole:
+            return item
+        if role == Qt.DisplayRole:
+            return item.get("original_text") or item.get("word", "")
+        return None
+
+
+class NotesItemDelegate(QStyledItemDelegate):
+    """
+    列表项绘制代理的基类
+    
+    只有可见的行才会绘制富文本；行高按需计算并按 (列表项键, 可用宽度) 缓存，
+    搜索或筛选导致列表重建时，已经计算过的行高可以直接复用。
+    
+    子类需要提供：
+    - item_key(item)：行高缓存的键
+    - calculate_height(item, text_width)：列表项在给定文本宽度下的高度
+    - paint_item(painter, rect, item, model)：在内容区域内绘制列表项
+    """
+    
+    PADDING = 15
+    SELECTED_BACKGROUND = "#e3f2fd"
+    SELECTED_BORDER = "#2196f3"
+    HOVER_BACKGROUND = "#f5f5f5"
+    SEPARATOR_COLOR = "#f1f3f4"
+    
+    def __init__(self, view):
+        super().__init__(view)
+        self.view = view
+        self._size_cache = {}
+    
+    def clear_size_cache(self):
+        """记录内容发生变化后清空行高缓存"""
+        self._size_cache.clear()
+    
+    def invalidate(self, key):
+        """单个列表项内容变化后移除其行高缓存"""
+        self._size_cache.pop(key, None)
+    
+    def text_width(self):
+        return max(self.view.viewport().width() - 2 * self.PADDING - 10, 200)
+    
+    def sizeHint(self, option, index):
+        item = index.data(Qt.UserRole)
+        if item is None:
+            return super().sizeHint(option, index)
+        
+        width = self.text_width()
+        key = self.item_key(item)
+        cached = self._size_cache.get(key)
+        if cached is not None and cached[0] == width:
+            return cached[1]
+        
+        size = QSize(width, self.calculate_height(item, width))
+        self._size_cache[key] = (width, size)
+        return size
+    
+    def paint(self, painter, option, index):
+        item = index.data(Qt.UserRole)
+        if item is None:
+            return
+        
+        painter.save()
+        rect = option.rect
+        if option.state & QStyle.State_Selected:
+            painter.fillRect(rect, QColor(self.SELECTED_BACKGROUND))
+            painter.fillRect(QRect(rect.left(), rect.top(), 4, rect.height()), QColor(self.SELECTED_BORDER))
+        elif option.state & QStyle.State_MouseOver:
+            painter.fillRect(rect, QColor(self.HOVER_BACKGROUND))
+        else:
+            painter.fillRect(rect, QColor("white"))
+        
+        painter.setPen(QPen(QColor(self.SEPARATOR_COLOR)))
+        painter.drawLine(rect.bottomLeft(), rect.bottomRight())
+        
+        self.paint_item(painter, self.content_rect(rect), item, index.model())
+        painter.restore()
+    
+    def content_rect(self, item_rect):
+        return item_rect.adjusted(self.PADDING, self.PADDING, -self.PADDING, -self.PADDING)
+    
+    @staticmethod
+    def wrapped_text_height(font, text, width):
+        """纯文本在给定宽度下自动换行后的高度"""
+        if not text.strip():
+            return QFontMetrics(font).height()
+        return QFontMetrics(font).boundingRect(0, 0, width, 100000, Qt.TextWordWrap | Qt.AlignLeft, text).height()
+    
+    @staticmethod
+    def draw_rich_text(painter, html, font, color, left, top, width, max_height):
+        """用 QTextDocument 绘制带高亮的富文本，返回实际占用的高度"""
+        document = QTextDocument()
+        document.setDocumentMargin(0)
+        document.setDefaultFont(font)
+        document.setTextWidth(width)
+        document.setHtml(f'<div style="color: {color};">{html}</div>')
+        height = min(int(document.size().height()), max_height)
+        
+        painter.save()
+        painter.translate(left, top)
+        document.drawContents(painter, QRectF(0, 0, width, height))
+        painter.restore()
+        return height
+    
+    @staticmethod
+    def highlight(text, model):
+        if model.search_query:
+            return FuzzySearchEngine.highlight_matches(text, model.search_query)
+        return text
+
+
+class SentenceItemDelegate(NotesItemDelegate):
+    """句子列表项：原文、翻译、时间/学习次数/匹配度，以及右下角的删除按钮"""
+    
+    delete_requested = pyqtSignal(object)
+    
+    PADDING = 18
+    SPACING = 8
+    MIN_HEIGHT = 100
+    DELETE_BUTTON_SIZE = QSize(64, 24)
+    
+    def __init__(self, view):
+        super().__init__(view)
+        self.original_font = make_font(15, bold=True)
+        self.translation_font = make_font(14)
+        self.info_font = make_font(12)
+        self.button_font = make_font(11, bold=True)
+    
+    def item_key(self, record):
+        return record.get("id")
+    
+    def info_line_height(self):
+        return max(QFontMetrics(self.info_font).height(), self.DELETE_BUTTON_SIZE.height())
+    
+    def calculate_height(self, record, text_width):
+        original_height = self.wrapped_text_height(self.original_font, record.get("original_text", ""), text_width)
+        translation_height = self.wrapped_text_height(self.translation_font, record.get("translation", ""), text_width)
+        height = (original_height + translation_height + self.info_line_height()
+                  + 2 * self.SPACING + 2 * self.PADDING)
+        return max(height, self.MIN_HEIGHT)
+    
+    def delete_button_rect(self, content_rect):
+        size = self.DELETE_BUTTON_SIZE
+        return QRect(content_rect.right() - size.width(), content_rect.bottom() - size.height(),
+                     size.width(), size.height())
+    
+    def info_text(self, record, model):
+        learn_count = record.get("learn_count", 1)
+        time_info = f"🕐 {record.get('timestamp', '')}"
+        if learn_count > 1:
+            time_info += f" • 📚 已学习 {learn_count} 次"
+        
+        # 如果有搜索匹配度，显示它
+        match_score = model.search_scores.get(record.get("id", 0), 0.0)
+        if match_score > 0 and model.search_query:
+            time_info += f" • 🎯 匹配度: {int(match_score * 100)}%"
+        return time_info
+    
+    def paint_item(self, painter, rect, record, model):
+        width = rect.width()
+        info_height = self.info_line_height()
+        text_bottom = rect.bottom() - info_height - self.SPACING
+        top = rect.top()
+        
+        top += self.draw_rich_text(painter, self.highlight(record.get("original_text", ""), model),
+                                   self.original_font, "#212529", rect.left(), top, width,
+                                   max(text_bottom - top, 0)) + self.SPACING
+        self.draw_rich_text(painter, self.highlight(record.get("translation", ""), model),
+                            self.translation_font, "#6c757d", rect.left(), top, width,
+                            max(text_bottom - top, 0))
+        
+        # 底部信息与删除按钮
+        info_rect = QRect(rect.left(), rect.bottom() - info_height, width - self.DELETE_BUTTON_SIZE.width() - 10, info_height)
+        painter.setFont(self.info_font)
+        painter.setPen(QColor("#868e96"))
+        painter.drawText(info_rect, Qt.AlignLeft | Qt.AlignVCenter, self.info_text(record, model))
+        
+        button_rect = self.delete_button_rect(rect)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(QColor("#dc3545"))
+        painter.drawRoundedRect(button_rect, 4, 4)
+        painter.setFont(self.button_font)
+        painter.setPen(QColor("white"))
+        painter.drawText(button_rect, Qt.AlignCenter, "🗑️ 删除")
+    
+    def editorEvent(self, event, model, option, index):
+        if (event.type() == QEvent.MouseButtonRelease and event.button() == Qt.LeftButton
+                and self.delete_button_rect(self.content_rect(option.rect)).contains(event.pos())):
+            record = index.data(Qt.UserRole)
+            if record is not None:
+                self.delete_requested.emit(record.get("id"))
+            return True
+        return super().editorEvent(event, model, option, index)
+
+
+class WordItemDelegate(NotesItemDelegate):
+    """单词列表项：单词与累计次数、含义（最多显示约三行）"""
+    
+    PADDING = 15
+    SPACING = 3
+    MAX_MEANING_HEIGHT = 60
+    MAX_HEIGHT = 100
+    SELECTED_BACKGROUND = "#f3e5f5"
+    SELECTED_BORDER = "#9c27b0"
+    HOVER_BACKGROUND = "#f8f9fa"
+    
+    def __init__(self, view, format_meaning):
+        super().__init__(view)
+        self.format_meaning = format_meaning
+        self.word_font = make_font(15, bold=True)
+        self.meaning_font = make_font(13)
+    
+    def item_key(self, word_data):
+        return word_data["word"].lower()
+    
+    def calculate_height(self, word_data, text_width):
+        word_height = QFontMetrics(self.word_font).height()
+        meaning_height = self.wrapped_text_height(self.meaning_font, self.format_meaning(word_data["meaning"]), text_width)
+        height = word_height + self.SPACING + min(meaning_height, self.MAX_MEANING_HEIGHT) + 2 * self.PADDING
+        return min(height, self.MAX_HEIGHT)
+    
+    def paint_item(self, painter, rect, word_data, model):
+        word_text = self.highlight(f"{word_data['word']} ({word_data['count']}次)", model)
+        top = rect.top()
+        top += self.draw_rich_text(painter, word_text, self.word_font, "#4a148c",
+                                   rect.left(), top, rect.width(), rect.height()) + self.SPACING
+        
+        meaning_text = self.highlight(self.format_meaning(word_data["meaning"]), model)
+        self.draw_rich_text(painter, meaning_text, self.meaning_font, "#666",
+                            rect.left(), top, rect.width(),
+                            min(self.MAX_MEANING_HEIGHT, max(rect.bottom() - top, 0)))
@@ -1,12 +1,15 @@
 import os
 from datetime import datetime
 from PyQt5.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QLabel,
-                             QPushButton, QFrame, QListWidget, QListWidgetItem,
+                             QPushButton, QFrame, QListView,
                              QSplitter, QLineEdit, QScrollArea, QTabWidget, QComboBox,
-                             QTextEdit, QMessageBox, QDesktopWidget)
-from PyQt5.QtCore import Qt, QTimer, QSize, pyqtSignal
+                             QTextEdit, QMessageBox, QDesktopWidget, QFileDialog)
+from PyQt5.QtCore import Qt, QTimer, pyqtSignal
 from app.managers import NotesManager, rag_manager
-from app.utils import FuzzySearchEngine
+from app.utils import (FuzzySearchEngine, NotesSearchIndex, VocabularyIndex, NotesExporter, format_meaning,
+                       NotesDateIndex)
+from app.threads import SearchThread, ExportThread
+from .notes_list_view import NotesListModel, SentenceItemDelegate, WordItemDelegate
 
 class NotesWindow(QMainWindow):
     # 添加返回主程序的信号
@@ -17,6 +20,14 @@ class NotesWindow(QMainWindow):
         self.records = []
         self.filtered_records = []
         self.search_scores = {}  # 存储搜索分数
+        self.search_index = NotesSearchIndex()  # 搜索索引，加载记录时构建
+        self.vocabulary = VocabularyIndex()  # 单词汇总，随记录保存/删除增量更新
+        self.date_index = NotesDateIndex()  # 日期桶和学习次数排序
+        self.is_unfiltered = True  # 当前是否显示全部记录
+        self.search_generation = 0  # 搜索序号，用于丢弃过期的搜索结果
+        self.search_thread = None  # 当前的搜索线程
+        self.running_search_threads = set()
+        self.export_thread = None  # 导出线程
         self.search_timer = QTimer()  # 防抖动计时器
         self.search_timer.timeout.connect(self.perform_search)
         self.search_timer.setSingleShot(True)
@@ -26,16 +37,7 @@ class NotesWindow(QMainWindow):
     @staticmethod
     def format_meaning_text(meaning):
         """统一处理meaning的格式转换"""
-        if isinstance(meaning, dict):
-            parts = []
-            if "中文释义" in meaning:
-                parts.append(meaning["中文释义"])
-            if "词性" in meaning:
-                parts.append(f"[{meaning['词性']}]")
-            if "简单例句" in meaning:
-                parts.append(f"例: {meaning['简单例句']}")
-            return " ".join(parts) if parts else str(meaning)
-        return str(meaning)
+        return format_meaning(meaning)
         
     def init_ui(self):
         self.setWindowTitle("英语学习笔记本 📚")
@@ -180,6 +182,7 @@ class NotesWindow(QMainWindow):
         
         # 导出按钮 - 增大尺寸
         export_btn = QPushButton("📤 导出笔记")
+        self.export_btn = export_btn
         export_btn.setStyleSheet("""
             QPushButton {
                 background-color: rgba(255, 255, 255, 0.2);
@@ -263,10 +266,22 @@ class NotesWindow(QMainWindow):
         """)
         self.date_filter.currentTextChanged.connect(self.on_search_text_changed)  # 使用防抖动搜索
         
+        # 排序方式（搜索时按匹配度排序）
+        sort_label = QLabel("🔢 排序:")
+        sort_label.setStyleSheet("font-weight: bold; color: #495057; font-size: 16px; padding: 8px; min-width: 60px;")
+        
+        self.sort_order = QComboBox()
+        self.sort_order.addItems(["记录顺序", "学习最多"])
+        self.sort_order.setToolTip("未输入搜索内容时的排列顺序，搜索结果按匹配度排序")
+        self.sort_order.setStyleSheet(self.date_filter.styleSheet())
+        self.sort_order.currentTextChanged.connect(self.on_search_text_changed)
+        
         search_layout.addWidget(search_label)
         search_layout.addWidget(self.search_input, 2)  # 给搜索框更多空间
         search_layout.addWidget(date_label)
         search_layout.addWidget(self.date_filter, 1)
+        search_layout.addWidget(sort_label)
+        search_layout.addWidget(self.sort_order, 1)
         
         layout.addWidget(search_frame)
     
@@ -323,28 +338,15 @@ class NotesWindow(QMainWindow):
         sentences_layout.setContentsMargins(0, 8, 0, 0)  # 适当的上边距
         
         # 句子列表
-        self.sentences_list = QListWidget()
-        self.sentences_list.setStyleSheet("""
-            QListWidget {
-                border: none;
-                outline: none;
-                background-color: white;
-            }
-            QListWidget::item {
-                padding: 18px;
-                border-bottom: 1px solid #f1f3f4;
-                background-color: white;
-                min-height: 70px;
-            }
-            QListWidget::item:selected {
-                background-color: #e3f2fd;
-                border-left: 4px solid #2196f3;
-            }
-            QListWidget::item:hover {
-                background-color: #f5f5f5;
-            }
-        """)
-        self.sentences_list.itemClicked.connect(self.show_record_detail)
+        self.sentences_list = self.create_notes_list_view()
+        self.sentences_model = NotesListModel(self)
+        self.sentences_list.setModel(self.sentences_model)
+        self.sentences_delegate = SentenceItemDelegate(self.sentences_list)
+        # 延迟到点击事件处理完之后再弹出确认框
+        self.sentences_delegate.delete_requested.connect(
+            lambda record_id: QTimer.singleShot(0, lambda: self.delete_record_with_confirmation(record_id)))
+        self.sentences_list.setItemDelegate(self.sentences_delegate)
+        self.sentences_list.clicked.connect(self.show_record_detail)
         sentences_layout.addWidget(self.sentences_list)
         
         # 单词标签页
@@ -353,28 +355,12 @@ class NotesWindow(QMainWindow):
         words_layout.setContentsMargins(0, 8, 0, 0)  # 适当的上边距
         
         # 单词列表
-        self.words_list = QListWidget()
-        self.words_list.setStyleSheet("""
-            QListWidget {
-                border: none;
-                outline: none;
-                background-color: white;
-            }
-            QListWidget::item {
-                padding: 15px 18px;
-                border-bottom: 1px solid #f1f3f4;
-                background-color: white;
-                min-height: 60px;
-            }
-            QListWidget::item:selected {
-                background-color: #f3e5f5;
-                border-left: 4px solid #9c27b0;
-            }
-            QListWidget::item:hover {
-                background-color: #f8f9fa;
-            }
-        """)
-        self.words_list.itemClicked.connect(self.show_word_detail)
+        self.words_list = self.create_notes_list_view()
+        self.words_model = NotesListModel(self)
+        self.words_list.setModel(self.words_model)
+        self.words_delegate = WordItemDelegate(self.words_list, self.format_meaning_text)
+        self.words_list.setItemDelegate(self.words_delegate)
+        self.words_list.clicked.connect(self.show_word_detail)
         words_layout.addWidget(self.words_list)
         
         # 添加标签页
@@ -384,6 +370,25 @@ class NotesWindow(QMainWindow):
         list_layout.addWidget(self.tab_widget)
         splitter.addWidget(list_frame)
     
+    @staticmethod
+    def create_notes_list_view():
+        """创建由模型和绘制代理驱动的列表视图，只有可见行才会绘制"""
+        list_view = QListView()
+        list_view.setStyleSheet("""
+            QListView {
+                border: none;
+                outline: none;
+                background-color: white;
+            }
+        """)
+        list_view.setMouseTracking(True)  # 悬停高亮
+        list_view.setVerticalScrollMode(QListView.ScrollPerPixel)
+        list_view.setResizeMode(QListView.Adjust)
+        # 分批布局，大量记录时先显示首屏
+        list_view.setLayoutMode(QListView.Batched)
+        list_view.setBatchSize(100)
+        return list_view
+    
     def create_detail_area(self, splitter):
         """创建详细信息区域"""
         detail_frame = QFrame()
@@ -483,43 +488,6 @@ class NotesWindow(QMainWindow):
         
         layout.addWidget(stats_frame)
     
-    def resizeEvent(self, event):
-        """窗口大小改变时重新计算列表项高度"""
-        super().resizeEvent(event)
-        # 延迟更新以确保窗口完全调整大小后再重新计算
-        QTimer.singleShot(100, self.refresh_list_heights)
-    
-    def refresh_list_heights(self):
-        """刷新列表项高度（只刷新单词列表，句子列表使用固定高度）"""
-        try:
-            # 只刷新单词列表，因为句子列表现在使用固定高度
-            for i in range(self.words_list.count()):
-                item = self.words_list.item(i)
-                if item:
-                    widget = self.words_list.itemWidget(item)
-                    if widget:
-                        calculated_height = self.calculate_item_height(widget, self.words_list)
-                        item.setSizeHint(QSize(-1, calculated_height))
-        except Exception as e:
-            print(f"刷新列表高度时出错: {e}")
-    
-    def refresh_sentences_heights(self):
-        """句子列表使用固定高度，不需要刷新"""
-        pass  # 句子列表现在使用固定高度120px
-    
-    def refresh_words_heights(self):
-        """专门刷新单词列表的高度"""
-        try:
-            for i in range(self.words_list.count()):
-                item = self.words_list.item(i)
-                if item:
-                    widget = self.words_list.itemWidget(item)
-                    if widget:
-                        calculated_height = self.calculate_item_height(widget, self.words_list)
-                        item.setSizeHint(QSize(-1, calculated_height))
-        except Exception as e:
-            print(f"刷新单词列表高度时出错: {e}")
-    
     def show_empty_detail(self):
         """显示空详情提示"""
         # 清空之前的内容
@@ -552,192 +520,84 @@ class NotesWindow(QMainWindow):
     def load_records(self):
         """加载所有记录"""
         self.records = NotesManager.load_all_records()
-        self.filtered_records = self.records.copy()
+        self.is_unfiltered = True
+        self.search_index.build(self.records)
+        self.vocabulary.build(self.records)
+        self.date_index.build(self.records)
+        self.filtered_records = self.records_for_date("全部日期")
+        self.sentences_delegate.clear_size_cache()
+        self.words_delegate.clear_size_cache()
         
         # 更新日期筛选选项
-        dates = ["全部日期"] + list(set(record.get("date", "") for record in self.records))
-        dates.sort(reverse=True)
-        self.date_filter.clear()
-        self.date_filter.addItems(dates)
+        self.update_date_filter_options()
         
         # 更新列表
         self.update_sentences_list()
         self.update_words_list()
         self.update_statistics()
     
-    def calculate_text_height(self, label, width):
-        """计算文本标签的准确高度（支持中英文混合和长文本）"""
-        try:
-            font_metrics = label.fontMetrics()
-            text = label.text()
-            
-            if not text.strip():
-                return font_metrics.height()
-            
-            # 为文本预留更多宽度以避免不必要的换行
-            text_width = max(width - 50, 200)
-            
-            # 计算文本在给定宽度下需要的高度
-            text_rect = font_metrics.boundingRect(0, 0, text_width, 10000, 
-                                                Qt.TextWordWrap | Qt.AlignLeft, text)
-            
-            # 为多行文本加上额外的行间距
-            line_count = max(text_rect.height() // font_metrics.height(), 1)
-            line_spacing = 4 if line_count > 1 else 0
-            
-            return text_rect.height() + line_spacing + 15  # 加上内边距
-            
-        except Exception as e:
-            print(f"计算文本高度时出错: {e}")
-            return 30  # 返回默认高度
+    def update_date_filter_options(self):
+        """记录增删后更新日期筛选选项，尽量保留当前选择"""
+        current_date = self.date_filter.currentText()
+        dates = ["全部日期"] + self.date_index.dates()
+        if dates == [self.date_filter.itemText(i) for i in range(self.date_filter.count())]:
+            return
+        
+        self.date_filter.blockSignals(True)
+        self.date_filter.clear()
+        self.date_filter.addItems(dates)
+        if current_date in dates:
+            self.date_filter.setCurrentText(current_date)
+        self.date_filter.blockSignals(False)
     
-    def calculate_item_height(self, item_widget, list_widget):
-        """计算列表项的准确高度"""
-        try:
-            # 获取列表宽度，如果列表还未显示则使用默认值
-            if list_widget.isVisible() and list_widget.viewport().width() > 0:
-                list_width = list_widget.viewport().width()
-            else:
-                list_width = 400  # 默认宽度
-            
-            # 为item预留一些宽度（滚动条、边距等）
-            available_width = max(list_width - 60, 280)
-            
-            total_height = 0
-            layout = item_widget.layout()
-            
-            if layout:
-                # 计算所有子widget的高度
-                for i in range(layout.count()):
-                    child = layout.itemAt(i)
-                    if child and child.widget():
-                        widget = child.widget()
-                        if isinstance(widget, QLabel):
-                            # 确保label有文本再计算
-                            if widget.text().strip():
-                                text_height = self.calculate_text_height(widget, available_width)
-                                total_height += text_height
-                            else:
-                                total_height += 20  # 空文本的默认高度
-                        else:
-                            hint_height = widget.sizeHint().height()
-                            total_height += hint_height if hint_height > 0 else 20
-                
-                # 加上layout的间距和边距
-                if layout.count() > 1:
-                    total_height += layout.spacing() * (layout.count() - 1)
-                
-                margins = layout.contentsMargins()
-                total_height += margins.top() + margins.bottom()
-            
-            # 确保最小高度和合理的最大高度
-            return max(min(total_height + 30, 300), 80)
-            
-        except Exception as e:
-            print(f"计算item高度时出错: {e}")
-            return 100  # 返回默认高度
+    def on_record_saved(self, record):
+        """翻译窗口保存笔记后增量更新（新增记录或重复句子的更新）"""
+        record_id = record.get("id")
+        for i, existing in enumerate(self.records):
+            if existing.get("id") == record_id:
+                self.records[i] = record
+                self.search_index.remove_record(record_id)
+                self.vocabulary.update_record(record)
+                self.date_index.update_record(record)
+                break
+        else:
+            self.records.append(record)
+            self.vocabulary.add_record(record)
+            self.date_index.add_record(record)
+        
+        # add_record 会按内容哈希刷新该记录的搜索视图，搜索时只按 id 取视图
+        self.search_index.add_record(record)
+        self.sentences_delegate.invalidate(record_id)
+        self.words_delegate.clear_size_cache()
+        self.update_date_filter_options()
+        self.filter_records_with_fuzzy_search()
+    
+    def on_record_deleted(self, record_id):
+        """删除记录后增量更新，不重新读取笔记文件"""
+        self.records = [record for record in self.records if record.get("id") != record_id]
+        self.search_index.remove_record(record_id)
+        self.vocabulary.remove_record(record_id)
+        self.date_index.remove_record(record_id)
+        self.sentences_delegate.invalidate(record_id)
+        self.update_date_filter_options()
+        self.filter_records_with_fuzzy_search()
+        self.show_empty_detail()
     
     def update_words_list(self):
         """更新单词列表（考虑句子的学习次数来统计单词频次，支持搜索高亮）"""
-        self.words_list.clear()
-        
         search_query = self.search_input.text().strip()
         
-        # 收集所有单词及其出现次数和含义
-        word_stats = {}
-        for record in self.filtered_records:
-            words = record.get("important_words", {})
-            learn_count = record.get("learn_count", 1)  # 获取该句子的学习次数
-            
-            for word, meaning in words.items():
-                word_lower = word.lower()
-                if word_lower not in word_stats:
-                    word_stats[word_lower] = {
-                        "word": word,
-                        "meaning": meaning,
-                        "count": 0,
-                        "sentences": []
-                    }
-                # 根据句子的学习次数来累计单词出现次数
-                word_stats[word_lower]["count"] += learn_count
-                word_stats[word_lower]["sentences"].append(record)
-        
-        # 按出现频率排序
-        sorted_words = sorted(word_stats.values(), key=lambda x: x["count"], reverse=True)
+        # 单词汇总按句子的学习次数累计频次；筛选时只统计筛选出的记录
+        sorted_words = self.vocabulary.word_stats(None if self.is_unfiltered else self.filtered_records)
         
-        for word_data in sorted_words:
-            item = QListWidgetItem()
-            
-            # 创建自定义widget
-            item_widget = QWidget()
-            item_layout = QVBoxLayout(item_widget)
-            item_layout.setContentsMargins(0, 0, 0, 0)
-            item_layout.setSpacing(3)
-            
-            # 单词和频次（现在显示累计学习次数，带高亮）
-            word_text = f"{word_data['word']} ({word_data['count']}次)"
-            if search_query:
-                word_text = FuzzySearchEngine.highlight_matches(word_text, search_query)
-            
-            word_label = QLabel(word_text)
-            word_label.setStyleSheet("""
-                QLabel {
-                    font-size: 15px;
-                    font-weight: bold;
-                    color: #4a148c;
-                }
-            """)
-            word_label.setTextFormat(Qt.RichText)  # 支持HTML高亮
-            
-            # 为单词标签添加点击事件
-            word_label.mousePressEvent = lambda event, item=item: self.on_word_label_clicked(item, event)
-            
-            # 含义（设置合理的高度限制，带高亮）
-            meaning_text = self.format_meaning_text(word_data['meaning'])
-            
-            if search_query:
-                meaning_text = FuzzySearchEngine.highlight_matches(meaning_text, search_query)
-            
-            meaning_label = QLabel(meaning_text)
-            meaning_label.setStyleSheet("""
-                QLabel {
-                    font-size: 13px;
-                    color: #666;
-                    margin-top: 2px;
-                }
-            """)
-            meaning_label.setWordWrap(True)
-            meaning_label.setMaximumHeight(60)  # 限制含义标签的最大高度
-            meaning_label.setTextFormat(Qt.RichText)  # 支持HTML高亮
-            
-            # 为含义标签添加点击事件
-            meaning_label.mousePressEvent = lambda event, item=item: self.on_word_label_clicked(item, event)
-            
-            item_layout.addWidget(word_label)
-            item_layout.addWidget(meaning_label)
-            
-            # 为整个单词item widget添加点击事件，以便点击空白区域也能显示详情
-            item_widget.mousePressEvent = lambda event, item=item: self.on_word_label_clicked(item, event)
-            
-            # 为单词列表设置合理的最大高度，但允许适当调整
-            calculated_height = min(self.calculate_item_height(item_widget, self.words_list), 100)
-            item.setSizeHint(QSize(-1, calculated_height))
-            
-            self.words_list.addItem(item)
-            self.words_list.setItemWidget(item, item_widget)
-            
-            # 存储单词数据
-            item.setData(Qt.UserRole, word_data)
-        
-        # 延迟刷新高度以确保所有item都已正确创建
-        QTimer.singleShot(50, self.refresh_words_heights)
+        self.words_model.set_items(sorted_words, search_query)
     
     def on_search_text_changed(self):
         """搜索文本变化时的处理（防抖动）"""
         # 停止之前的计时器
         self.search_timer.stop()
-        # 设置300毫秒的延迟，减少频繁搜索
-        self.search_timer.start(300)
+        # 搜索在后台线程执行，只需短暂延迟合并连续输入
+        self.search_timer.start(150)
     
     def perform_search(self):
         """执行实际的搜索操作"""
@@ -750,44 +610,70 @@ class NotesWindow(QMainWindow):
         
         self.filtered_records = []
         self.search_scores = {}
+        self.is_unfiltered = not search_text and date_filter == "全部日期"
+        
+        # 新的搜索开始，取消仍在运行的旧搜索
+        self.search_generation += 1
+        if self.search_thread is not None:
+            self.search_thread.cancel()
+            self.search_thread = None
+            self.update_export_button()
         
         # 如果没有搜索内容，则只进行日期筛选
         if not search_text:
-            for record in self.records:
-                if date_filter == "全部日期" or record.get("date", "") == date_filter:
-                    self.filtered_records.append(record)
-                    self.search_scores[record.get("id", 0)] = 1.0
-        else:
-            # 使用模糊搜索算法
-            scored_records = []
-            
-            for record in self.records:
-                # 日期筛选
-                if date_filter != "全部日期" and record.get("date", "") != date_filter:
-                    continue
+            self.filtered_records = self.records_for_date(date_filter)
+            for record in self.filtered_records:
+                self.search_scores[record.get("id", 0)] = 1.0
+            
+            # 更新显示
+            self.update_sentences_list()
+            self.update_words_list()
+            self.update_statistics()
+            return
                 
-                # 计算搜索分数
-                score = FuzzySearchEngine.search_in_record(search_text, record)
+        # 使用模糊搜索算法：索引查询在界面线程完成（索引只在界面线程修改），后台线程只对候选记录打分
+        candidates = self.search_index.candidate_records(search_text)
+        search_thread = SearchThread(self.search_generation, search_text, date_filter, candidates)
+        search_thread.page_ready.connect(self.on_search_page_ready)
+        search_thread.finished.connect(lambda thread=search_thread: self.running_search_threads.discard(thread))
+        # 保留引用直到线程结束，避免线程对象在运行中被回收
+        self.running_search_threads.add(search_thread)
+        self.search_thread = search_thread
+        self.update_export_button()
+        search_thread.start()
+    
+    def records_for_date(self, date_filter):
+        """未搜索时显示的记录：按日期筛选，再按所选方式排序（都由日期索引提供）"""
+        most_studied = self.sort_order.currentText() == "学习最多"
+        if date_filter == "全部日期":
+            return self.date_index.most_studied() if most_studied else self.records.copy()
+        
+        records = self.date_index.records_on(date_filter)
+        if most_studied:
+            records.sort(key=lambda record: -record.get("learn_count", 1))
+        return records
                 
-                # 只保留有一定匹配度的结果
-                if score > 0.1:  # 设置一个最低阈值
-                    scored_records.append((record, score))
-                    self.search_scores[record.get("id", 0)] = score
+    def on_search_page_ready(self, generation, scored_records, is_final):
+        """接收搜索线程的结果：先显示首屏，完整排序完成后再更新全部列表"""
+        if generation != self.search_generation:
+            return  # 已过期的搜索
             
-            # 按照分数排序（由高到低）
-            scored_records.sort(key=lambda x: x[1], reverse=True)
-            self.filtered_records = [record for record, score in scored_records]
-        
-        # 更新显示
+        self.filtered_records = [record for record, score in scored_records]
+        self.search_scores = {record.get("id", 0): score for record, score in scored_records}
         self.update_sentences_list()
-        self.update_words_list()
-        self.update_statistics()
+        
+        if is_final:
+            self.search_thread = None
+            self.update_export_button()
+            self.update_words_list()
+            self.update_statistics()
     
-    def show_word_detail(self, item):
+    def show_word_detail(self, index):
         """显示单词详情"""
-        word_data = item.data(Qt.UserRole)
+        word_data = index.data(Qt.UserRole)
         if not word_data:
             return
+        sentences = self.vocabulary.records_for(word_data)
         
         # 清空之前的内容
         for i in reversed(range(self.detail_layout.count())):
@@ -838,7 +724,7 @@ class NotesWindow(QMainWindow):
         """)
         sentences_layout = QVBoxLayout(sentences_frame)
         
-        sentences_title = QLabel(f"📝 包含该单词的句子 ({len(word_data['sentences'])} 条)")
+        sentences_title = QLabel(f"📝 包含该单词的句子 ({len(sentences)} 条)")
         sentences_title.setStyleSheet("font-size: 16px; font-weight: bold; color: #ef6c00; margin-bottom: 10px;")
         sentences_layout.addWidget(sentences_title)
         
@@ -854,7 +740,7 @@ class NotesWindow(QMainWindow):
         """)
         sentences_container_layout = QVBoxLayout(sentences_container)
         
-        for i, record in enumerate(word_data['sentences'][:10], 1):  # 最多显示10条
+        for i, record in enumerate(sentences[:10], 1):  # 最多显示10条
             sentence_item = QFrame()
             sentence_item.setStyleSheet("""
                 QFrame {
@@ -893,8 +779,8 @@ class NotesWindow(QMainWindow):
             
             sentences_container_layout.addWidget(sentence_item)
         
-        if len(word_data['sentences']) > 10:
-            more_label = QLabel(f"... 还有 {len(word_data['sentences']) - 10} 条记录")
+        if len(sentences) > 10:
+            more_label = QLabel(f"... 还有 {len(sentences) - 10} 条记录")
             more_label.setStyleSheet("font-size: 12px; color: #888; text-align: center; padding: 10px;")
             more_label.setAlignment(Qt.AlignCenter)
             sentences_container_layout.addWidget(more_label)
@@ -905,195 +791,17 @@ class NotesWindow(QMainWindow):
         self.detail_layout.addStretch()
     
     def update_sentences_list(self):
-        """更新句子列表（显示学习次数信息和搜索匹配度，长句子使用滚动条）"""
-        self.sentences_list.clear()
-        
+        """更新句子列表（显示学习次数信息和搜索匹配度）"""
         search_query = self.search_input.text().strip()
-        
-        for record in self.filtered_records:
-            item = QListWidgetItem()
-            
-            # 创建主容器widget
-            item_widget = QWidget()
-            item_layout = QVBoxLayout(item_widget)
-            item_layout.setContentsMargins(0, 0, 0, 0)
-            item_layout.setSpacing(0)
-            
-            # 创建滚动区域
-            scroll_area = QScrollArea()
-            scroll_area.setWidgetResizable(True)
-            scroll_area.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
-            scroll_area.setVerticalScrollBarPolicy(Qt.ScrollBarAsNeeded)
-            scroll_area.setFrameShape(QFrame.NoFrame)
-            scroll_area.setStyleSheet("""
-                QScrollArea {
-                    border: none;
-                    background-color: transparent;
-                }
-                QScrollBar:vertical {
-                    background-color: #f0f0f0;
-                    width: 8px;
-                    border-radius: 4px;
-                }
-                QScrollBar::handle:vertical {
-                    background-color: #c0c0c0;
-                    border-radius: 4px;
-                    min-height: 20px;
-                }
-                QScrollBar::handle:vertical:hover {
-                    background-color: #a0a0a0;
-                }
-            """)
-            
-            # 创建内容widget
-            content_widget = QWidget()
-            content_layout = QVBoxLayout(content_widget)
-            content_layout.setContentsMargins(12, 12, 12, 12)  # 增加内边距
-            content_layout.setSpacing(8)  # 增加组件间距
-            
-            # 获取搜索匹配度（如果有）
-            record_id = record.get("id", 0)
-            match_score = self.search_scores.get(record_id, 0.0)
-            
-            # 原文（带高亮）
-            original_text = record.get("original_text", "")
-            if search_query:
-                original_text = FuzzySearchEngine.highlight_matches(original_text, search_query)
-            
-            original_label = QLabel(original_text)
-            original_label.setStyleSheet("""
-                QLabel {
-                    font-size: 15px;
-                    font-weight: bold;
-                    color: #212529;
-                    background-color: transparent;
-                    line-height: 1.4;
-                    padding: 5px 0;
-                }
-            """)
-            original_label.setWordWrap(True)
-            # 允许HTML显示用于高亮
-            original_label.setTextFormat(Qt.RichText)
-            
-            # 为原文标签添加点击事件
-            original_label.mousePressEvent = lambda event, item=item: self.on_label_clicked(item, event)
-            
-            # 翻译（带高亮）
-            translation_text = record.get("translation", "")
-            if search_query:
-                translation_text = FuzzySearchEngine.highlight_matches(translation_text, search_query)
-            
-            translation_label = QLabel(translation_text)
-            translation_label.setStyleSheet("""
-                QLabel {
-                    font-size: 14px;
-                    color: #6c757d;
-                    margin-top: 3px;
-                    background-color: transparent;
-                    line-height: 1.4;
-                    padding: 5px 0;
-                }
-            """)
-            translation_label.setWordWrap(True)
-            translation_label.setTextFormat(Qt.RichText)
-            
-            # 为翻译标签添加点击事件
-            translation_label.mousePressEvent = lambda event, item=item: self.on_label_clicked(item, event)
-            
-            # 时间和学习次数信息
-            learn_count = record.get("learn_count", 1)
-            time_info = f"🕐 {record.get('timestamp', '')}"
-            if learn_count > 1:
-                time_info += f" • 📚 已学习 {learn_count} 次"
-            
-            # 如果有搜索匹配度，显示它
-            if match_score > 0 and search_query:
-                match_percentage = int(match_score * 100)
-                time_info += f" • 🎯 匹配度: {match_percentage}%"
-            
-            # 创建底部信息区域的水平布局
-            bottom_info_layout = QHBoxLayout()
-            
-            time_label = QLabel(time_info)
-            time_label.setStyleSheet("""
-                QLabel {
-                    font-size: 12px;
-                    color: #868e96;
-                    margin-top: 5px;
-                    background-color: transparent;
-                    padding: 3px 0;
-                }
-            """)
-            
-            # 为时间标签添加点击事件
-            time_label.mousePressEvent = lambda event, item=item: self.on_label_clicked(item, event)
-            
-            # 创建删除按钮
-            delete_btn = QPushButton("🗑️ 删除")
-            delete_btn.setStyleSheet("""
-                QPushButton {
-                    background-color: #dc3545;
-                    color: white;
-                    border: none;
-                    padding: 4px 8px;
-                    border-radius: 4px;
-                    font-size: 11px;
-                    font-weight: bold;
-                    min-width: 50px;
-                    max-height: 24px;
-                }
-                QPushButton:hover {
-                    background-color: #c82333;
-                }
-                QPushButton:pressed {
-                    background-color: #a71e2a;
-                }
-            """)
-            delete_btn.clicked.connect(lambda: self.delete_record_with_confirmation(record.get("id")))
-            
-            # 添加到水平布局
-            bottom_info_layout.addWidget(time_label)
-            bottom_info_layout.addStretch()  # 添加弹性空间，把删除按钮推到右边
-            bottom_info_layout.addWidget(delete_btn)
-            
-            content_layout.addWidget(original_label)
-            content_layout.addWidget(translation_label)
-            content_layout.addLayout(bottom_info_layout)
-            
-            # 为整个内容widget添加点击事件，以便点击空白区域也能显示详情
-            content_widget.mousePressEvent = lambda event, item=item: self.on_label_clicked(item, event)
-            
-            # 设置滚动区域的内容
-            scroll_area.setWidget(content_widget)
-            item_layout.addWidget(scroll_area)
-            
-            # 增加列表项高度，让一般句子能完整显示，减少滚动条需求
-            item_height = 180  # 从120增加到180，约50%的提升
-            item.setSizeHint(QSize(-1, item_height))
-            
-            self.sentences_list.addItem(item)
-            self.sentences_list.setItemWidget(item, item_widget)
-            
-            # 存储记录数据
-            item.setData(Qt.UserRole, record)
+        self.sentences_model.set_items(self.filtered_records, search_query, self.search_scores)
     
     def filter_records(self):
         """筛选记录（兼容旧版本，调用新的模糊搜索）"""
         self.filter_records_with_fuzzy_search()
     
-    def on_label_clicked(self, item, event):
-        """处理标签点击事件，显示记录详情"""
-        if event.button() == Qt.LeftButton:  # 只处理左键点击
-            self.show_record_detail(item)
-    
-    def on_word_label_clicked(self, item, event):
-        """处理单词标签点击事件，显示单词详情"""
-        if event.button() == Qt.LeftButton:  # 只处理左键点击
-            self.show_word_detail(item)
-    
-    def show_record_detail(self, item):
+    def show_record_detail(self, index):
         """显示记录详情"""
-        record = item.data(Qt.UserRole)
+        record = index.data(Qt.UserRole)
         if not record:
             return
         
@@ -1340,18 +1048,11 @@ class NotesWindow(QMainWindow):
         filtered_records = len(self.filtered_records)
         
         # 统计独特单词数
-        all_words = set()
-        filtered_words = set()
-        for record in self.records:
-            words = record.get("important_words", {}).keys()
-            all_words.update(w.lower() for w in words)
-        
-        for record in self.filtered_records:
-            words = record.get("important_words", {}).keys()
-            filtered_words.update(w.lower() for w in words)
+        all_words_count = self.vocabulary.word_count()
+        filtered_words_count = self.words_model.rowCount()
         
         today = datetime.now().strftime("%Y-%m-%d")
-        today_records = len([r for r in self.records if r.get("date", "") == today])
+        today_records = self.date_index.count_on(today)
         
         # 添加搜索状态信息
         search_query = self.search_input.text().strip()
@@ -1359,47 +1060,85 @@ class NotesWindow(QMainWindow):
         if search_query:
             search_info = f" | 🔍 搜索: '{search_query}'"
         
-        stats_text = f"📊 总计: {total_records} 句子, {len(all_words)} 单词 | 📝 显示: {filtered_records} 句子, {len(filtered_words)} 单词 | 🗓️ 今日: {today_records} 条{search_info}"
+        stats_text = f"📊 总计: {total_records} 句子, {all_words_count} 单词 | 📝 显示: {filtered_records} 句子, {filtered_words_count} 单词 | 🗓️ 今日: {today_records} 条{search_info}"
         self.stats_label.setText(stats_text)
     
     def export_notes(self):
-        """导出笔记"""
+        """导出笔记（按当前搜索和日期筛选结果，后台流式写入）"""
+        if self.export_thread is not None and self.export_thread.isRunning():
+            QMessageBox.information(self, "提示", "正在导出笔记，请稍候...")
+            return
+        if self.search_thread is not None:
+            # 搜索还没有完成时 filtered_records 只是首屏的临时结果
+            QMessageBox.information(self, "提示", "正在搜索，请等待搜索完成后再导出")
+            return
+        
         try:
-            from datetime import datetime
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            
-            # 这里可以实现导出功能，比如导出为文本文件
             current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-            export_path = os.path.join(current_dir, f"learning_notes_export_{timestamp}.txt")
+            default_path = os.path.join(current_dir, f"learning_notes_export_{timestamp}.txt")
             
-            with open(export_path, 'w', encoding='utf-8') as f:
-                f.write("=== 英语学习笔记导出 ===\n")
-                f.write(f"导出时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-                f.write(f"总记录数: {len(self.records)}\n\n")
+            # 文件类型筛选 -> 导出格式
+            name_filters = {}
+            for export_format, (display_name, extension) in NotesExporter.FORMATS.items():
+                name_filters[f"{display_name} (*{extension})"] = export_format
+            
+            export_path, selected_filter = QFileDialog.getSaveFileName(
+                self, "导出笔记", default_path, ";;".join(name_filters))
+            if not export_path:
+                return
                 
-                for i, record in enumerate(self.records, 1):
-                    f.write(f"--- 记录 {i} ---\n")
-                    f.write(f"时间: {record.get('timestamp', '')}\n")
-                    f.write(f"原文: {record.get('original_text', '')}\n")
-                    f.write(f"翻译: {record.get('translation', '')}\n")
+            export_format = name_filters.get(selected_filter, "txt")
+            extension = NotesExporter.FORMATS[export_format][1]
+            if not export_path.lower().endswith(extension):
+                export_path = os.path.splitext(export_path)[0] + extension
                     
-                    if record.get("important_words"):
-                        f.write("重要单词:\n")
-                        for word, meaning in record.get("important_words", {}).items():
-                            meaning_text = self.format_meaning_text(meaning)
-                            f.write(f"  • {word}: {meaning_text}\n")
-                    
-                    if record.get("grammar_points"):
-                        f.write("语法解释:\n")
-                        for sentence, explanation in record.get("grammar_points", {}).items():
-                            f.write(f"  【{sentence}】\n  {explanation}\n")
-                    
-                    f.write("\n" + "="*50 + "\n\n")
-            
-            QMessageBox.information(self, "导出成功", f"笔记已导出至:\n{export_path}")
+            # 只复制记录引用，格式化和写入都在后台线程中逐条完成
+            self.export_thread = ExportThread(list(self.filtered_records), export_path, export_format)
+            self.export_thread.progress_updated.connect(self.on_export_progress)
+            self.export_thread.export_completed.connect(self.on_export_completed)
+            self.export_thread.export_failed.connect(self.on_export_failed)
+            self.export_thread.finished.connect(self.on_export_finished)
+            self.export_btn.setEnabled(False)
+            self.export_btn.setText("📤 导出中...")
+            self.export_thread.start()
         except Exception as e:
             QMessageBox.warning(self, "导出失败", f"导出笔记时发生错误:\n{str(e)}")
     
+    def on_export_progress(self, written, total):
+        percent = int(written * 100 / total) if total else 100
+        self.export_btn.setText(f"📤 导出中 {percent}%")
+    
+    def on_export_completed(self, export_path, written):
+        QMessageBox.information(self, "导出成功", f"已导出 {written} 条笔记至:\n{export_path}")
+    
+    def on_export_failed(self, error_message):
+        QMessageBox.warning(self, "导出失败", f"导出笔记时发生错误:\n{error_message}")
+    
+    def on_export_finished(self):
+        self.export_thread = None
+        self.export_btn.setText("📤 导出笔记")
+        self.update_export_button()
+    
+    def update_export_button(self):
+        """导出进行中或搜索尚未得到最终结果时禁用导出按钮"""
+        exporting = self.export_thread is not None and self.export_thread.isRunning()
+        self.export_btn.setEnabled(not exporting and self.search_thread is None)
+    
+    def closeEvent(self, event):
+        """关闭窗口前取消并等待后台线程，避免线程对象在运行中被销毁"""
+        self.search_timer.stop()
+        threads = list(self.running_search_threads)
+        if self.export_thread is not None:
+            threads.append(self.export_thread)
+        for thread in threads:
+            thread.cancel()
+        for thread in threads:
+            thread.wait()
+        self.running_search_threads.clear()
+        self.search_thread = None
+        super().closeEvent(event)
+    
     def open_quiz_window(self):
         """打开题库练习窗口"""
         try:
@@ -1460,8 +1199,8 @@ class NotesWindow(QMainWindow):
                 # 执行删除
                 success = NotesManager.delete_record(record_id)
                 if success:
-                    # 删除成功，重新加载数据并更新界面
-                    self.load_records()
+                    # 删除成功，增量更新界面
+                    self.on_record_deleted(record_id)
                     QMessageBox.information(self, "删除成功", "记录已成功删除！")
                     
                     # 如果有RAG管理器，需要重新构建索引
@@ -1,33 +1,33 @@
 import os
 import sys
-import json
 import tempfile
 import shutil
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
                              QTextEdit, QFrame, QDesktopWidget, QApplication, QMessageBox)
-from PyQt5.QtCore import Qt, QPoint
+from PyQt5.QtCore import Qt, QPoint, QTimer
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
 from app.managers import ConfigManager, NotesManager, rag_manager
-from app.threads import ProcessingThread, TextCorrectionThread
+from app.threads import CapturePipeline, TextCorrectionThread
 from app.ui.notes_window import NotesWindow
 from app.ui.screenshot_widget import ScreenshotWidget
 from app.ui.region_input_dialog import RegionInputDialog
 from app.ui.draggable_button import DraggableButton
+from app.utils.tracing import tracer
+from llm.response_parser import ResponseParseError, parse_translation
 
 class TranslationWindow(QWidget):
     def __init__(self, main_window=None):
         super().__init__()
         self.main_window = main_window  # 主窗口引用
         self.notes_window = None  # 初始化笔记窗口
-        self.processing_thread = None  # 添加线程管理
-        self.correction_thread = None  # OCR文本修正线程
-        self.is_processing = False  # 添加处理状态标志
+        self.running_correction_threads = set()  # 运行中的OCR文本修正线程，结束前保留引用
         self.user_level = ConfigManager.load_user_level()  # 加载用户水平设置
         self.font_size = ConfigManager.load_font_size()  # 加载字体大小设置
         self.zoom_scale = ConfigManager.load_zoom_scale()  # 加载缩放比例设置
         self.is_details_visible = True  # 翻译详情区域是否可见
+        self.tracing_settings = ConfigManager.load_tracing_settings()  # 阶段耗时统计设置
         
         # 模型已在run.py中预加载，这里无需重复初始化
         print("[UI] 启动翻译窗口界面...")
@@ -36,6 +36,30 @@ class TranslationWindow(QWidget):
         print(f"[UI] 缩放比例: {self.zoom_scale}%")
         
         self.init_ui()
+        
+        # 截图翻译流水线：OCR、分析和翻译在各自的线程中并行处理
+        pipeline_settings = ConfigManager.load_pipeline_settings()
+        self.pipeline = CapturePipeline(self.user_level, pipeline_settings["queue_size"],
+                                        pipeline_settings["overflow_policy"])
+        self.pipeline.text_processed.connect(self.on_text_processed)
+        self.pipeline.error_occurred.connect(self.on_error)
+        self.pipeline.status_changed.connect(self.on_pipeline_status)
+        self.pipeline.start()
+        
+        # 配置变化时同步更新（设置页修改或 config.json 被外部修改）
+        self.config_subscriptions = [
+            ("region", self.on_region_config_changed),
+            ("font_size", self.on_font_size_config_changed),
+            ("user_level", self.on_user_level_config_changed),
+        ]
+        for section, callback in self.config_subscriptions:
+            ConfigManager.subscribe(section, callback)
+        
+        # 阶段耗时面板（F10切换），显示时每秒刷新
+        self.trace_timer = QTimer(self)
+        self.trace_timer.timeout.connect(self.refresh_trace_overlay)
+        if self.tracing_settings["overlay"]:
+            self.toggle_trace_overlay()
     
     @staticmethod
     def format_meaning_text(meaning):
@@ -53,16 +77,30 @@ class TranslationWindow(QWidget):
         
     
     def auto_screenshot(self):
-        """自动截取用户设置的区域并处理"""
-        if self.is_processing:
-            print("OCR处理正在进行中，忽略此次调用")
-            self.status_label.setText("OCR处理正在进行中，请等待...")
-            return
-            
+        """自动截取用户设置的区域并处理（字幕没有变化时跳过翻译）"""
         try:
             # 获取保存的截图区域
             x, y, width, height = ConfigManager.load_region()
+            img_path, temp_path, trace_id = self.capture_region(x, y, width, height)
+            
+            print(f"截图已保存到: {img_path}")
+            self.status_label.setText(f"自动截图完成 (区域: {x},{y},{width}x{height})，正在处理...")
             
+            # 调用统一的处理方法
+            self.start_ocr_processing(temp_path, skip_duplicates=True, trace_id=trace_id)
+        
+        except Exception as e:
+            print(f"自动截图失败: {str(e)}")
+            self.status_label.setText(f"自动截图失败: {str(e)}")
+    
+    def capture_region(self, x, y, width, height):
+        """
+        截取屏幕区域，保存为 img/1.png 并复制一份临时文件用于处理（避免删除原始文件）
+        
+        Returns:
+            tuple: (图片路径, 临时文件路径, trace_id)
+        """
+        with tracer.span("capture") as span:
             screen = QApplication.primaryScreen()
             screenshot = screen.grabWindow(0, x, y, width, height)
             
@@ -76,69 +114,93 @@ class TranslationWindow(QWidget):
             img_path = os.path.join(img_dir, "1.png")
             screenshot.save(img_path, 'PNG')
             
-            print(f"截图已保存到: {img_path}")
-            self.status_label.setText(f"自动截图完成 (区域: {x},{y},{width}x{height})，正在处理...")
-            
-            # 创建临时文件副本用于处理（避免删除原始文件）
             temp_file = tempfile.NamedTemporaryFile(suffix='.png', delete=False)
             shutil.copy2(img_path, temp_file.name)
             temp_file.close()
             
-            # 调用统一的处理方法
-            self.start_ocr_processing(temp_file.name)
-            
-        except Exception as e:
-            print(f"自动截图失败: {str(e)}")
-            self.status_label.setText(f"自动截图失败: {str(e)}")
+        return img_path, temp_file.name, span.trace_id
         
     def closeEvent(self, event):
         """窗口关闭时停止热键监听"""
-        # 停止OCR处理线程
-        if hasattr(self, 'processing_thread') and self.processing_thread and self.processing_thread.isRunning():
-            self.processing_thread.quit()
-            self.processing_thread.wait(3000)  # 等待3秒
+        # 停止截图翻译流水线
+        self.pipeline.stop(3000)  # 等待3秒
+        for thread in list(self.running_correction_threads):
+            thread.wait(3000)
+        self.trace_timer.stop()
+        for section, callback in self.config_subscriptions:
+            ConfigManager.unsubscribe(section, callback)
+        self.export_trace_stats()
         
         event.accept()
         
-    def start_ocr_processing(self, image_path):
-        """统一的OCR处理方法"""
-        if self.is_processing:
-            print("已有OCR处理正在进行，忽略新请求")
+    def export_trace_stats(self):
+        """导出各阶段耗时分布到 traces 目录（jsonl 追加一行，prometheus 覆盖写入）"""
+        if not tracer.histograms():
             return
-        
-        # 停止之前的线程（如果存在）
-        if hasattr(self, 'processing_thread') and self.processing_thread and self.processing_thread.isRunning():
-            self.processing_thread.quit()
-            self.processing_thread.wait(1000)
-        
-        print(f"开始OCR处理: {image_path}")
-        self.is_processing = True
-        
-        # 禁用按钮
-        self.clear_btn.setEnabled(False)
-        self.screenshot_btn.setEnabled(False)
-        self.setup_region_btn.setEnabled(False)
-        
-        # 创建并启动处理线程
-        self.processing_thread = ProcessingThread(image_path, self.user_level)
-        self.processing_thread.text_processed.connect(self.on_text_processed)
-        self.processing_thread.error_occurred.connect(self.on_error)
-        self.processing_thread.finished.connect(self.on_processing_finished)
-        self.processing_thread.start()
+        export_format = self.tracing_settings["export_format"]
+        current_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        file_name = "latency.prom" if export_format == "prometheus" else "latency.jsonl"
+        tracer.export(os.path.join(current_dir, "traces", file_name), export_format)
     
-    def on_processing_finished(self):
-        """OCR处理完成后的清理工作"""
-        print("OCR处理完成")
-        self.is_processing = False
-        
-        # 重新启用按钮
-        self.clear_btn.setEnabled(True)
-        self.screenshot_btn.setEnabled(True)
-        self.setup_region_btn.setEnabled(True)
-        
-        # 清理线程引用
-        if hasattr(self, 'processing_thread'):
-            self.processing_thread = None
+    def toggle_trace_overlay(self):
+        """显示/隐藏阶段耗时面板"""
+        if self.trace_label.isVisible():
+            self.trace_timer.stop()
+            self.trace_label.hide()
+        else:
+            self.refresh_trace_overlay()
+            self.trace_label.show()
+            self.trace_timer.start(1000)
+    
+    def refresh_trace_overlay(self):
+        self.trace_label.setText(tracer.format_summary())
+    
+    def start_ocr_processing(self, image_path, skip_duplicates=False, trace_id=None):
+        """统一的OCR处理方法：截图放入流水线排队，正在翻译上一句时也不会丢失"""
+        pending = self.pipeline.pending_count()
+        seq = self.pipeline.submit(image_path, skip_duplicates, trace_id)
+        print(f"截图 #{seq} 已加入处理队列: {image_path}")
+        if pending:
+            self.status_label.setText(f"已加入队列，前面还有 {pending} 张截图等待处理...")
+    
+    def on_pipeline_status(self, status):
+        """流水线阶段状态"""
+        self.status_label.setText(status)
+    
+    def apply_font_size(self):
+        """按 self.font_size 设置翻译、单词和语法区域的字体"""
+        detail_font_size = max(12, int(self.font_size * 0.82))
+        for label, text_edit, color, text_font_size in (
+                (self.translation_label, self.translation_text, "#0066CC", self.font_size),
+                (self.words_label, self.words_text, "#FF0000", detail_font_size),
+                (self.grammar_label, self.grammar_text, "#FF00FF", detail_font_size)):
+            label.setStyleSheet(f"color: {color}; font-size: {self.font_size}px; font-weight: bold; margin-top: 15px;")
+            text_edit.setStyleSheet(f"""
+                QTextEdit {{
+                    background-color: rgba(0, 0, 0, 0);
+                    color: {color};
+                    border: none;
+                    border-radius: 0px;
+                    padding: 10px;
+                    font-size: {text_font_size}px;
+                    font-weight: bold;
+                }}
+            """)
+    
+    def on_font_size_config_changed(self):
+        self.font_size = ConfigManager.load_font_size()
+        self.apply_font_size()
+        for text_edit in (self.translation_text, self.words_text, self.grammar_text):
+            self.adjust_text_height(text_edit)
+    
+    def on_user_level_config_changed(self):
+        self.user_level = ConfigManager.load_user_level()
+        # 流水线读取 user_level 时取最新值，下一句翻译生效
+        self.pipeline.user_level = self.user_level
+    
+    def on_region_config_changed(self):
+        x, y, width, height = ConfigManager.load_region()
+        self.status_label.setText(f"区域已更新: ({x},{y}) {width}x{height} | 按2键或点击'快速截图' | F9切换置顶")
         
     def init_ui(self):
         self.setWindowTitle("二游翻译助手")
@@ -330,21 +392,9 @@ class TranslationWindow(QWidget):
         
         # 翻译结果显示
         self.translation_label = QLabel("翻译:")
-        self.translation_label.setStyleSheet(f"color: #0066CC; font-size: {self.font_size}px; font-weight: bold; margin-top: 15px;")
         frame_layout.addWidget(self.translation_label)
         
         self.translation_text = QTextEdit()
-        self.translation_text.setStyleSheet(f"""
-            QTextEdit {{
-                background-color: rgba(0, 0, 0, 0);
-                color: #0066CC;
-                border: none;
-                border-radius: 0px;
-                padding: 10px;
-                font-size: {self.font_size}px;
-                font-weight: bold;
-            }}
-        """)
         self.translation_text.setReadOnly(True)
         self.translation_text.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
         self.translation_text.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
@@ -352,22 +402,9 @@ class TranslationWindow(QWidget):
         
         # 重要单词显示
         self.words_label = QLabel("重要单词:")
-        self.words_label.setStyleSheet(f"color: #FF0000; font-size: {self.font_size}px; font-weight: bold; margin-top: 15px;")
         frame_layout.addWidget(self.words_label)
         
         self.words_text = QTextEdit()
-        words_font_size = max(12, int(self.font_size * 0.82))
-        self.words_text.setStyleSheet(f"""
-            QTextEdit {{
-                background-color: rgba(0, 0, 0, 0);
-                color: #FF0000;
-                border: none;
-                border-radius: 0px;
-                padding: 10px;
-                font-size: {words_font_size}px;
-                font-weight: bold;
-            }}
-        """)
         self.words_text.setReadOnly(True)
         self.words_text.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
         self.words_text.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
@@ -375,27 +412,16 @@ class TranslationWindow(QWidget):
         
         # 语法解释显示
         self.grammar_label = QLabel("语法解释:")
-        self.grammar_label.setStyleSheet(f"color: #FF00FF; font-size: {self.font_size}px; font-weight: bold; margin-top: 15px;")
         frame_layout.addWidget(self.grammar_label)
         
         self.grammar_text = QTextEdit()
-        grammar_font_size = max(12, int(self.font_size * 0.82))
-        self.grammar_text.setStyleSheet(f"""
-            QTextEdit {{
-                background-color: rgba(0, 0, 0, 0);
-                color: #FF00FF;
-                border: none;
-                border-radius: 0px;
-                padding: 10px;
-                font-size: {grammar_font_size}px;
-                font-weight: bold;
-            }}
-        """)
         self.grammar_text.setReadOnly(True)
         self.grammar_text.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
         self.grammar_text.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
         frame_layout.addWidget(self.grammar_text)
         
+        self.apply_font_size()
+        
         # 状态显示
         x, y, width, height = ConfigManager.load_region()
         self.status_label = QLabel(f"当前区域: ({x},{y}) {width}x{height}")
@@ -411,6 +437,21 @@ class TranslationWindow(QWidget):
         """)
         frame_layout.addWidget(self.status_label)
         
+        # 阶段耗时面板（p50/p95/p99，毫秒）
+        self.trace_label = QLabel()
+        self.trace_label.setStyleSheet("""
+            QLabel {
+                color: #FFD700;
+                font-family: Consolas, monospace;
+                font-size: 12px;
+                padding: 5px;
+                background-color: rgba(0, 0, 0, 160);
+                border: none;
+            }
+        """)
+        self.trace_label.hide()
+        frame_layout.addWidget(self.trace_label)
+        
         main_layout.addWidget(self.main_frame)
         self.setLayout(main_layout)
         
@@ -443,9 +484,8 @@ class TranslationWindow(QWidget):
         
     def on_region_selected(self, x, y, width, height):
         """处理区域选择完成"""
-        if ConfigManager.save_region(x, y, width, height):
-            self.status_label.setText(f"区域已更新: ({x},{y}) {width}x{height} | 按2键或点击'快速截图' | F9切换置顶")
-        else:
+        # 保存成功后由 on_region_config_changed 更新状态栏
+        if not ConfigManager.save_region(x, y, width, height):
             self.status_label.setText("区域设置失败，请重试")
         
     def keyPressEvent(self, event):
@@ -453,6 +493,9 @@ class TranslationWindow(QWidget):
         # F9键切换置顶状态
         if event.key() == Qt.Key_F9:
             self.toggle_topmost()
+        # F10键显示/隐藏阶段耗时面板
+        elif event.key() == Qt.Key_F10:
+            self.toggle_trace_overlay()
         super().keyPressEvent(event)
     
     def toggle_topmost(self):
@@ -478,45 +521,19 @@ class TranslationWindow(QWidget):
             self.move(event.globalPos() - self.drag_position)
             
     def start_screenshot(self):
-        """直接截取用户设置的区域"""
-        if self.is_processing:
-            print("OCR处理正在进行中，忽略此次调用")
-            self.status_label.setText("OCR处理正在进行中，请等待...")
-            return
-        
-        # 自动清除之前的翻译内容
-        self.clear_translation()
-        print("已自动清除之前的翻译内容")
-            
+        """直接截取用户设置的区域（新的翻译完成后替换当前内容）"""
         try:
             print("开始快速截图...")
             
             # 获取保存的截图区域
             x, y, width, height = ConfigManager.load_region()
-            
-            screen = QApplication.primaryScreen()
-            screenshot = screen.grabWindow(0, x, y, width, height)
-            
-            # 确保img目录存在
-            current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-            img_dir = os.path.join(current_dir, "img")
-            if not os.path.exists(img_dir):
-                os.makedirs(img_dir)
-            
-            # 保存为1.png
-            img_path = os.path.join(img_dir, "1.png")
-            screenshot.save(img_path, 'PNG')
+            img_path, temp_path, trace_id = self.capture_region(x, y, width, height)
             
             print(f"快速截图完成: {img_path}")
             self.status_label.setText(f"快速截图完成 (区域: {x},{y},{width}x{height})，正在处理...")
             
-            # 创建临时文件副本用于处理
-            temp_file = tempfile.NamedTemporaryFile(suffix='.png', delete=False)
-            shutil.copy2(img_path, temp_file.name)
-            temp_file.close()
-            
             # 调用统一的处理方法
-            self.start_ocr_processing(temp_file.name)
+            self.start_ocr_processing(temp_path, trace_id=trace_id)
             
         except Exception as e:
             print(f"快速截图失败: {str(e)}")
@@ -672,25 +689,15 @@ class TranslationWindow(QWidget):
             # 确保主窗口显示
             self.show()
     
-    def on_text_processed(self, original_text, translated_text):
+    def on_text_processed(self, original_text, translated_text, trace_id=0):
         # 不再显示原文，直接处理翻译结果
         
         
         # 尝试解析JSON格式的翻译结果
         try:
-            json_str = translated_text.strip()
-            
-            # 移除可能的Markdown格式
-            if json_str.startswith("```json"):
-                json_str = json_str[7:]
-            if json_str.startswith("```"):
-                json_str = json_str[3:]
-            if json_str.endswith("```"):
-                json_str = json_str[:-3]
-            json_str = json_str.strip()
-            
-            
-            result_dict = json.loads(json_str)
+            # 容忍Markdown代码块、多余的说明文字和被截断的JSON
+            with tracer.span("json_parse", trace_id):
+                result_dict = parse_translation(translated_text)
             
             # 显示翻译
             translation = result_dict.get('translation', '未找到翻译')
@@ -740,18 +747,22 @@ class TranslationWindow(QWidget):
             # 保存翻译记录到笔记（只有API翻译的才保存，避免重复）
             if not result_dict.get('from_rag', False):
                 # 启动独立线程修正OCR文本，然后保存
-                self.correction_thread = TextCorrectionThread(
+                correction_thread = TextCorrectionThread(
                     original_text,
                     translation,
                     important_words,
                     grammar
                 )
-                self.correction_thread.correction_completed.connect(self.on_correction_completed)
-                self.correction_thread.correction_failed.connect(self.on_correction_failed)
-                self.correction_thread.start()
+                correction_thread.correction_completed.connect(self.on_correction_completed)
+                correction_thread.correction_failed.connect(self.on_correction_failed)
+                # 流水线会连续返回结果，上一句的修正可能还在进行，线程结束前不能释放
+                correction_thread.finished.connect(
+                    lambda thread=correction_thread: self.running_correction_threads.discard(thread))
+                self.running_correction_threads.add(correction_thread)
+                correction_thread.start()
                 print("已启动OCR文本修正线程（后台运行）")
             
-        except json.JSONDecodeError as e:
+        except ResponseParseError as e:
             print(f"JSON解析错误: {e}")
             # 如果不是JSON格式，直接显示翻译结果
             self.translation_text.setPlainText(translated_text)
@@ -771,6 +782,11 @@ class TranslationWindow(QWidget):
             self.adjust_text_height(self.grammar_text)
             self.status_label.setText("处理过程中出现错误")
     
+        # 这张截图的耗时分解（total 含排队等待时间）
+        breakdown = tracer.finish_trace(trace_id)
+        if breakdown:
+            print("阶段耗时(ms): " + " | ".join(f"{name} {ms:.0f}" for name, ms in breakdown.items()))
+    
     def on_correction_completed(self, corrected_text, translation, important_words, grammar_points):
         """OCR文本修正完成后保存笔记"""
         try:
@@ -784,6 +800,9 @@ class TranslationWindow(QWidget):
                 print("翻译记录已保存到笔记（使用修正后的文本）")
                 # 同时添加到RAG索引
                 rag_manager.add_new_record_to_index(corrected_text, translation, important_words, grammar_points)
+                # 笔记窗口已打开时增量更新
+                if self.notes_window:
+                    self.notes_window.on_record_saved(saved)
         except Exception as save_error:
             print(f"保存翻译记录失败: {save_error}")
     
@@ -1,3 +1,12 @@
 from .fuzzy_search_engine import FuzzySearchEngine
+from .notes_search_index import NotesSearchIndex
+from .record_search_view import RecordSearchView, SearchViewCache, search_view_cache
+from .vocabulary_index import VocabularyIndex
+from .notes_exporter import NotesExporter, format_meaning
+from .notes_date_index import NotesDateIndex
+from .tracing import Tracer, tracer
+from .language_detect import is_english_text
 
-__all__ = ['FuzzySearchEngine']
+__all__ = ['FuzzySearchEngine', 'NotesSearchIndex', 'RecordSearchView', 'SearchViewCache', 'search_view_cache',
+           'VocabularyIndex', 'NotesExporter', 'format_meaning',
+           'NotesDateIndex', 'Tracer', 'tracer', 'is_english_text']
\ No newline at end of file
@@ -1,27 +1,140 @@
 import re
 
+import numpy as np
+
+from .record_search_view import search_view_cache
+
 
 class FuzzySearchEngine:
     
     @staticmethod
     def levenshtein_distance(s1, s2):
+        return FuzzySearchEngine.bounded_levenshtein_distance(s1, s2, max(len(s1), len(s2)))
+    
+    @staticmethod
+    def bounded_levenshtein_distance(s1, s2, max_distance):
+        """
+        带上限的编辑距离（Ukkonen 截断）
+        
+        只计算对角线附近宽度为 max_distance 的带状区域，一旦整行的最小值超过上限即提前退出。
+        
+        Args:
+            s1: 字符串1
+            s2: 字符串2
+            max_distance: 距离上限
+        
+        Returns:
+            int: 编辑距离；超过上限时返回 max_distance + 1
+        """
         if len(s1) < len(s2):
-            return FuzzySearchEngine.levenshtein_distance(s2, s1)
-        
-        if len(s2) == 0:
-            return len(s1)
-        
-        previous_row = list(range(len(s2) + 1))
-        for i, c1 in enumerate(s1):
-            current_row = [i + 1]
-            for j, c2 in enumerate(s2):
-                insertions = previous_row[j + 1] + 1
-                deletions = current_row[j] + 1
-                substitutions = previous_row[j] + (c1 != c2)
-                current_row.append(min(insertions, deletions, substitutions))
+            s1, s2 = s2, s1
+        
+        # 去掉公共前缀和后缀，它们不影响编辑距离
+        prefix = 0
+        shorter = len(s2)
+        while prefix < shorter and s1[prefix] == s2[prefix]:
+            prefix += 1
+        suffix = 0
+        while suffix < shorter - prefix and s1[-1 - suffix] == s2[-1 - suffix]:
+            suffix += 1
+        if prefix or suffix:
+            s1 = s1[prefix:len(s1) - suffix]
+            s2 = s2[prefix:len(s2) - suffix]
+        
+        len1, len2 = len(s1), len(s2)
+        over_limit = max_distance + 1
+        if len1 - len2 > max_distance:
+            return over_limit
+        if len2 == 0:
+            return len1
+        
+        # 两行缓冲区交替使用，带状区域外的格子视为超过上限
+        previous_row = list(range(len2 + 1))
+        current_row = [over_limit] * (len2 + 1)
+        for i in range(1, len1 + 1):
+            c1 = s1[i - 1]
+            low = max(1, i - max_distance)
+            high = min(len2, i + max_distance)
+            
+            if low == 1:
+                current_row[0] = i
+                row_min = i
+            else:
+                current_row[low - 1] = over_limit
+                row_min = over_limit
+            
+            left = current_row[low - 1]
+            for j in range(low, high + 1):
+                value = previous_row[j - 1] + (c1 != s2[j - 1])
+                if previous_row[j] + 1 < value:
+                    value = previous_row[j] + 1
+                if left + 1 < value:
+                    value = left + 1
+                current_row[j] = value
+                left = value
+                if value < row_min:
+                    row_min = value
+            
+            if row_min > max_distance:
+                return over_limit
+            previous_row, current_row = current_row, previous_row
+        
+        distance = previous_row[len2]
+        return distance if distance <= max_distance else over_limit
+    
+    @staticmethod
+    def levenshtein_distance_batch(query, candidates):
+        """
+        使用 NumPy 一次计算查询词与多个候选字符串的编辑距离
+        
+        按查询词的字符逐行推进，同一行内所有候选字符串并行计算；
+        行内的插入依赖通过累计最小值 (cur[j] - j = cummin(t[k] - k)) 消除。
+        
+        Args:
+            query: 查询词
+            candidates: 候选字符串列表
+        
+        Returns:
+            numpy.ndarray: 与 candidates 对应的编辑距离
+        """
+        count = len(candidates)
+        if count == 0:
+            return np.zeros(0, dtype=np.int32)
+        
+        lengths = np.fromiter((len(text) for text in candidates), dtype=np.intp, count=count)
+        width = int(lengths.max())
+        if not query:
+            return lengths.astype(np.int32)
+        if width == 0:
+            return np.full(count, len(query), dtype=np.int32)
+        
+        # 候选字符串按码点填充为矩阵，填充位 -1 不会与任何字符相等
+        codes = np.full((count, width), -1, dtype=np.int64)
+        for row, text in enumerate(candidates):
+            if text:
+                codes[row, :len(text)] = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+        
+        columns = np.arange(width + 1, dtype=np.int32)
+        previous_row = np.broadcast_to(columns, (count, width + 1)).copy()
+        for i, char in enumerate(query, 1):
+            costs = (codes != ord(char)).astype(np.int32)
+            current_row = np.empty_like(previous_row)
+            current_row[:, 0] = i
+            np.minimum(previous_row[:, 1:] + 1, previous_row[:, :-1] + costs, out=current_row[:, 1:])
+            current_row -= columns
+            np.minimum.accumulate(current_row, axis=1, out=current_row)
+            current_row += columns
             previous_row = current_row
         
-        return previous_row[-1]
+        return previous_row[np.arange(count), lengths]
+    
+    @staticmethod
+    def _max_allowed_distance(max_len, threshold):
+        """满足 1 - distance / max_len >= threshold 的最大编辑距离（与相似度的浮点计算保持一致）"""
+        distance = int((1.0 - threshold) * max_len) + 1
+        while distance >= 0 and 1.0 - (distance / max_len) < threshold:
+            distance -= 1
+        return distance
     
     @staticmethod
     def calculate_similarity(query, text):
@@ -31,6 +144,21 @@ class FuzzySearchEngine:
         query_lower = query.lower().strip()
         text_lower = text.lower().strip()
         
+        return FuzzySearchEngine.normalized_similarity(query_lower, text_lower, text_lower.split())
+    
+    @staticmethod
+    def normalized_similarity(query_lower, text_lower, words):
+        """
+        在已经小写化、去空白和分词的文本上计算相似度
+        
+        Args:
+            query_lower: 小写查询词
+            text_lower: 小写文本
+            words: text_lower.split() 的结果
+        
+        Returns:
+            float: 相似度得分，与 calculate_similarity 相同
+        """
         if query_lower == text_lower:
             return 1.0
         
@@ -40,7 +168,6 @@ class FuzzySearchEngine:
         if text_lower.startswith(query_lower):
             return 0.8
         
-        words = text_lower.split()
         for word in words:
             if word.startswith(query_lower):
                 return 0.75
@@ -51,46 +178,60 @@ class FuzzySearchEngine:
         if max_len == 0:
             return 0.0
         
-        distance = FuzzySearchEngine.levenshtein_distance(query_lower, text_lower)
+        threshold = FuzzySearchEngine.similarity_threshold(len(query_lower))
+        max_distance = FuzzySearchEngine._max_allowed_distance(max_len, threshold)
+        if max_distance < 0:
+            return 0.0
+        
+        distance = FuzzySearchEngine.bounded_levenshtein_distance(query_lower, text_lower, max_distance)
+        if distance > max_distance:
+            return 0.0
         similarity = 1.0 - (distance / max_len)
         
-        if len(query_lower) <= 3 and similarity >= 0.5:
-            return similarity * 0.6
-        elif len(query_lower) <= 6 and similarity >= 0.7:
+        if 3 < len(query_lower) <= 6:
             return similarity * 0.65
-        elif similarity >= 0.8:
-            return similarity * 0.6
+        return similarity * 0.6
         
-        return 0.0
+    @staticmethod
+    def similarity_threshold(query_length):
+        """编辑距离相似度的最低要求，查询词越短要求越宽松"""
+        if query_length <= 3:
+            return 0.5
+        elif query_length <= 6:
+            return 0.7
+        return 0.8
     
     @staticmethod
     def search_in_record(query, record):
         if not query or not query.strip():
             return 0.0
         
-        query_terms = query.lower().split()
-        max_score = 0.0
+        return FuzzySearchEngine.search_in_view(query, search_view_cache.get(record))
+    
+    @staticmethod
+    def search_in_view(query, view):
+        """
+        在记录的规范化搜索视图上打分
         
-        search_fields = [
-            (record.get("important_words", {}), 1.0),
-            (record.get("original_text", ""), 0.9),
-            (record.get("translation", ""), 0.8),
-            (record.get("grammar_points", {}), 0.7),
-        ]
+        Args:
+            query: 搜索文本
+            view: RecordSearchView
+        
+        Returns:
+            float: 记录的最高加权得分
+        """
+        query_terms = query.lower().split()
+        if not query_terms:
+            return 0.0
         
-        for field_data, weight in search_fields:
+        max_score = 0.0
+        for weight, entries in view.fields:
             field_score = 0.0
-            
-            if isinstance(field_data, dict):
-                for key, value in field_data.items():
-                    for term in query_terms:
-                        key_score = FuzzySearchEngine.calculate_similarity(term, key)
-                        value_score = FuzzySearchEngine.calculate_similarity(term, str(value))
-                        field_score = max(field_score, key_score, value_score)
-            else:
+            for text_lower, words in entries:
                 for term in query_terms:
-                    term_score = FuzzySearchEngine.calculate_similarity(term, str(field_data))
-                    field_score = max(field_score, term_score)
+                    score = FuzzySearchEngine.normalized_similarity(term, text_lower, words)
+                    if score > field_score:
+                        field_score = score
             
             max_score = max(max_score, field_score * weight)
         
@@ -0,0 +1,22 @@
+import re
+
+
+def is_english_text(text):
+    if not text or not text.strip():
+        return False
+    
+    clean_text = re.sub(r'[^\w]', '', text)
+    if not clean_text:
+        return False
+    
+    chinese_pattern = r'[\u4e00-\u9fff]'
+    if re.search(chinese_pattern, text):
+        return False
+    
+    english_chars = len(re.findall(r'[a-zA-Z]', clean_text))
+    total_chars = len(clean_text)
+    
+    if total_chars > 0 and english_chars / total_chars >= 0.8:
+        return True
+    
+    return False
@@ -0,0 +1,99 @@
+from bisect import bisect_left, insort
+
+
+class NotesDateIndex:
+    """
+    学习笔记的日期与学习次数索引
+    
+    - 日期桶：日期 -> 按记录顺序排列的记录，日期列表保持有序
+    - 学习次数排序：按 learn_count 从高到低排列的记录
+    随记录的保存和删除增量更新，日期筛选、今日统计和“学习最多”查询不再遍历全部记录。
+    """
+    
+    def __init__(self, records=None):
+        self.records_by_id = {}
+        # 日期 -> [(记录顺序, 记录id)]，按记录顺序排列
+        self.date_buckets = {}
+        self.sorted_dates = []
+        # [(-学习次数, 记录顺序, 记录id)]
+        self.learn_count_order = []
+        self._record_keys = {}
+        self._next_order = 0
+        if records is not None:
+            self.build(records)
+    
+    def build(self, records):
+        """根据记录列表重新构建"""
+        self.records_by_id = {}
+        self.date_buckets = {}
+        self.sorted_dates = []
+        self.learn_count_order = []
+        self._record_keys = {}
+        self._next_order = 0
+        
+        for record in records:
+            self.add_record(record)
+    
+    def add_record(self, record, order=None):
+        record_id = record.get("id")
+        if record_id in self._record_keys:
+            self.remove_record(record_id)
+        
+        if order is None:
+            order = self._next_order
+            self._next_order += 1
+        
+        date = record.get("date", "")
+        learn_count = record.get("learn_count", 1)
+        self.records_by_id[record_id] = record
+        self._record_keys[record_id] = (order, date, learn_count)
+        
+        bucket = self.date_buckets.get(date)
+        if bucket is None:
+            bucket = self.date_buckets[date] = []
+            insort(self.sorted_dates, date)
+        insort(bucket, (order, record_id))
+        insort(self.learn_count_order, (-learn_count, order, record_id))
+    
+    def remove_record(self, record_id):
+        keys = self._record_keys.pop(record_id, None)
+        if keys is None:
+            return
+        
+        order, date, learn_count = keys
+        self.records_by_id.pop(record_id, None)
+        
+        bucket = self.date_buckets[date]
+        self._remove_sorted(bucket, (order, record_id))
+        if not bucket:
+            del self.date_buckets[date]
+            self._remove_sorted(self.sorted_dates, date)
+        self._remove_sorted(self.learn_count_order, (-learn_count, order, record_id))
+    
+    def update_record(self, record):
+        """记录被修改后（日期或学习次数变化）更新索引，保持其原有顺序"""
+        keys = self._record_keys.get(record.get("id"))
+        self.remove_record(record.get("id"))
+        self.add_record(record, keys[0] if keys else None)
+    
+    @staticmethod
+    def _remove_sorted(sorted_list, item):
+        index = bisect_left(sorted_list, item)
+        if index < len(sorted_list) and sorted_list[index] == item:
+            del sorted_list[index]
+    
+    def dates(self, reverse=True):
+        """所有出现过的日期（默认从新到旧）"""
+        return self.sorted_dates[::-1] if reverse else list(self.sorted_dates)
+    
+    def records_on(self, date):
+        """某一天的记录，保持原有记录顺序"""
+        return [self.records_by_id[record_id] for _, record_id in self.date_buckets.get(date, ())]
+    
+    def count_on(self, date):
+        return len(self.date_buckets.get(date, ()))
+    
+    def most_studied(self, limit=None):
+        """按学习次数从高到低排列的记录，次数相同时保持记录顺序（笔记窗口的“学习最多”排序）"""
+        order = self.learn_count_order if limit is None else self.learn_count_order[:limit]
+        return [self.records_by_id[record_id] for _, _, record_id in order]
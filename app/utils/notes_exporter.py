@@ -0,0 +1,174 @@
+import csv
+import io
+import json
+from datetime import datetime
+
+
+def format_meaning(meaning):
+    """统一处理meaning的格式转换"""
+    if isinstance(meaning, dict):
+        parts = []
+        if "中文释义" in meaning:
+            parts.append(meaning["中文释义"])
+        if "词性" in meaning:
+            parts.append(f"[{meaning['词性']}]")
+        if "简单例句" in meaning:
+            parts.append(f"例: {meaning['简单例句']}")
+        return " ".join(parts) if parts else str(meaning)
+    return str(meaning)
+
+
+class NotesExporter:
+    """
+    学习笔记流式导出
+    
+    逐条格式化记录并按块写入文件，内存占用与笔记数量无关。
+    支持 TXT、CSV、Anki 可导入的 TSV 以及 JSONL 四种格式。
+    """
+    
+    # 格式 -> (显示名称, 扩展名)
+    FORMATS = {
+        "txt": ("文本文件", ".txt"),
+        "csv": ("CSV 表格", ".csv"),
+        "anki": ("Anki 导入文件", ".tsv"),
+        "jsonl": ("JSON Lines", ".jsonl"),
+    }
+    
+    CSV_COLUMNS = ["id", "timestamp", "date", "learn_count", "original_text", "translation",
+                   "important_words", "grammar_points"]
+    
+    # 每块包含的记录数，每写完一块报告一次进度
+    CHUNK_RECORDS = 500
+    WRITE_BUFFER_SIZE = 1024 * 1024
+    
+    def __init__(self, export_format):
+        if export_format not in self.FORMATS:
+            raise ValueError(f"不支持的导出格式: {export_format}")
+        self.export_format = export_format
+    
+    def export(self, records, export_path, progress_callback=None, is_cancelled=None):
+        """
+        将记录写入文件
+        
+        Args:
+            records: 记录列表（按导出顺序）
+            export_path: 导出文件路径
+            progress_callback: 进度回调 (已写入条数, 总条数)
+            is_cancelled: 返回 True 时中止导出
+        
+        Returns:
+            int: 实际写入的记录数
+        """
+        total = len(records)
+        written = 0
+        # CSV 带 BOM 便于 Excel 识别 UTF-8，换行由 csv 模块控制
+        is_csv = self.export_format == "csv"
+        encoding = "utf-8-sig" if is_csv else "utf-8"
+        newline = "" if is_csv else None
+        
+        with open(export_path, "w", encoding=encoding, newline=newline, buffering=self.WRITE_BUFFER_SIZE) as f:
+            f.write(self.header(total))
+            for chunk, count in self.iter_chunks(records):
+                if is_cancelled and is_cancelled():
+                    break
+                f.write(chunk)
+                written += count
+                if progress_callback:
+                    progress_callback(written, total)
+        
+        return written
+    
+    def iter_chunks(self, records):
+        """按块生成格式化后的文本：(文本块, 记录数)"""
+        format_record = getattr(self, f"format_{self.export_format}")
+        parts = []
+        for index, record in enumerate(records, 1):
+            parts.append(format_record(index, record))
+            if len(parts) >= self.CHUNK_RECORDS:
+                yield "".join(parts), len(parts)
+                parts = []
+        if parts:
+            yield "".join(parts), len(parts)
+    
+    def header(self, total):
+        if self.export_format == "txt":
+            return ("=== 英语学习笔记导出 ===\n"
+                    f"导出时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
+                    f"总记录数: {total}\n\n")
+        if self.export_format == "csv":
+            return self._csv_line(self.CSV_COLUMNS)
+        if self.export_format == "anki":
+            # Anki 2.1.54+ 的文件头指令：制表符分隔、字段为HTML、第3列为标签
+            return "#separator:tab\n#html:true\n#tags column:3\n"
+        return ""
+    
+    def format_txt(self, index, record):
+        lines = [
+            f"--- 记录 {index} ---\n",
+            f"时间: {record.get('timestamp', '')}\n",
+            f"原文: {record.get('original_text', '')}\n",
+            f"翻译: {record.get('translation', '')}\n",
+        ]
+        
+        if record.get("important_words"):
+            lines.append("重要单词:\n")
+            for word, meaning in record.get("important_words", {}).items():
+                lines.append(f"  • {word}: {format_meaning(meaning)}\n")
+        
+        if record.get("grammar_points"):
+            lines.append("语法解释:\n")
+            for sentence, explanation in record.get("grammar_points", {}).items():
+                lines.append(f"  【{sentence}】\n  {explanation}\n")
+        
+        lines.append("\n" + "=" * 50 + "\n\n")
+        return "".join(lines)
+    
+    def format_csv(self, index, record):
+        words = "; ".join(f"{word}: {format_meaning(meaning)}"
+                          for word, meaning in record.get("important_words", {}).items())
+        grammar = "\n".join(f"{sentence}: {explanation}"
+                            for sentence, explanation in record.get("grammar_points", {}).items())
+        return self._csv_line([
+            record.get("id", ""),
+            record.get("timestamp", ""),
+            record.get("date", ""),
+            record.get("learn_count", 1),
+            record.get("original_text", ""),
+            record.get("translation", ""),
+            words,
+            grammar,
+        ])
+    
+    def format_anki(self, index, record):
+        """正面为原文，背面为翻译、重要单词和语法解释"""
+        back_parts = [self._anki_field(record.get("translation", ""))]
+        
+        words = record.get("important_words", {})
+        if words:
+            items = "".join(f"<li><b>{self._anki_field(word)}</b>: {self._anki_field(format_meaning(meaning))}</li>"
+                            for word, meaning in words.items())
+            back_parts.append(f"<ul>{items}</ul>")
+        
+        grammar = record.get("grammar_points", {})
+        if grammar:
+            items = "".join(f"<li>【{self._anki_field(sentence)}】{self._anki_field(explanation)}</li>"
+                            for sentence, explanation in grammar.items())
+            back_parts.append(f"<ul>{items}</ul>")
+        
+        tags = f"learning_notes date_{record.get('date', '')}".strip()
+        return f"{self._anki_field(record.get('original_text', ''))}\t{'<br>'.join(back_parts)}\t{tags}\n"
+    
+    def format_jsonl(self, index, record):
+        return json.dumps(record, ensure_ascii=False) + "\n"
+    
+    @staticmethod
+    def _csv_line(row):
+        buffer = io.StringIO()
+        csv.writer(buffer).writerow(row)
+        return buffer.getvalue()
+    
+    @staticmethod
+    def _anki_field(value):
+        """Anki 字段内不能出现制表符和换行，换行改为 <br>"""
+        text = str(value).replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+        return text.replace("\t", " ").replace("\r\n", "<br>").replace("\n", "<br>")
@@ -0,0 +1,160 @@
+import math
+from array import array
+from bisect import bisect_left
+
+from .fuzzy_search_engine import FuzzySearchEngine
+from .record_search_view import search_view_cache
+
+
+class NotesSearchIndex:
+    """
+    学习笔记搜索索引
+    
+    一次性对所有记录建立索引，搜索时只对候选记录调用 FuzzySearchEngine 打分：
+    - 单词倒排索引：完整单词 -> 记录
+    - 三元组索引：字符三元组 -> 记录（用于子串匹配的候选筛选）
+    - 按长度分桶的短字段文本（如单词、短释义），用 NumPy 批量编辑距离匹配拼写错误
+    """
+    
+    # 超过该长度的字段文本不参与编辑距离匹配（相似度阈值下长文本不可能命中短查询）
+    MAX_FUZZY_KEY_LENGTH = 32
+    
+    def __init__(self, records=None):
+        self.records = []
+        self.token_postings = {}
+        self.trigram_postings = {}
+        self.fuzzy_postings = {}
+        self.fuzzy_keys_by_length = {}
+        self._record_positions = {}
+        if records is not None:
+            self.build(records)
+    
+    def build(self, records):
+        """根据记录列表重新构建索引"""
+        self.records = []
+        self.token_postings = {}
+        self.trigram_postings = {}
+        self.fuzzy_postings = {}
+        self.fuzzy_keys_by_length = {}
+        self._record_positions = {}
+        
+        for record in records:
+            self.add_record(record)
+    
+    def add_record(self, record):
+        """追加一条记录到索引"""
+        doc = len(self.records)
+        self.records.append(record)
+        self._record_positions.setdefault(record.get("id"), []).append(doc)
+        
+        seen_trigrams = set()
+        # 加载或保存记录时检查一次内容是否变化，之后搜索只按 id 取视图
+        for text, words in search_view_cache.refresh(record).iter_entries():
+            for token in words:
+                self.token_postings.setdefault(token, set()).add(doc)
+            
+            for i in range(len(text) - 2):
+                trigram = text[i:i + 3]
+                if trigram not in seen_trigrams:
+                    seen_trigrams.add(trigram)
+                    postings = self.trigram_postings.get(trigram)
+                    if postings is None:
+                        postings = self.trigram_postings[trigram] = array('I')
+                    postings.append(doc)
+            
+            if 0 < len(text) <= self.MAX_FUZZY_KEY_LENGTH:
+                fuzzy_docs = self.fuzzy_postings.get(text)
+                if fuzzy_docs is None:
+                    fuzzy_docs = self.fuzzy_postings[text] = set()
+                    self.fuzzy_keys_by_length.setdefault(len(text), []).append(text)
+                fuzzy_docs.add(doc)
+    
+    def remove_record(self, record_id):
+        """从索引中移除记录（倒排表中的失效位置会在查询时被跳过）"""
+        for doc in self._record_positions.pop(record_id, []):
+            self.records[doc] = None
+        search_view_cache.discard(record_id)
+    
+    def candidate_records(self, query):
+        """
+        返回可能匹配查询的记录（保持原有记录顺序）
+        
+        Args:
+            query: 搜索文本
+        
+        Returns:
+            list: 候选记录列表，交由 FuzzySearchEngine 打分
+        """
+        terms = query.lower().split()
+        if not terms:
+            return []
+        
+        candidate_docs = set()
+        for term in terms:
+            term_docs = self._term_candidates(term)
+            if term_docs is None:
+                return [record for record in self.records if record is not None]
+            candidate_docs |= term_docs
+        
+        return [self.records[doc] for doc in sorted(candidate_docs) if self.records[doc] is not None]
+    
+    def _term_candidates(self, term):
+        """单个查询词的候选记录；返回 None 表示无法用索引缩小范围"""
+        substring_docs = self._substring_candidates(term)
+        fuzzy_docs = self._fuzzy_candidates(term)
+        if fuzzy_docs is None:
+            return None
+        return substring_docs | fuzzy_docs
+    
+    def _substring_candidates(self, term):
+        if len(term) < 3:
+            # 过短的查询词无法使用三元组，退化为扫描单词表
+            docs = set()
+            for token, token_docs in self.token_postings.items():
+                if term in token:
+                    docs |= token_docs
+            return docs
+        
+        trigrams = {term[i:i + 3] for i in range(len(term) - 2)}
+        postings_list = []
+        for trigram in trigrams:
+            postings = self.trigram_postings.get(trigram)
+            if not postings:
+                return set()
+            postings_list.append(postings)
+        
+        postings_list.sort(key=len)
+        candidates = set(postings_list[0])
+        for postings in postings_list[1:]:
+            candidates = {doc for doc in candidates if self._contains(postings, doc)}
+            if not candidates:
+                break
+        
+        return candidates
+    
+    @staticmethod
+    def _contains(sorted_postings, doc):
+        index = bisect_left(sorted_postings, doc)
+        return index < len(sorted_postings) and sorted_postings[index] == doc
+    
+    def _fuzzy_candidates(self, term):
+        threshold = FuzzySearchEngine.similarity_threshold(len(term))
+        max_key_length = int(len(term) / threshold + 1e-9)
+        if max_key_length > self.MAX_FUZZY_KEY_LENGTH:
+            return None
+        
+        # 编辑距离不小于长度差，只有长度在该范围内的文本才可能达到阈值
+        min_key_length = max(1, math.ceil(len(term) * threshold - 1e-9))
+        keys = []
+        for length in range(min_key_length, max_key_length + 1):
+            keys.extend(self.fuzzy_keys_by_length.get(length, ()))
+        if not keys:
+            return set()
+        
+        distances = FuzzySearchEngine.levenshtein_distance_batch(term, keys)
+        docs = set()
+        for key, distance in zip(keys, distances.tolist()):
+            max_len = max(len(term), len(key))
+            if 1.0 - distance / max_len >= threshold:
+                docs |= self.fuzzy_postings[key]
+        return docs
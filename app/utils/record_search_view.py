@@ -0,0 +1,142 @@
+import threading
+from collections import OrderedDict
+
+
+class RecordSearchView:
+    """
+    学习笔记记录的规范化搜索视图
+    
+    预先完成小写化、去空白、分词以及 important_words / grammar_points 的展开，
+    搜索时直接在这些结果上打分，不再为每个查询词重复处理字段文本。
+    """
+    
+    # (字段名, 权重)，顺序与 FuzzySearchEngine.search_in_record 一致
+    SEARCH_FIELDS = (
+        ("important_words", 1.0),
+        ("original_text", 0.9),
+        ("translation", 0.8),
+        ("grammar_points", 0.7),
+    )
+    
+    __slots__ = ("record_id", "content_hash", "fields")
+    
+    def __init__(self, record, content_hash=None):
+        self.record_id = record.get("id")
+        self.content_hash = content_hash if content_hash is not None else self.hash_record(record)
+        # [(权重, ((小写文本, 单词列表), ...)), ...]
+        self.fields = []
+        
+        for field, weight in self.SEARCH_FIELDS:
+            default = {} if field in ("important_words", "grammar_points") else ""
+            field_data = record.get(field, default)
+            
+            if isinstance(field_data, dict):
+                texts = []
+                for key, value in field_data.items():
+                    texts.append(str(key))
+                    texts.append(str(value))
+            else:
+                texts = [str(field_data)]
+            
+            entries = {}
+            for text in texts:
+                text_lower = text.lower().strip()
+                # 空文本对任何查询词的得分都是 0，直接跳过
+                if text_lower and text_lower not in entries:
+                    entries[text_lower] = text_lower.split()
+            
+            self.fields.append((weight, tuple(entries.items())))
+    
+    def iter_entries(self):
+        """依次返回所有字段的 (小写文本, 单词列表)"""
+        for _, entries in self.fields:
+            yield from entries
+    
+    @classmethod
+    def hash_record(cls, record):
+        """只对参与搜索的字段计算内容哈希"""
+        return hash(repr(tuple(record.get(field) for field, _ in cls.SEARCH_FIELDS)))
+
+
+class SearchViewCache:
+    """
+    按记录 id 缓存搜索视图
+    
+    记录加载或保存时调用 refresh()：计算一次内容哈希，内容未变化时复用已有视图，
+    否则重新构建；搜索时 get() 只按 id 查找，不再为每个候选记录计算哈希。
+    修改记录内容后必须调用 refresh() 或 discard()，否则搜索会继续使用旧视图。
+    缓存按最近使用淘汰，最多保留 maxsize 条。
+    搜索线程和界面线程（增删记录）会同时访问，读写都在锁内进行。
+    """
+    
+    DEFAULT_MAXSIZE = 20000
+    
+    def __init__(self, maxsize=DEFAULT_MAXSIZE):
+        self.maxsize = max(int(maxsize), 1)
+        # 记录 id -> 搜索视图
+        self._views = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, record):
+        """
+        获取记录的搜索视图（搜索时调用），只按 id 查找，没有缓存时构建
+        
+        Args:
+            record: 学习笔记记录
+        
+        Returns:
+            RecordSearchView: 搜索视图
+        """
+        record_id = record.get("id")
+        if record_id is None:
+            return RecordSearchView(record)
+        
+        with self._lock:
+            view = self._views.get(record_id)
+            if view is not None:
+                self._views.move_to_end(record_id)
+                return view
+        return self.refresh(record)
+    
+    def refresh(self, record):
+        """
+        记录加载或保存后调用：内容哈希与缓存一致时复用，否则重新构建
+        
+        Returns:
+            RecordSearchView: 搜索视图
+        """
+        record_id = record.get("id")
+        if record_id is None:
+            return RecordSearchView(record)
+        
+        content_hash = RecordSearchView.hash_record(record)
+        with self._lock:
+            view = self._views.get(record_id)
+            if view is not None and view.content_hash == content_hash:
+                self._views.move_to_end(record_id)
+                return view
+        
+        # 在锁外构建视图，不阻塞其他线程
+        view = RecordSearchView(record, content_hash)
+        with self._lock:
+            self._views[record_id] = view
+            self._views.move_to_end(record_id)
+            while len(self._views) > self.maxsize:
+                self._views.popitem(last=False)
+        return view
+    
+    def discard(self, record_id):
+        """记录被删除或修改后移除对应的缓存"""
+        with self._lock:
+            self._views.pop(record_id, None)
+    
+    def clear(self):
+        with self._lock:
+            self._views.clear()
+    
+    def __len__(self):
+        with self._lock:
+            return len(self._views)
+
+
+search_view_cache = SearchViewCache()
@@ -0,0 +1,115 @@
+"""
+学习笔记搜索性能基准
+
+运行方式（项目根目录）:
+    python -m app.utils.search_benchmark [记录数]
+"""
+import random
+import sys
+import time
+
+from .fuzzy_search_engine import FuzzySearchEngine
+from .notes_search_index import NotesSearchIndex
+
+
+ENGLISH_WORDS = (
+    "given you recognize us paimon doesn't believe we need to explain any further traveler "
+    "look that's the knights of favonius headquarters in mondstadt jean said bennett and razor "
+    "would meet near cathedral before sunset venti don't worry wind always finds its way home "
+    "even across liyue harbor adventure legend sword shield dragon archon"
+).split()
+
+CHINESE_MEANINGS = ["认出、识别", "解释、说明", "进一步的、更多的", "相信、认为", "旅行者", "总部",
+                    "大教堂", "日落", "担心", "港口", "冒险", "传说"]
+
+PARTS_OF_SPEECH = ["动词", "名词", "形容词", "形容词/副词"]
+
+QUERIES = ["recognize", "recgonize", "paimon", "explian", "认出", "harbor", "cathedral sunset", "xyz"]
+
+
+def make_record(record_id, rng):
+    """按 learning_notes.json 中真实记录的结构和长度生成一条笔记"""
+    words = rng.sample(ENGLISH_WORDS, 16)
+    important_words = {}
+    for word in words[:3]:
+        important_words[word] = {
+            "中文释义": rng.choice(CHINESE_MEANINGS),
+            "词性": rng.choice(PARTS_OF_SPEECH),
+            "简单例句": f"I {word} your voice.（我听出你的声音了）"
+        }
+    grammar_key = " ".join(words[3:7]).capitalize()
+    
+    return {
+        "id": record_id,
+        "timestamp": "2025-11-17 19:06:55",
+        "original_text": " ".join(words[:13]).capitalize() + ".",
+        "translation": "既然你已经认出我们了，" + rng.choice(CHINESE_MEANINGS) + "觉得没必要再多作解释了。",
+        "important_words": important_words,
+        "grammar_points": {
+            grammar_key: f"这里用'{words[3]}'引导条件状语从句，表示'既然/考虑到'。例如：{grammar_key}, we stay home."
+        },
+        "date": "2025-11-17",
+        "learn_count": 1
+    }
+
+
+def measure(func, rounds):
+    start_time = time.perf_counter()
+    for _ in range(rounds):
+        func()
+    return (time.perf_counter() - start_time) / rounds
+
+
+def benchmark_calculate_similarity(rng):
+    record = make_record(1, rng)
+    texts = [
+        ("单词", "recognize"),
+        ("短释义", "认出、识别"),
+        ("例句", record["important_words"][next(iter(record["important_words"]))]["简单例句"]),
+        ("原文", record["original_text"]),
+        ("语法说明", next(iter(record["grammar_points"].values()))),
+    ]
+    print("calculate_similarity:")
+    for label, text in texts:
+        for query in ("recgonize", "xyz"):
+            elapsed = measure(lambda: FuzzySearchEngine.calculate_similarity(query, text), 2000)
+            print(f"  {label:<6} ({len(text):>3} 字符) 查询 {query!r:<12}: {elapsed * 1e6:8.2f} μs/次")
+
+
+def benchmark_levenshtein_batch(rng):
+    candidates = [rng.choice(ENGLISH_WORDS) + rng.choice(ENGLISH_WORDS) for _ in range(5000)]
+    query = "recgonize"
+    
+    scalar = measure(lambda: [FuzzySearchEngine.levenshtein_distance(query, text) for text in candidates], 3)
+    batch = measure(lambda: FuzzySearchEngine.levenshtein_distance_batch(query, candidates), 3)
+    print(f"编辑距离 ({len(candidates)} 个候选): 逐个 {scalar * 1000:8.2f} ms, NumPy批量 {batch * 1000:8.2f} ms")
+
+
+def benchmark_search(records):
+    print(f"search_in_record ({len(records)} 条记录):")
+    index = NotesSearchIndex()
+    
+    build_time = measure(lambda: index.build(records), 1)
+    print(f"  建立索引: {build_time * 1000:8.2f} ms")
+    
+    for query in QUERIES:
+        full_scan = measure(lambda: [FuzzySearchEngine.search_in_record(query, record) for record in records], 1)
+        
+        def indexed_search():
+            return [FuzzySearchEngine.search_in_record(query, record) for record in index.candidate_records(query)]
+        
+        indexed = measure(indexed_search, 3)
+        print(f"  查询 {query!r:<20}: 全量扫描 {full_scan * 1000:9.2f} ms, 索引候选 {indexed * 1000:8.2f} ms")
+
+
+def main(record_count=2000):
+    rng = random.Random(2025)
+    records = [make_record(i + 1, rng) for i in range(record_count)]
+    
+    benchmark_calculate_similarity(rng)
+    benchmark_levenshtein_batch(rng)
+    benchmark_search(records)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
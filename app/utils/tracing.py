@@ -0,0 +1,222 @@
+import os
+import json
+import math
+import time
+import itertools
+import threading
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+
+class Span:
+    """一次计时：阶段名、所属截图的 trace_id、父阶段和耗时（秒）"""
+    
+    __slots__ = ("name", "trace_id", "parent", "start", "duration")
+    
+    def __init__(self, name: str, trace_id: int, parent: Optional[str] = None):
+        self.name = name
+        self.trace_id = trace_id
+        self.parent = parent
+        self.start = 0.0
+        self.duration = 0.0
+
+
+class Tracer:
+    """
+    轻量级阶段耗时追踪
+    
+    span() 用 time.perf_counter 计时，结束后写入环形缓冲区：
+    - spans 保存最近的计时记录，用于查看单张截图的耗时分解
+    - 每个阶段另有一个固定长度的耗时窗口，用于计算 p50/p95/p99
+    同一线程内嵌套的 span 自动继承外层的 trace_id；跨线程（流水线阶段之间）需显式传入。
+    """
+    
+    # 每个阶段保留最近多少次耗时用于计算分位数
+    STAGE_WINDOW = 512
+    # 同时跟踪的未完成截图数量上限（被丢弃的截图不会调用 finish_trace）
+    MAX_OPEN_TRACES = 256
+    QUANTILES = (0.5, 0.95, 0.99)
+    
+    def __init__(self, capacity: int = 2048):
+        self.spans = deque(maxlen=capacity)
+        self.stage_durations = {}
+        # 阶段 -> [累计次数, 累计耗时]，不受环形缓冲区长度限制
+        self.stage_totals = {}
+        self.enabled = True
+        self._trace_starts = OrderedDict()
+        self._trace_ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+    
+    def new_trace_id(self) -> int:
+        trace_id = next(self._trace_ids)
+        with self._lock:
+            self._trace_starts[trace_id] = time.perf_counter()
+            while len(self._trace_starts) > self.MAX_OPEN_TRACES:
+                self._trace_starts.popitem(last=False)
+        return trace_id
+    
+    def _stack(self) -> List[Span]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+    
+    @contextmanager
+    def span(self, name: str, trace_id: Optional[int] = None):
+        """
+        记录一个阶段的耗时
+        
+        Args:
+            name: 阶段名，如 "ocr"、"rag.faiss_search"
+            trace_id: 所属截图，不传时沿用外层 span 的，没有外层时新建
+        """
+        stack = self._stack()
+        parent = stack[-1] if stack else None
+        if trace_id is None:
+            trace_id = parent.trace_id if parent else self.new_trace_id()
+        
+        span = Span(name, trace_id, parent.name if parent else None)
+        stack.append(span)
+        span.start = time.perf_counter()
+        try:
+            yield span
+        finally:
+            span.duration = time.perf_counter() - span.start
+            stack.pop()
+            if self.enabled:
+                self.record(span.name, span.duration, span)
+    
+    def record(self, name: str, duration: float, span: Optional[Span] = None):
+        """记录一次耗时（秒）"""
+        with self._lock:
+            if span is not None:
+                self.spans.append(span)
+            durations = self.stage_durations.get(name)
+            if durations is None:
+                durations = self.stage_durations[name] = deque(maxlen=self.STAGE_WINDOW)
+            durations.append(duration)
+            totals = self.stage_totals.setdefault(name, [0, 0.0])
+            totals[0] += 1
+            totals[1] += duration
+    
+    def finish_trace(self, trace_id: int) -> Dict[str, float]:
+        """
+        截图处理完成：记录端到端耗时（含排队等待），返回该截图各阶段的耗时（毫秒）
+        """
+        with self._lock:
+            start = self._trace_starts.pop(trace_id, None)
+        
+        breakdown = self.trace_breakdown(trace_id)
+        if start is not None:
+            total = time.perf_counter() - start
+            if self.enabled:
+                self.record("total", total)
+            breakdown["total"] = round(total * 1000, 1)
+        return breakdown
+    
+    def trace_breakdown(self, trace_id: int) -> Dict[str, float]:
+        """某张截图各阶段的耗时（毫秒），同名阶段累加"""
+        breakdown = {}
+        with self._lock:
+            spans = [span for span in self.spans if span.trace_id == trace_id]
+        for span in spans:
+            breakdown[span.name] = round(breakdown.get(span.name, 0) + span.duration * 1000, 1)
+        return breakdown
+    
+    @staticmethod
+    def _quantile(sorted_values: List[float], q: float) -> float:
+        """最近秩法分位数"""
+        index = min(max(math.ceil(q * len(sorted_values)) - 1, 0), len(sorted_values) - 1)
+        return sorted_values[index]
+    
+    def histograms(self) -> Dict[str, Dict]:
+        """
+        每个阶段的耗时分布（秒）
+        
+        Returns:
+            Dict: 阶段 -> {"count", "sum", "p50", "p95", "p99"}，count/sum 为累计值，分位数按最近的窗口计算
+        """
+        with self._lock:
+            snapshot = {name: sorted(durations) for name, durations in self.stage_durations.items()}
+            totals = {name: list(values) for name, values in self.stage_totals.items()}
+        
+        result = {}
+        for name, values in snapshot.items():
+            if not values:
+                continue
+            stats = {"count": totals[name][0], "sum": totals[name][1]}
+            for q in self.QUANTILES:
+                stats[f"p{int(q * 100)}"] = self._quantile(values, q)
+            result[name] = stats
+        return result
+    
+    def format_summary(self) -> str:
+        """各阶段 p50/p95/p99 的文本摘要（毫秒），用于界面浮层"""
+        histograms = self.histograms()
+        if not histograms:
+            return "暂无耗时数据"
+        width = max(len(name) for name in histograms)
+        lines = [f"{'阶段'.ljust(width)}   p50    p95    p99   次数"]
+        for name, stats in sorted(histograms.items(), key=lambda item: -item[1]["p50"]):
+            lines.append(f"{name.ljust(width)} {stats['p50'] * 1000:6.0f} {stats['p95'] * 1000:6.0f} "
+                         f"{stats['p99'] * 1000:6.0f} {stats['count']:6d}")
+        return "\n".join(lines)
+    
+    def export_jsonl(self, path: str):
+        """在 JSONL 文件末尾追加一行当前的耗时分布（毫秒）"""
+        histograms = self.histograms()
+        line = {
+            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "stages": {name: {"count": stats["count"],
+                              **{key: round(value * 1000, 3) for key, value in stats.items() if key != "count"}}
+                       for name, stats in histograms.items()}
+        }
+        self._ensure_dir(path)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(line, ensure_ascii=False) + "\n")
+    
+    def export_prometheus(self, path: str, metric: str = "translator_stage_duration_seconds"):
+        """以 Prometheus 文本格式（summary）写出耗时分布，先写临时文件再替换"""
+        lines = [f"# HELP {metric} Per-stage latency of the capture translation pipeline.",
+                 f"# TYPE {metric} summary"]
+        for name, stats in sorted(self.histograms().items()):
+            for q in self.QUANTILES:
+                lines.append(f'{metric}{{stage="{name}",quantile="{q}"}} {stats[f"p{int(q * 100)}"]:.6f}')
+            lines.append(f'{metric}_sum{{stage="{name}"}} {stats["sum"]:.6f}')
+            lines.append(f'{metric}_count{{stage="{name}"}} {stats["count"]}')
+        
+        self._ensure_dir(path)
+        temp_path = path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(temp_path, path)
+    
+    def export(self, path: str, export_format: str = "jsonl"):
+        """按格式导出（jsonl / prometheus），失败时只打印错误"""
+        try:
+            if export_format == "prometheus":
+                self.export_prometheus(path)
+            else:
+                self.export_jsonl(path)
+            print(f"耗时统计已导出到: {path}")
+        except Exception as e:
+            print(f"导出耗时统计失败: {e}")
+    
+    @staticmethod
+    def _ensure_dir(path: str):
+        directory = os.path.dirname(os.path.abspath(path))
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+    
+    def reset(self):
+        with self._lock:
+            self.spans.clear()
+            self.stage_durations.clear()
+            self.stage_totals.clear()
+            self._trace_starts.clear()
+
+
+# 全局追踪器
+tracer = Tracer()
@@ -0,0 +1,143 @@
+class VocabularyIndex:
+    """
+    学习笔记的单词汇总
+    
+    维护 单词(小写) -> 累计次数、含义、记录id倒排表，随笔记的保存和删除增量更新。
+    次数按所在句子的学习次数(learn_count)累计；单词写法和含义取最早出现的记录。
+    筛选后的单词列表只遍历筛选出的记录，与笔记总量无关。
+    """
+    
+    def __init__(self, records=None):
+        self.entries = {}
+        self.records_by_id = {}
+        # 记录id -> [(单词小写, 单词, 含义)]
+        self._record_words = {}
+        # 记录id -> 加入顺序，用于确定单词最早出现的记录
+        self._record_order = {}
+        self._next_order = 0
+        self._sorted_cache = None
+        if records is not None:
+            self.build(records)
+    
+    def build(self, records):
+        """根据记录列表重新构建"""
+        self.entries = {}
+        self.records_by_id = {}
+        self._record_words = {}
+        self._record_order = {}
+        self._next_order = 0
+        self._sorted_cache = None
+        
+        for record in records:
+            self.add_record(record)
+    
+    def add_record(self, record, order=None):
+        record_id = record.get("id")
+        if record_id in self.records_by_id:
+            self.remove_record(record_id)
+        
+        if order is None:
+            order = self._next_order
+            self._next_order += 1
+        self.records_by_id[record_id] = record
+        self._record_order[record_id] = order
+        learn_count = record.get("learn_count", 1)
+        
+        record_words = []
+        for position, (word, meaning) in enumerate(record.get("important_words", {}).items()):
+            word_lower = word.lower()
+            record_words.append((word_lower, word, meaning))
+            
+            # (记录顺序, 在记录中的位置)，与按记录顺序逐个统计时的先后一致
+            first_seen = (order, position)
+            entry = self.entries.get(word_lower)
+            if entry is None:
+                entry = self.entries[word_lower] = {"word": word, "meaning": meaning, "count": 0,
+                                                    "postings": {}, "first_seen": first_seen}
+            elif first_seen < entry["first_seen"]:
+                entry["word"], entry["meaning"], entry["first_seen"] = word, meaning, first_seen
+            entry["count"] += learn_count
+            entry["postings"][record_id] = entry["postings"].get(record_id, 0) + learn_count
+        
+        self._record_words[record_id] = record_words
+        self._sorted_cache = None
+    
+    def remove_record(self, record_id):
+        record_words = self._record_words.pop(record_id, None)
+        if record_words is None:
+            return
+        
+        self.records_by_id.pop(record_id, None)
+        order = self._record_order.pop(record_id)
+        
+        for word_lower, _, _ in record_words:
+            entry = self.entries.get(word_lower)
+            if entry is None or record_id not in entry["postings"]:
+                continue
+            entry["count"] -= entry["postings"].pop(record_id)
+            
+            if not entry["postings"]:
+                del self.entries[word_lower]
+            elif entry["first_seen"][0] == order:
+                # 写法和含义改用剩余记录中最早的一条
+                first_id = min(entry["postings"], key=self._record_order.get)
+                for position, (other_lower, word, meaning) in enumerate(self._record_words[first_id]):
+                    if other_lower == word_lower:
+                        entry["word"], entry["meaning"] = word, meaning
+                        entry["first_seen"] = (self._record_order[first_id], position)
+                        break
+        
+        self._sorted_cache = None
+    
+    def update_record(self, record):
+        """记录被修改后（例如重复句子累计学习次数）重新统计，保持其原有顺序"""
+        order = self._record_order.get(record.get("id"))
+        self.remove_record(record.get("id"))
+        self.add_record(record, order)
+    
+    def word_count(self):
+        return len(self.entries)
+    
+    def word_stats(self, records=None):
+        """
+        获取按累计次数降序排列的单词统计
+        
+        Args:
+            records: 筛选后的记录（按显示顺序）；None 表示全部记录
+        
+        Returns:
+            list: [{"word", "meaning", "count", "record_ids"}, ...]
+        """
+        if records is None:
+            if self._sorted_cache is None:
+                self._sorted_cache = self._all_word_stats()
+            return self._sorted_cache
+        
+        word_stats = {}
+        for record in records:
+            record_id = record.get("id")
+            record_words = self._record_words.get(record_id)
+            if record_words is None:
+                continue
+            
+            learn_count = record.get("learn_count", 1)
+            for word_lower, word, meaning in record_words:
+                stats = word_stats.get(word_lower)
+                if stats is None:
+                    stats = word_stats[word_lower] = {"word": word, "meaning": meaning, "count": 0, "record_ids": []}
+                stats["count"] += learn_count
+                stats["record_ids"].append(record_id)
+        
+        return sorted(word_stats.values(), key=lambda x: x["count"], reverse=True)
+    
+    def _all_word_stats(self):
+        entries = sorted(self.entries.values(),
+                         key=lambda entry: (-entry["count"], entry["first_seen"]))
+        return [{"word": entry["word"], "meaning": entry["meaning"], "count": entry["count"],
+                 "record_ids": sorted(entry["postings"], key=self._record_order.get)}
+                for entry in entries]
+    
+    def records_for(self, word_stats):
+        """单词统计对应的句子记录"""
+        return [self.records_by_id[record_id] for record_id in word_stats["record_ids"]
+                if record_id in self.records_by_id]
@@ -0,0 +1,266 @@
+"""
+离线批量翻译：把整批对话文本预先翻译并写入学习笔记和RAG索引
+
+用法：
+    python batch_translate.py lines.jsonl [--field text] [--concurrency 4] [--flush-every 200]
+    python batch_translate.py lines.csv --field text
+
+输入可以是 JSONL（默认读取 text / original_text 字段，ocr/batch_ocr.py 的输出可以直接使用）或 CSV。
+进度记录在检查点文件（默认 <输入文件>.checkpoint.jsonl）中，中断后重新运行同一命令即可从中断处继续。
+"""
+import os
+import sys
+import csv
+import json
+import uuid
+import argparse
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, current_dir)
+
+from app.managers import ConfigManager, NotesManager, rag_manager, special_terms_manager
+from app.utils.language_detect import is_english_text
+from llm.call_api import chat, get_client
+from llm.response_parser import parse_translation
+
+
+def normalize_line(text):
+    return " ".join(str(text).split())
+
+
+def read_lines(path, field=None):
+    """读取 JSONL 或 CSV 中的文本，按出现顺序去重（忽略多余空白）"""
+    texts = []
+    if path.lower().endswith(".csv"):
+        with open(path, "r", encoding="utf-8-sig", newline="") as f:
+            rows = list(csv.reader(f))
+        column = 0
+        if rows and field and field in rows[0]:
+            column = rows[0].index(field)
+            rows = rows[1:]
+        texts = [row[column] for row in rows if len(row) > column]
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            for line_number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    item = json.loads(line)
+                except json.JSONDecodeError:
+                    print(f"第 {line_number} 行不是有效的JSON，已跳过")
+                    continue
+                if isinstance(item, str):
+                    texts.append(item)
+                elif field:
+                    texts.append(item.get(field, ""))
+                else:
+                    texts.append(item.get("text") or item.get("original_text", ""))
+    
+    unique = {}
+    for text in texts:
+        text = normalize_line(text)
+        if text and text not in unique:
+            unique[text] = True
+    return list(unique)
+
+
+class BulkTranslationJob:
+    """
+    批量翻译任务
+    
+    每句先做专有名词匹配和RAG检索，未命中的才调用LLM（并发数有限制）。
+    每完成一句就在检查点文件末尾追加一行；LLM 翻译结果每积累 flush_every 条
+    批量写入笔记和RAG索引。
+    
+    写入进度分两处记录：笔记中已合并的数量与记录在同一次写入中保存到笔记文件
+    （按检查点第一行的任务标识区分），中断后不会重复合并、重复增加学习次数；
+    RAG索引写入成功后再追加一行 {"committed": n}，失败的部分下次写入时重试。
+    重新运行时跳过检查点中已完成的句子，先补写上次未写入的结果；失败的句子会重试。
+    """
+    
+    def __init__(self, checkpoint_path, user_level="中级", concurrency=4, flush_every=200):
+        self.checkpoint_path = checkpoint_path
+        self.user_level = user_level
+        self.concurrency = max(int(concurrency), 1)
+        self.flush_every = max(int(flush_every), 1)
+        
+        self.done = set()
+        self.job_id = None
+        # 检查点中全部LLM翻译结果（按完成顺序），前 notes_committed 条已合并进笔记，
+        # 前 rag_committed 条已写入RAG索引
+        self.llm_records = []
+        self.notes_committed = 0
+        self.rag_committed = 0
+        self.stats = {"rag": 0, "llm": 0, "skipped": 0, "failed": 0}
+        self._load_checkpoint()
+    
+    def _load_checkpoint(self):
+        if os.path.exists(self.checkpoint_path):
+            with open(self.checkpoint_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # 中断时可能写了半行
+                        continue
+                    if "job" in entry:
+                        self.job_id = entry["job"]
+                        continue
+                    if "committed" in entry:
+                        self.rag_committed = entry["committed"]
+                        continue
+                    if entry["status"] == "failed":
+                        continue
+                    self.done.add(entry["text"])
+                    if entry["status"] == "llm":
+                        self.llm_records.append(entry["record"])
+        
+        if self.job_id is None:
+            self.job_id = uuid.uuid4().hex
+            self._append_checkpoint({"job": self.job_id})
+        
+        notes_progress = NotesManager.load_batch_progress(self.job_id)
+        self.notes_committed = min(max(notes_progress, self.rag_committed), len(self.llm_records))
+        if self.done:
+            print(f"从检查点继续：已完成 {len(self.done)} 句，"
+                  f"待写入笔记 {len(self.llm_records) - self.notes_committed} 条，"
+                  f"待写入RAG索引 {len(self.llm_records) - self.rag_committed} 条")
+    
+    def _append_checkpoint(self, entry):
+        with open(self.checkpoint_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    
+    def _finish(self, text, status, record=None, error=None):
+        """记录一句的结果（主线程调用）"""
+        entry = {"text": text, "status": status}
+        if record is not None:
+            entry["record"] = record
+        if error is not None:
+            entry["error"] = error
+        self._append_checkpoint(entry)
+        self.stats[status] += 1
+        
+        if status == "failed":
+            return
+        self.done.add(text)
+        if status == "llm":
+            self.llm_records.append(record)
+            if len(self.llm_records) - self.notes_committed >= self.flush_every:
+                self.flush()
+    
+    def flush(self):
+        """把积累的翻译结果批量写入笔记和RAG索引，失败的部分留到下次写入时重试"""
+        total = len(self.llm_records)
+        if self.notes_committed < total:
+            saved = NotesManager.save_translation_records(self.llm_records[self.notes_committed:],
+                                                          progress=(self.job_id, total))
+            if saved is False:
+                print("写入笔记失败，稍后重试")
+                return
+            self.notes_committed = total
+        
+        if self.rag_committed < self.notes_committed:
+            if not rag_manager.add_records_to_index(self.llm_records[self.rag_committed:self.notes_committed]):
+                print("写入RAG索引失败，稍后重试")
+                return
+            self.rag_committed = self.notes_committed
+            self._append_checkpoint({"committed": self.rag_committed})
+    
+    def _lookup(self, text):
+        """
+        本地处理：语言检测、专有名词匹配和RAG检索
+        
+        Returns:
+            tuple: (状态, 专有名词)，状态为 "skipped" / "rag" / None（需要调用LLM）
+        """
+        if not is_english_text(text):
+            return "skipped", None
+        matched_terms = special_terms_manager.find_matched_terms(text)
+        if rag_manager.search_similar_translation(text):
+            return "rag", matched_terms
+        return None, matched_terms
+    
+    def _translate(self, text, matched_terms):
+        """LLM 翻译（工作线程中运行）"""
+        result = parse_translation(chat(text, matched_terms, self.user_level, hedge=False))
+        return {
+            "original_text": text,
+            "translation": result.get("translation", ""),
+            "important_words": result.get("important_words", {}),
+            "grammar_points": result.get("important_grammar", {})
+        }
+    
+    def run(self, texts):
+        todo = [text for text in texts if text not in self.done]
+        print(f"共 {len(texts)} 句（已去重），本次需要处理 {len(todo)} 句")
+        
+        in_flight = {}
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            try:
+                for index, text in enumerate(todo, 1):
+                    status, matched_terms = self._lookup(text)
+                    if status:
+                        self._finish(text, status)
+                    else:
+                        # 限制排队中的请求数量，避免一次性提交全部句子
+                        while len(in_flight) >= self.concurrency * 2:
+                            self._collect(in_flight, wait(in_flight, return_when=FIRST_COMPLETED).done)
+                        in_flight[executor.submit(self._translate, text, matched_terms)] = text
+                    
+                    if index % 50 == 0:
+                        print(f"进度: {index}/{len(todo)} {self.stats}")
+                
+                self._collect(in_flight, wait(in_flight).done)
+            finally:
+                # 中断时也把已经完成的翻译写入笔记
+                for future in in_flight:
+                    future.cancel()
+                self.flush()
+        
+        print(f"批量翻译完成: {self.stats}")
+        if self.stats["llm"] or self.stats["failed"]:
+            usage = get_client().usage_summary()
+            print(f"Token用量合计: {usage['calls']} 次调用，提示 {usage['prompt_tokens']} + 生成 {usage['completion_tokens']}")
+            if "cache_hit_rate" in usage:
+                print(f"提示词缓存命中率: {usage['cache_hit_rate']:.1%}")
+        return self.stats
+    
+    def _collect(self, in_flight, finished):
+        for future in finished:
+            text = in_flight.pop(future)
+            try:
+                self._finish(text, "llm", record=future.result())
+            except Exception as e:
+                print(f"翻译失败: {text[:50]}... {e}")
+                self._finish(text, "failed", error=str(e))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="离线批量翻译并写入学习笔记和RAG索引")
+    parser.add_argument("input", help="JSONL 或 CSV 文件")
+    parser.add_argument("--field", default=None, help="文本所在的字段/列名（默认 text）")
+    parser.add_argument("--checkpoint", default=None, help="检查点文件（默认 <输入文件>.checkpoint.jsonl）")
+    parser.add_argument("--concurrency", type=int, default=4, help="同时进行的LLM请求数")
+    parser.add_argument("--flush-every", type=int, default=200, help="每多少条翻译结果写入一次笔记和RAG索引")
+    parser.add_argument("--level", default=None, help="用户英语水平（默认使用配置中的设置）")
+    args = parser.parse_args(argv)
+    
+    texts = read_lines(args.input, args.field or ("text" if args.input.lower().endswith(".csv") else None))
+    
+    print("[RAG] 正在加载RAG检索模型...")
+    rag_manager.initialize_rag()
+    special_terms_manager.load_special_terms()
+    
+    job = BulkTranslationJob(
+        args.checkpoint or args.input + ".checkpoint.jsonl",
+        user_level=args.level or ConfigManager.load_user_level(),
+        concurrency=args.concurrency,
+        flush_every=args.flush_every
+    )
+    job.run(texts)
+
+
+if __name__ == "__main__":
+    main()
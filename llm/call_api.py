@@ -1,15 +1,41 @@
 import os
 import re
-import time
+import threading
+from urllib.parse import urlparse
 from openai import OpenAI
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 from llm.prompt_manager import PromptManager
+from llm.response_parser import TRANSLATION_SCHEMA
+from llm.token_counter import count_tokens
+from llm.router import Backend, LLMRouter
+from app.utils.tracing import tracer
 
 
 class LLMClient:
+    """
+    LLM 客户端（OpenAI 兼容接口）
+    
+    config.json 中的主接口和 llm.backends 中的额外接口由 LLMRouter 统一调度，
+    每次请求发往当前最快的健康接口，失败时自动换下一个。
+    需要 JSON 的请求通过 create_json_completion 发送：优先使用接口的结构化输出
+    （response_format 的 json_schema，其次 json_object），接口不支持时自动降级为只靠提示词约束，
+    并记住每个接口可用的模式，之后的请求不再重复尝试。
+    """
+    
+    # 结构化输出模式，按优先级排列
+    STRUCTURED_MODES = ["json_schema", "json_object", "off"]
+    # 接口不支持 response_format 时常见的状态码
+    UNSUPPORTED_STATUS_CODES = (400, 404, 415, 422)
+    # 错误信息中出现这些词才认为是不支持结构化输出；上下文过长、模型不存在、内容审核等错误直接抛出
+    RESPONSE_FORMAT_KEYWORDS = ("response_format", "json_schema", "json_object")
+    
+    DEFAULT_BASE_URL = "https://spark-api-open.xf-yun.com/v1"
+    DEFAULT_MODEL = "4.0Ultra"
+    
     _instance = None
-    _client = None
-    _model = None
+    _router = None
+    _prompt_token_budget = 0
+    _hedge = True
     
     @classmethod
     def get_instance(cls):
@@ -18,42 +44,248 @@ class LLMClient:
         return cls._instance
     
     def __init__(self):
+        # 累计 token 用量（批量翻译时多线程调用）；cached_tokens 只统计返回了缓存信息的调用，
+        # cache_reported_prompt_tokens 是这些调用的提示 token 总数，用于计算命中率
+        self._usage = {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0,
+                       "cached_tokens": 0, "cache_reported_prompt_tokens": 0}
+        self._usage_lock = threading.Lock()
         self._load_config()
+        # 配置页保存或 config.json 被修改后重新创建客户端
+        from app.managers.config_manager import ConfigManager
+        ConfigManager.subscribe("llm", self._on_config_changed)
+    
+    def _on_config_changed(self):
+        try:
+            self._load_config()
+            print(f"LLM配置已更新: {', '.join(backend.name for backend in self._router.backends)}")
+        except Exception as e:
+            print(f"重新加载LLM配置失败: {e}")
     
     def _load_config(self):
         try:
             from app.managers.config_manager import ConfigManager
             config = ConfigManager.load_llm_config()
-            base_url = config.get("base_url", "https://spark-api-open.xf-yun.com/v1")
-            api_key = config.get("api_key", "")
-            self._model = config.get("model", "4.0Ultra")
+            self._prompt_token_budget = max(int(config.get("prompt_token_budget", 0) or 0), 0)
+            self._hedge = bool(config.get("hedge", True))
+            
+            backends = []
+            if config.get("api_key"):
+                backends.append(self._create_backend(config, config))
+            else:
+                print("主接口的 API key 未配置")
+            for backend_config in config.get("backends") or []:
+                try:
+                    backends.append(self._create_backend(backend_config, config))
+                except Exception as e:
+                    print(f"LLM接口配置无效 {backend_config}: {e}")
             
-            if not api_key:
+            if not backends:
                 raise ValueError("API key 未配置，请先配置 LLM")
             
-            self._client = OpenAI(api_key=api_key, base_url=base_url)
+            old_router = self._router
+            self._router = LLMRouter(backends, on_latency=self._on_backend_latency)
+            if old_router is not None:
+                old_router.shutdown()
         except ImportError:
             raise ImportError("无法导入 ConfigManager，请检查项目结构")
     
+    def _create_backend(self, backend_config: Dict, defaults: Dict) -> Backend:
+        """
+        Args:
+            backend_config: 接口配置 {name, base_url, api_key, model, structured_output}
+            defaults: llm 配置，接口中没有设置的 structured_output 使用其中的值
+        """
+        base_url = backend_config.get("base_url") or self.DEFAULT_BASE_URL
+        model = backend_config.get("model") or self.DEFAULT_MODEL
+        # 本地服务一般不校验 API key，但 OpenAI 客户端要求非空
+        api_key = backend_config.get("api_key") or "EMPTY"
+        # auto 从 json_schema 开始尝试，配置变化后重新检测
+        structured_output = backend_config.get("structured_output", defaults.get("structured_output", "auto"))
+        structured_mode = structured_output if structured_output in self.STRUCTURED_MODES else "json_schema"
+        name = backend_config.get("name") or f"{model}@{urlparse(base_url).netloc or base_url}"
+        return Backend(name, OpenAI(api_key=api_key, base_url=base_url), model, structured_mode)
+    
+    @staticmethod
+    def _on_backend_latency(backend: Backend, latency: float):
+        tracer.record(f"llm.backend.{backend.name}", latency)
+    
     def update_config(self, base_url: str, api_key: str, model: str):
         from app.managers.config_manager import ConfigManager
+        # 保存成功后由 _on_config_changed 重新加载
         ConfigManager.save_llm_config(base_url, api_key, model)
-        self._load_config()
+    
+    @property
+    def router(self):
+        return self._router
     
     @property
     def client(self):
-        return self._client
+        """当前最快的健康接口的客户端"""
+        return self._router.primary.client
     
     @property
     def model(self):
-        return self._model
-
+        return self._router.primary.model
+    
+    @property
+    def structured_mode(self):
+        return self._router.primary.structured_mode
+    
+    @property
+    def prompt_token_budget(self):
+        return self._prompt_token_budget
+    
+    def record_usage(self, response, messages: List[Dict], name: str) -> Dict:
+        """
+        记录一次调用的 token 用量并打印
+        
+        优先使用接口返回的 usage，没有时用本地分词器估算。
+        
+        Returns:
+            Dict: {"prompt_tokens", "completion_tokens", "estimated"}
+        """
+        usage = getattr(response, "usage", None)
+        prompt_tokens = getattr(usage, "prompt_tokens", None)
+        completion_tokens = getattr(usage, "completion_tokens", None)
+        estimated = prompt_tokens is None or completion_tokens is None
+        cached_tokens = self._cached_tokens(usage)
+        if prompt_tokens is None:
+            prompt_tokens = sum(count_tokens(message.get("content") or "") for message in messages)
+        if completion_tokens is None:
+            try:
+                completion_tokens = count_tokens(response.choices[0].message.content or "")
+            except (AttributeError, IndexError):
+                completion_tokens = 0
+        
+        with self._usage_lock:
+            self._usage["calls"] += 1
+            self._usage["prompt_tokens"] += prompt_tokens
+            self._usage["completion_tokens"] += completion_tokens
+            if cached_tokens is not None:
+                self._usage["cached_tokens"] += cached_tokens
+                self._usage["cache_reported_prompt_tokens"] += prompt_tokens
+        
+        message = f"Token用量[{name}]: 提示 {prompt_tokens} + 生成 {completion_tokens}"
+        if cached_tokens is not None:
+            message += f"，缓存命中 {cached_tokens}"
+        print(message + ("（本地估算）" if estimated else ""))
+        return {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                "cached_tokens": cached_tokens, "estimated": estimated}
+    
+    @staticmethod
+    def _cached_tokens(usage) -> Optional[int]:
+        """
+        提示词中命中缓存的 token 数，接口没有返回时为 None
+        
+        OpenAI 格式为 usage.prompt_tokens_details.cached_tokens，DeepSeek 为 usage.prompt_cache_hit_tokens。
+        """
+        if usage is None:
+            return None
+        details = getattr(usage, "prompt_tokens_details", None)
+        if isinstance(details, dict):
+            cached = details.get("cached_tokens")
+        else:
+            cached = getattr(details, "cached_tokens", None)
+        if cached is None:
+            cached = getattr(usage, "prompt_cache_hit_tokens", None)
+        return cached if isinstance(cached, int) else None
+    
+    def usage_summary(self) -> Dict:
+        """本次运行累计的 token 用量，接口返回过缓存信息时包含 cache_hit_rate"""
+        with self._usage_lock:
+            summary = dict(self._usage)
+        if summary["cache_reported_prompt_tokens"]:
+            summary["cache_hit_rate"] = round(summary["cached_tokens"] / summary["cache_reported_prompt_tokens"], 3)
+        return summary
+    
+    @staticmethod
+    def _response_format(mode: str, schema: Dict, name: str) -> Optional[Dict]:
+        if mode == "json_schema":
+            # 单词和语法字段的键不固定，不能使用 strict 模式
+            return {"type": "json_schema", "json_schema": {"name": name, "schema": schema, "strict": False}}
+        if mode == "json_object":
+            return {"type": "json_object"}
+        return None
+    
+    def _is_unsupported_error(self, error: Exception) -> bool:
+        """接口是否因为不支持 response_format 而拒绝请求（检查状态码和错误的 param / body / 信息）"""
+        if getattr(error, "status_code", None) not in self.UNSUPPORTED_STATUS_CODES:
+            return False
+        details = " ".join(str(value) for value in (
+            getattr(error, "param", None), getattr(error, "body", None), error) if value).lower()
+        return any(keyword in details for keyword in self.RESPONSE_FORMAT_KEYWORDS)
+    
+    def backend_status(self) -> List[Dict]:
+        """各接口的延迟、错误率和健康状态，按当前的优先顺序排列"""
+        return self._router.status()
+    
+    def create_completion(self, messages: List[Dict], name: str, hedge: bool = False):
+        """发送普通的（不要求 JSON）请求"""
+        def request(backend):
+            response = backend.client.chat.completions.create(
+                model=backend.model,
+                messages=messages,
+                stream=False
+            )
+            self.record_usage(response, messages, f"{name}@{backend.name}")
+            return response
+        
+        return self._router.call(request, hedge=hedge and self._hedge)
+    
+    def create_json_completion(self, messages: List[Dict], schema: Dict, name: str,
+                               fallback_instruction: str = None, hedge: bool = False):
+        """
+        发送需要返回 JSON 的请求
+        
+        Args:
+            messages: 对话消息
+            schema: 返回内容的 JSON Schema（见 llm.response_parser）
+            name: schema 名称
+            fallback_instruction: 降级为纯提示词模式时追加到最后一条消息末尾的说明
+            hedge: 延迟敏感的请求，超过 p95 后同时请求下一个接口（配置中 hedge 为 false 时不生效）
+        """
+        return self._router.call(
+            lambda backend: self._json_completion(backend, messages, schema, name, fallback_instruction),
+            hedge=hedge and self._hedge)
+    
+    def _json_completion(self, backend: Backend, messages: List[Dict], schema: Dict, name: str,
+                         fallback_instruction: str = None):
+        modes = self.STRUCTURED_MODES[self.STRUCTURED_MODES.index(backend.structured_mode):]
+        for mode in modes:
+            request_messages = messages
+            if mode == "off" and fallback_instruction:
+                request_messages = messages[:-1] + [
+                    {**messages[-1], "content": messages[-1]["content"].rstrip() + "\n" + fallback_instruction}]
+            
+            kwargs = {}
+            response_format = self._response_format(mode, schema, name)
+            if response_format:
+                kwargs["response_format"] = response_format
+            
+            try:
+                response = backend.client.chat.completions.create(
+                    model=backend.model,
+                    messages=request_messages,
+                    stream=False,
+                    **kwargs
+                )
+            except Exception as e:
+                if mode != "off" and self._is_unsupported_error(e):
+                    print(f"接口 {backend.name} 不支持 {mode} 结构化输出，改用下一种模式: {e}")
+                    continue
+                raise
+            
+            if mode != backend.structured_mode:
+                print(f"接口 {backend.name} 结构化输出模式: {mode}")
+                backend.structured_mode = mode
+            self.record_usage(response, request_messages, f"{name}@{backend.name}")
+            return response
 
 def get_client():
     return LLMClient.get_instance()
 
 
-def chat(question: str, special_terms: Dict[str, str] = None, user_level: str = "中级") -> str:
+def chat(question: str, special_terms: Dict[str, str] = None, user_level: str = "中级", hedge: bool = True) -> str:
     """
     简化的聊天函数，支持专有名词对照表和用户水平定制
     
@@ -61,33 +293,41 @@ def chat(question: str, special_terms: Dict[str, str] = None, user_level: str =
         question: 用户输入的英文文本
         special_terms: 专有名词对照表，格式为 {英文: 中文}
         user_level: 用户英语水平，可选 "初级"、"中级"、"高级"
+        hedge: 配置了多个接口时，主接口超过 p95 延迟后同时请求下一个接口（批量翻译时关闭）
         
     Returns:
         str: AI的回复内容（JSON格式的翻译结果）
     """
-    start_time = time.time()
-    
-    full_prompt = PromptManager.format_translation_prompt(
-        text=question,
-        special_terms=special_terms,
-        user_level=user_level
-    )
+    llm = get_client()
+    with tracer.span("llm.prompt"):
+        # 固定的系统提示词在前、原文在后，便于接口复用缓存的提示词前缀
+        messages = PromptManager.build_translation_messages(
+            text=question,
+            special_terms=special_terms,
+            user_level=user_level,
+            token_budget=llm.prompt_token_budget
+        )
     
-    messages = [
-        {"role": "user", "content": full_prompt}
-    ]
+    with tracer.span("llm.request") as span:
+        response = llm.create_json_completion(messages, TRANSLATION_SCHEMA, "translation",
+                                              fallback_instruction=PromptManager.JSON_ONLY_INSTRUCTION,
+                                              hedge=hedge)
     
-    llm = get_client()
-    response = llm.client.chat.completions.create(
-        model=llm.model,
-        messages=messages,
-        stream=False
-    )
+    print(f"API调用时间: {span.duration:.6f} 秒")
     
-    end_time = time.time()
-    execution_time = end_time - start_time
-    print(f"API调用时间: {execution_time:.6f} 秒")
+    return response.choices[0].message.content
+
+
+def chat_json(prompt: str, schema: Dict, name: str) -> str:
+    """
+    直接发送提示词并要求按 schema 返回 JSON（不套用翻译模板），用于生成选择题选项等
     
+    Returns:
+        str: AI的回复内容（JSON）
+    """
+    llm = get_client()
+    with tracer.span("llm.request"):
+        response = llm.create_json_completion([{"role": "user", "content": prompt}], schema, name)
     return response.choices[0].message.content
 
 
@@ -113,12 +353,7 @@ def correct_ocr_text(text: str) -> str:
     prompt = PromptManager.format_ocr_correction_prompt(text)
     
     try:
-        llm = get_client()
-        response = llm.client.chat.completions.create(
-            model=llm.model,
-            messages=[{"role": "user", "content": prompt}],
-            stream=False
-        )
+        response = get_client().create_completion([{"role": "user", "content": prompt}], "ocr_correction")
         
         corrected_text = response.choices[0].message.content.strip()
         
@@ -140,7 +375,7 @@ def correct_ocr_text(text: str) -> str:
 
 
 if __name__ == "__main__":
-    import json
+    from llm.response_parser import ResponseParseError, parse_translation
     
     sample_text = 'Bennett always brings good luck to his adventuring team in Mondstadt.'
     special_terms_example = {
@@ -159,14 +394,7 @@ if __name__ == "__main__":
     print("\n" + "="*50 + "\n")
     
     try:
-        json_str = translation_result.strip()
-        if json_str.startswith("```json"):
-            json_str = json_str[7:]
-        if json_str.endswith("```"):
-            json_str = json_str[:-3]
-        json_str = json_str.strip()
-        
-        result_dict = json.loads(json_str)
+        result_dict = parse_translation(translation_result)
         
         print("解析后的JSON结果:")
         print("=" * 50)
@@ -179,11 +407,7 @@ if __name__ == "__main__":
             else:
                 print(f"  {value}")
                 
-    except json.JSONDecodeError as e:
+    except ResponseParseError as e:
         print(f"JSON解析失败: {e}")
         print("原始返回内容:")
         print(translation_result)
-    except Exception as e:
-        print(f"处理过程中出现错误: {e}")
-        print("原始返回内容:")
-        print(translation_result)
@@ -1,3 +1,13 @@
+import re
+from llm.token_counter import count_tokens
+
+
+def compact_prompt(template: str) -> str:
+    """去掉每行首尾的空白并合并连续空行（模板中的缩进只是源码排版，不需要发送给模型）"""
+    lines = [line.strip() for line in template.strip().splitlines()]
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines))
+
+
 class PromptManager:
     
     TRANSLATION_PROMPTS = {
@@ -24,7 +34,6 @@ class PromptManager:
                             "基础语法点原句": "简单易懂的语法解释和例句"
                         }}
                     }}
-                    必须只返回json的格式,不要有其他回复
                     """,
         
         "中级": """你是一个专业的原神游戏英文翻译助手。请将以下英文文本翻译成中文，并提供适合**中级水平**学习者的详细分析。
@@ -50,7 +59,6 @@ class PromptManager:
                         "中级语法点原句": "详细的语法解释和例句"
                     }}
                 }}
-                必须只返回json的格式,不要有其他回复
                 """,
         
         "高级": """你是一个专业的原神游戏英文翻译助手。请将以下英文文本翻译成中文，并提供适合高级水平学习者的详细分析。
@@ -76,7 +84,6 @@ class PromptManager:
                         "高级语法点原句": "深入的语法分析和高级例句"
                     }}
                 }}
-                必须只返回json的格式,不要有其他回复
                 """
     }
     
@@ -95,6 +102,12 @@ class PromptManager:
                             修正后的文本：
                             """
     
+    # 翻译模板中的可变部分，拆分为系统/用户消息时移到用户消息中
+    VARIABLE_SECTION = "英文原文：{text}\n\n{special_terms_section}\n\n"
+    
+    # 接口不支持结构化输出（JSON 模式）时追加到提示词末尾
+    JSON_ONLY_INSTRUCTION = "必须只返回json的格式,不要有其他回复"
+    
     DEFAULT_LEVEL = "中级"
     VALID_LEVELS = ["初级", "中级", "高级"]
     
@@ -114,26 +127,119 @@ class PromptManager:
         return cls.TRANSLATION_PROMPTS[user_level]
     
     @classmethod
-    def format_translation_prompt(cls, text: str, special_terms: dict = None, user_level: str = None) -> str:
+    def format_translation_prompt(cls, text: str, special_terms: dict = None, user_level: str = None,
+                                  token_budget: int = None) -> str:
         """
-        格式化翻译提示词
+        格式化翻译提示词（单条消息）
         
         Args:
             text: 要翻译的英文原文
             special_terms: 专有名词对照表 {英文: 中文}
             user_level: 用户英语水平
+            token_budget: 提示词的 token 上限，超出时按重要程度只保留部分专有名词；为空或 0 不限制
             
         Returns:
             str: 格式化后的完整提示词
         """
-        special_terms_section = cls._build_special_terms_section(special_terms)
-        
         prompt_template = cls.get_translation_prompt(user_level)
         
-        return prompt_template.format(
-            text=text,
-            special_terms_section=special_terms_section
-        )
+        def render(section):
+            return prompt_template.format(text=text, special_terms_section=section)
+        
+        if token_budget and special_terms:
+            special_terms = cls._fit_special_terms(render, text, special_terms, token_budget)
+        
+        return render(cls._build_special_terms_section(special_terms))
+    
+    @classmethod
+    def get_translation_system_prompt(cls, user_level: str = None) -> str:
+        """指定用户水平的翻译系统提示词（不含任何可变内容）"""
+        if user_level not in cls.VALID_LEVELS:
+            user_level = cls.DEFAULT_LEVEL
+        return cls.TRANSLATION_SYSTEM_PROMPTS[user_level]
+    
+    @classmethod
+    def build_translation_messages(cls, text: str, special_terms: dict = None, user_level: str = None,
+                                   token_budget: int = None) -> list:
+        """
+        构建翻译请求的消息列表：固定的系统提示词在前，专有名词和原文放在最后的用户消息中
+        
+        同一水平的系统提示词每次都完全相同，支持提示词缓存的接口可以复用这段前缀，
+        缩短首个 token 的等待时间。
+        
+        Args:
+            text: 要翻译的英文原文
+            special_terms: 专有名词对照表 {英文: 中文}
+            user_level: 用户英语水平
+            token_budget: 两条消息合计的 token 上限，超出时按重要程度只保留部分专有名词；为空或 0 不限制
+        
+        Returns:
+            list: [{"role": "system", ...}, {"role": "user", ...}]
+        """
+        system_prompt = cls.get_translation_system_prompt(user_level)
+        
+        if token_budget and special_terms:
+            special_terms = cls._fit_special_terms(
+                lambda section: system_prompt + cls._build_translation_user_message(text, section),
+                text, special_terms, token_budget)
+        
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": cls._build_translation_user_message(
+                text, cls._build_special_terms_section(special_terms))}
+        ]
+    
+    @staticmethod
+    def _build_translation_user_message(text: str, special_terms_section: str) -> str:
+        if special_terms_section:
+            return f"{special_terms_section}\n\n英文原文：{text}"
+        return f"英文原文：{text}"
+    
+    @classmethod
+    def rank_special_terms(cls, text: str, special_terms: dict) -> list:
+        """
+        按重要程度排列专有名词：原文中出现次数多的优先，其次是较长（更具体）的词条，最后按出现位置
+        
+        Returns:
+            list: [(英文, 中文), ...]
+        """
+        lower_text = text.lower()
+        
+        def sort_key(item):
+            term = item[0].lower()
+            position = lower_text.find(term)
+            return (-lower_text.count(term), -len(term), position if position >= 0 else len(text))
+        
+        return sorted(special_terms.items(), key=sort_key)
+    
+    @classmethod
+    def _fit_special_terms(cls, render, text: str, special_terms: dict, token_budget: int) -> dict:
+        """
+        在 token 预算内按重要程度保留专有名词
+        
+        原文中出现的词条总是保留（即使因此超出预算）；其余词条按重要程度依次尝试，
+        放不下的跳过，后面更短的词条仍可能放得下。
+        
+        Args:
+            render: 由专有名词部分生成完整提示词的函数，用于计算 token 数
+        """
+        if count_tokens(render(cls._build_special_terms_section(special_terms))) <= token_budget:
+            return special_terms
+        
+        # 先计算不含词条行的部分（模板、原文、对照表的标题和结尾），再逐条累加
+        used = count_tokens(render(cls._build_special_terms_section({"": ""})))
+        used -= count_tokens(cls._term_line("", ""))
+        lower_text = text.lower()
+        kept = {}
+        for en_term, zh_term in cls.rank_special_terms(text, special_terms):
+            line_tokens = count_tokens(cls._term_line(en_term, zh_term))
+            if used + line_tokens > token_budget and en_term.lower() not in lower_text:
+                continue
+            kept[en_term] = zh_term
+            used += line_tokens
+        
+        print(f"提示词超出 {token_budget} token 预算，专有名词保留 {len(kept)}/{len(special_terms)} 个")
+        return kept
     
     @classmethod
     def format_ocr_correction_prompt(cls, text: str) -> str:
@@ -164,11 +270,15 @@ class PromptManager:
         
         section = "专有名词对照表（必须严格按照此表翻译）：\n"
         for en_term, zh_term in special_terms.items():
-            section += f"- {en_term} → {zh_term}\n"
+            section += cls._term_line(en_term, zh_term)
         section += "\n请务必在翻译中使用上述对照表中的中文译名，不要使用其他译名！"
         
         return section
     
+    @staticmethod
+    def _term_line(en_term: str, zh_term: str) -> str:
+        return f"- {en_term} → {zh_term}\n"
+    
     @classmethod
     def get_all_levels(cls) -> list:
         """返回所有支持的英语水平"""
@@ -178,3 +288,16 @@ class PromptManager:
     def is_valid_level(cls, level: str) -> bool:
         """检查指定的水平是否有效"""
         return level in cls.VALID_LEVELS
+
+
+# 模板的空白在导入时统一整理一次
+PromptManager.TRANSLATION_PROMPTS = {
+    level: compact_prompt(template) for level, template in PromptManager.TRANSLATION_PROMPTS.items()
+}
+PromptManager.OCR_CORRECTION_PROMPT = compact_prompt(PromptManager.OCR_CORRECTION_PROMPT)
+
+# 系统提示词：去掉模板中间的原文和专有名词部分（改为放在用户消息中），其余内容保持不变
+PromptManager.TRANSLATION_SYSTEM_PROMPTS = {
+    level: template.replace(PromptManager.VARIABLE_SECTION, "").format()
+    for level, template in PromptManager.TRANSLATION_PROMPTS.items()
+}
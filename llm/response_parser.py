@@ -0,0 +1,304 @@
+import json
+from typing import Any, Dict, List, Optional
+
+
+class ResponseParseError(ValueError):
+    """LLM 返回内容无法解析为需要的 JSON"""
+
+
+# 翻译结果（PromptManager.TRANSLATION_PROMPTS 要求的格式）
+TRANSLATION_SCHEMA = {
+    "type": "object",
+    "required": ["translation"],
+    "properties": {
+        "translation": {"type": "string"},
+        "important_words": {"type": "object"},
+        "important_grammar": {"type": "object"},
+    },
+}
+
+# 选择题选项（QuizGenerator 生成干扰项时要求的格式）
+OPTIONS_SCHEMA = {
+    "type": "object",
+    "required": ["options"],
+    "properties": {
+        "options": {
+            "type": "array",
+            "minItems": 2,
+            "items": {
+                "type": "object",
+                "required": ["text", "is_correct"],
+                "properties": {
+                    "text": {"type": "string"},
+                    "is_correct": {"type": "boolean"},
+                },
+            },
+        },
+    },
+}
+
+_TYPES = {
+    "object": dict,
+    "array": list,
+    "string": str,
+    "boolean": bool,
+    "number": (int, float),
+    "integer": int,
+}
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+class JSONScanner:
+    """
+    增量扫描 JSON 的边界
+    
+    跳过开头的说明文字和 ```json 标记，从第一个 root 字符开始跟踪括号和字符串状态，
+    括号闭合时即找到完整的 JSON，之后的内容全部忽略。
+    同时记录每个逗号/开括号处的括号栈，内容被截断时据此补全。
+    """
+    
+    def __init__(self, root: str = "{"):
+        self.root = root
+        self.buffer = ""
+        self._restart(0)
+    
+    def _restart(self, position: int):
+        self.pos = position
+        self.start = -1
+        self.end = -1
+        self.stack = []
+        self.in_string = False
+        self.escape = False
+        # (截断位置, 该位置的括号栈)
+        self.cuts = []
+    
+    @property
+    def complete(self) -> bool:
+        return self.end >= 0
+    
+    def feed(self, chunk: str):
+        self.buffer += chunk
+        self._scan()
+    
+    def _scan(self):
+        buffer = self.buffer
+        i = self.pos
+        while i < len(buffer) and self.end < 0:
+            char = buffer[i]
+            if self.start < 0:
+                if char in self.root:
+                    self.start = i
+                    self.stack.append(char)
+                    self.cuts.append((i + 1, tuple(self.stack)))
+            elif self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif char == "\\":
+                    self.escape = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"':
+                self.in_string = True
+            elif char in "{[":
+                self.stack.append(char)
+                self.cuts.append((i + 1, tuple(self.stack)))
+            elif char in "}]":
+                self.stack.pop()
+                if not self.stack:
+                    self.end = i + 1
+            elif char == ",":
+                self.cuts.append((i, tuple(self.stack)))
+            i += 1
+        self.pos = i
+    
+    def skip_candidate(self):
+        """当前找到的内容不是有效 JSON（例如说明文字里的括号），从下一个字符重新查找"""
+        self._restart(self.start + 1)
+        self._scan()
+    
+    def candidate(self) -> Optional[str]:
+        """完整的 JSON 文本，尚未闭合时返回 None"""
+        if self.end < 0:
+            return None
+        return self.buffer[self.start:self.end]
+    
+    def repair(self) -> Optional[Any]:
+        """
+        补全被截断的 JSON
+        
+        先尝试闭合未结束的字符串并补上括号（保留截断处的部分文本），
+        失败时依次退回到更早的逗号/开括号处截断再补括号。
+        """
+        if self.start < 0:
+            return None
+        
+        text = self.buffer[self.start:]
+        if self.in_string:
+            if self.escape:
+                text = text[:-1]
+            text += '"'
+        text = text.rstrip().rstrip(",")
+        try:
+            return json.loads(text + self._closers(self.stack))
+        except json.JSONDecodeError:
+            pass
+        
+        for position, stack in reversed(self.cuts):
+            try:
+                return json.loads(self.buffer[self.start:position] + self._closers(stack))
+            except json.JSONDecodeError:
+                continue
+        return None
+    
+    @staticmethod
+    def _closers(stack) -> str:
+        return "".join(_CLOSERS[char] for char in reversed(stack))
+
+
+def extract_json(text: str, root: str = "{", repair: bool = True) -> Any:
+    """
+    从 LLM 的回复中提取 JSON
+    
+    容忍 Markdown 代码块、前面的说明文字和后面多余的内容；
+    回复被截断（没有闭合）时 repair=True 会尝试补全。
+    
+    Raises:
+        ResponseParseError: 找不到可以解析的 JSON
+    """
+    if not text:
+        raise ResponseParseError("LLM返回内容为空")
+    
+    scanner = JSONScanner(root)
+    scanner.feed(text)
+    while scanner.complete:
+        try:
+            return json.loads(scanner.candidate())
+        except json.JSONDecodeError:
+            scanner.skip_candidate()
+    
+    if repair:
+        value = scanner.repair()
+        if value is not None:
+            print("LLM返回的JSON不完整，已自动补全")
+            return value
+    raise ResponseParseError(f"未找到有效的JSON: {text[:80]}")
+
+
+def validate(value: Any, schema: Dict, path: str = "$") -> List[str]:
+    """
+    按 JSON Schema 的子集（type / required / properties / items / minItems）校验
+    
+    Returns:
+        list: 错误描述，为空表示通过
+    """
+    expected = _TYPES.get(schema.get("type"))
+    if expected and (not isinstance(value, expected) or
+                     (schema.get("type") in ("number", "integer") and isinstance(value, bool))):
+        return [f"{path} 应为 {schema['type']}"]
+    
+    errors = []
+    if isinstance(value, dict):
+        for key in schema.get("required", []):
+            if key not in value:
+                errors.append(f"{path} 缺少 {key}")
+        for key, sub_schema in schema.get("properties", {}).items():
+            if key in value:
+                errors.extend(validate(value[key], sub_schema, f"{path}.{key}"))
+    elif isinstance(value, list):
+        if len(value) < schema.get("minItems", 0):
+            errors.append(f"{path} 至少需要 {schema['minItems']} 项")
+        if "items" in schema:
+            for i, item in enumerate(value):
+                errors.extend(validate(item, schema["items"], f"{path}[{i}]"))
+    return errors
+
+
+def parse_translation(text: str) -> Dict:
+    """
+    解析翻译结果
+    
+    缺少或类型不对的 important_words / important_grammar 按空字典处理，
+    其他额外字段（from_rag、similarity 等）原样保留。
+    
+    Raises:
+        ResponseParseError: 不是 JSON 或没有 translation 字段
+    """
+    result = extract_json(text)
+    if isinstance(result, dict):
+        for key in ("important_words", "important_grammar"):
+            if not isinstance(result.get(key), dict):
+                result[key] = {}
+    
+    errors = validate(result, TRANSLATION_SCHEMA)
+    if errors:
+        raise ResponseParseError("翻译结果格式不正确: " + "; ".join(errors))
+    return result
+
+
+def parse_options(text: str) -> List[Dict]:
+    """
+    解析选择题选项，丢弃缺少文本的选项，is_correct 写成字符串时也能识别
+    
+    Raises:
+        ResponseParseError: 不是 JSON 或有效选项不足
+    """
+    result = extract_json(text)
+    if isinstance(result, dict) and isinstance(result.get("options"), list):
+        options = []
+        for option in result["options"]:
+            if not isinstance(option, dict) or not str(option.get("text", "")).strip():
+                continue
+            is_correct = option.get("is_correct", False)
+            if isinstance(is_correct, str):
+                is_correct = is_correct.strip().lower() == "true"
+            options.append({**option, "text": str(option["text"]).strip(), "is_correct": bool(is_correct)})
+        result["options"] = options
+    
+    errors = validate(result, OPTIONS_SCHEMA)
+    if errors:
+        raise ResponseParseError("选项格式不正确: " + "; ".join(errors))
+    return result["options"]
+
+
+class StreamingJSONParser:
+    """
+    流式解析：逐块输入 LLM 的输出
+    
+    feed() 在 JSON 闭合时返回解析结果，此后的内容被忽略；
+    partial() 返回当前已收到部分补全后的结果，可用于边接收边显示翻译。
+    """
+    
+    def __init__(self, root: str = "{"):
+        self.scanner = JSONScanner(root)
+        self.result = None
+    
+    @property
+    def done(self) -> bool:
+        return self.result is not None
+    
+    def feed(self, chunk: str) -> Optional[Any]:
+        if self.done:
+            return self.result
+        
+        self.scanner.feed(chunk)
+        while self.scanner.complete:
+            try:
+                self.result = json.loads(self.scanner.candidate())
+                return self.result
+            except json.JSONDecodeError:
+                self.scanner.skip_candidate()
+        return None
+    
+    def partial(self) -> Optional[Any]:
+        if self.done:
+            return self.result
+        return self.scanner.repair()
+    
+    def close(self) -> Any:
+        """输入结束：返回完整结果，未闭合时尝试补全"""
+        if self.done:
+            return self.result
+        value = self.scanner.repair()
+        if value is None:
+            raise ResponseParseError(f"未找到有效的JSON: {self.scanner.buffer[:80]}")
+        return value
@@ -0,0 +1,215 @@
+import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Callable, List, Optional
+
+
+class Backend:
+    """
+    一个 OpenAI 兼容的接口（云服务或本地的 vLLM / llama.cpp / Ollama 等）
+    
+    记录延迟的指数加权平均（EWMA）和错误率，以及最近的延迟窗口用于计算 p95。
+    连续失败后进入冷却期，冷却时间随失败次数翻倍。
+    错误率随时间衰减：排在最后的接口可能一直收不到请求，不能只靠成功的请求来降低错误率，
+    否则一次短暂的故障之后它再也回不到健康状态。
+    """
+    
+    # EWMA 的平滑系数
+    ALPHA = 0.3
+    # 错误率超过该值视为不健康
+    MAX_ERROR_RATE = 0.5
+    # 计算 p95 的延迟窗口和最少样本数
+    LATENCY_WINDOW = 64
+    MIN_SAMPLES = 5
+    BASE_COOLDOWN = 5.0
+    MAX_COOLDOWN = 60.0
+    # 错误率的半衰期（秒）
+    ERROR_RATE_HALF_LIFE = 30.0
+    
+    def __init__(self, name: str, client, model: str, structured_mode: str = "json_schema"):
+        self.name = name
+        self.client = client
+        self.model = model
+        # 结构化输出模式按接口分别检测
+        self.structured_mode = structured_mode
+        self.ewma_latency = None
+        self.error_rate = 0.0
+        # error_rate 对应的时间，之后按半衰期衰减
+        self.error_rate_at = time.monotonic()
+        self.consecutive_failures = 0
+        self.cooldown_until = 0.0
+        self.latencies = deque(maxlen=self.LATENCY_WINDOW)
+        self._lock = threading.Lock()
+    
+    def current_error_rate(self, now: float = None) -> float:
+        """衰减到当前时间的错误率"""
+        now = time.monotonic() if now is None else now
+        return self.error_rate * 0.5 ** (max(now - self.error_rate_at, 0.0) / self.ERROR_RATE_HALF_LIFE)
+    
+    @property
+    def healthy(self) -> bool:
+        now = time.monotonic()
+        return self.current_error_rate(now) <= self.MAX_ERROR_RATE and now >= self.cooldown_until
+    
+    def record_success(self, latency: float):
+        with self._lock:
+            now = time.monotonic()
+            self.latencies.append(latency)
+            if self.ewma_latency is None:
+                self.ewma_latency = latency
+            else:
+                self.ewma_latency = self.ALPHA * latency + (1 - self.ALPHA) * self.ewma_latency
+            self.error_rate = self.current_error_rate(now) * (1 - self.ALPHA)
+            self.error_rate_at = now
+            self.consecutive_failures = 0
+            self.cooldown_until = 0.0
+    
+    def record_failure(self):
+        with self._lock:
+            now = time.monotonic()
+            self.error_rate = self.ALPHA + (1 - self.ALPHA) * self.current_error_rate(now)
+            self.error_rate_at = now
+            self.consecutive_failures += 1
+            cooldown = min(self.BASE_COOLDOWN * 2 ** (self.consecutive_failures - 1), self.MAX_COOLDOWN)
+            self.cooldown_until = now + cooldown
+    
+    def p95(self) -> Optional[float]:
+        """最近延迟的 p95（秒），样本不足时返回 None"""
+        with self._lock:
+            if len(self.latencies) < self.MIN_SAMPLES:
+                return None
+            values = sorted(self.latencies)
+        return values[min(int(len(values) * 0.95), len(values) - 1)]
+    
+    def status(self) -> dict:
+        return {
+            "name": self.name,
+            "model": self.model,
+            "healthy": self.healthy,
+            "ewma_ms": round(self.ewma_latency * 1000) if self.ewma_latency is not None else None,
+            "error_rate": round(self.current_error_rate(), 3),
+            "structured_mode": self.structured_mode,
+        }
+
+
+class LLMRouter:
+    """
+    在多个接口之间分配请求
+    
+    - 健康的接口按 EWMA 延迟从快到慢排列（还没有数据的排在最前，先试探一次），不健康的排在最后作为兜底
+    - 请求失败时记录错误并依次换下一个接口
+    - 对延迟敏感的请求（截图翻译）可以对冲：当前接口超过其 p95 仍未返回时，
+      同时向下一个接口发送相同请求，取先成功的结果；落后的请求在后台完成，只用于更新统计
+    """
+    
+    # 接口还没有足够样本计算 p95 时的对冲等待时间（秒）
+    DEFAULT_HEDGE_DELAY = 3.0
+    # 对冲等待时间的下限，避免很快的接口因为正常的抖动频繁触发对冲
+    MIN_HEDGE_DELAY = 0.5
+    
+    def __init__(self, backends: List[Backend], on_latency: Callable[[Backend, float], None] = None):
+        if not backends:
+            raise ValueError("至少需要配置一个LLM接口")
+        self.backends = list(backends)
+        self.on_latency = on_latency
+        self._executor = None
+        self._executor_lock = threading.Lock()
+    
+    def ordered(self) -> List[Backend]:
+        """本次请求尝试接口的顺序"""
+        healthy = [backend for backend in self.backends if backend.healthy]
+        unhealthy = [backend for backend in self.backends if not backend.healthy]
+        healthy.sort(key=lambda backend: backend.ewma_latency or 0.0)
+        unhealthy.sort(key=lambda backend: backend.cooldown_until)
+        return healthy + unhealthy
+    
+    @property
+    def primary(self) -> Backend:
+        return self.ordered()[0]
+    
+    def _timed(self, backend: Backend, request: Callable[[Backend], object]):
+        start = time.perf_counter()
+        try:
+            result = request(backend)
+        except Exception:
+            backend.record_failure()
+            raise
+        latency = time.perf_counter() - start
+        backend.record_success(latency)
+        if self.on_latency:
+            self.on_latency(backend, latency)
+        return result
+    
+    def call(self, request: Callable[[Backend], object], hedge: bool = False):
+        """
+        发送请求
+        
+        Args:
+            request: 以接口为参数发送一次请求的函数
+            hedge: 是否在超过 p95 后对冲请求
+        
+        Raises:
+            Exception: 所有接口都失败时抛出最后一个错误
+        """
+        backends = self.ordered()
+        if hedge and len(backends) > 1:
+            return self._call_hedged(request, backends)
+        
+        last_error = None
+        for backend in backends:
+            try:
+                return self._timed(backend, request)
+            except Exception as e:
+                print(f"LLM接口 {backend.name} 请求失败: {e}")
+                last_error = e
+        raise last_error
+    
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=max(len(self.backends) * 2, 4))
+            return self._executor
+    
+    def _hedge_delay(self, backend: Backend) -> float:
+        p95 = backend.p95()
+        return max(p95, self.MIN_HEDGE_DELAY) if p95 is not None else self.DEFAULT_HEDGE_DELAY
+    
+    def _call_hedged(self, request: Callable[[Backend], object], backends: List[Backend]):
+        waiting = list(backends)
+        futures = {}
+        last_error = None
+        
+        def launch():
+            backend = waiting.pop(0)
+            futures[self._get_executor().submit(self._timed, backend, request)] = backend
+            return backend
+        
+        current = launch()
+        while futures:
+            timeout = self._hedge_delay(current) if waiting else None
+            done, _ = wait(futures, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                print(f"LLM接口 {current.name} 超过 {timeout:.2f}s 未返回，同时请求 {waiting[0].name}")
+                current = launch()
+                continue
+            
+            for future in done:
+                backend = futures.pop(future)
+                try:
+                    return future.result()
+                except Exception as e:
+                    print(f"LLM接口 {backend.name} 请求失败: {e}")
+                    last_error = e
+            if not futures and waiting:
+                current = launch()
+        raise last_error
+    
+    def status(self) -> List[dict]:
+        return [backend.status() for backend in self.ordered()]
+    
+    def shutdown(self):
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
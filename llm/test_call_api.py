@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LLM 客户端结构化输出降级（_json_completion）的测试脚本
+
+使用模拟的接口客户端，不读取配置、不发送网络请求
+"""
+
+import os
+import sys
+import threading
+from types import SimpleNamespace
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from llm.call_api import LLMClient
+from llm.router import Backend
+
+
+class FakeAPIError(Exception):
+    """与 openai.APIStatusError 一样带有 status_code、param 和 body"""
+    
+    def __init__(self, status_code, message="", param=None):
+        super().__init__(f"Error code: {status_code} - {message}")
+        self.status_code = status_code
+        self.param = param
+        self.body = {"message": message, "param": param}
+
+
+class FakeOpenAI:
+    """
+    记录每次请求
+    
+    unsupported 中的结构化模式返回 400（信息中提到 response_format）；
+    error_status 不为空时所有请求都以该状态码和 error_message 失败
+    """
+    
+    def __init__(self, unsupported=(), error_status=None, error_message="Internal error"):
+        self.unsupported = set(unsupported)
+        self.error_status = error_status
+        self.error_message = error_message
+        self.requests = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+    
+    def create(self, model, messages, stream=False, response_format=None):
+        mode = response_format["type"] if response_format else "off"
+        self.requests.append((mode, messages))
+        if self.error_status is not None:
+            raise FakeAPIError(self.error_status, self.error_message)
+        if mode in self.unsupported:
+            raise FakeAPIError(400, f"response_format type '{mode}' is not supported by this model")
+        message = SimpleNamespace(content='{"translation": "你好"}')
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+
+
+def make_client():
+    """不读取配置的 LLMClient，只用于调用 _json_completion"""
+    llm = LLMClient.__new__(LLMClient)
+    llm._usage = {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0,
+                  "cached_tokens": 0, "cache_reported_prompt_tokens": 0}
+    llm._usage_lock = threading.Lock()
+    return llm
+
+
+MESSAGES = [{"role": "system", "content": "系统"}, {"role": "user", "content": "英文原文：Hello"}]
+SCHEMA = {"type": "object", "required": ["translation"]}
+
+
+def test_fallback_to_json_object():
+    """不支持 json_schema 时改用 json_object，并记住可用的模式"""
+    api = FakeOpenAI(unsupported={"json_schema"})
+    backend = Backend("fake", api, "model")
+    llm = make_client()
+    
+    llm._json_completion(backend, MESSAGES, SCHEMA, "translation")
+    assert [mode for mode, _ in api.requests] == ["json_schema", "json_object"], api.requests
+    assert backend.structured_mode == "json_object"
+    
+    api.requests.clear()
+    llm._json_completion(backend, MESSAGES, SCHEMA, "translation")
+    assert [mode for mode, _ in api.requests] == ["json_object"], api.requests
+    assert llm.usage_summary()["calls"] == 2
+
+
+def test_fallback_to_prompt_only():
+    """都不支持时只靠提示词约束，说明追加到最后一条消息，原消息不变"""
+    api = FakeOpenAI(unsupported={"json_schema", "json_object"})
+    backend = Backend("fake", api, "model")
+    
+    make_client()._json_completion(backend, MESSAGES, SCHEMA, "translation", fallback_instruction="只返回JSON")
+    assert [mode for mode, _ in api.requests] == ["json_schema", "json_object", "off"], api.requests
+    assert backend.structured_mode == "off"
+    last_message = api.requests[-1][1][-1]["content"]
+    assert last_message == "英文原文：Hello\n只返回JSON", last_message
+    assert MESSAGES[-1]["content"] == "英文原文：Hello"
+    assert api.requests[0][1] is MESSAGES
+
+
+def test_other_errors_are_raised():
+    """与 response_format 无关的错误直接抛出，不重试其他模式，也不改变已记住的模式"""
+    for status in (500, 401):
+        api = FakeOpenAI(error_status=status)
+        backend = Backend("fake", api, "model")
+        try:
+            make_client()._json_completion(backend, MESSAGES, SCHEMA, "translation")
+        except FakeAPIError as e:
+            assert e.status_code == status
+        else:
+            raise AssertionError(f"HTTP {status} 应当抛出")
+        assert len(api.requests) == 1 and backend.structured_mode == "json_schema"
+    
+    # 与输出格式无关的 400/404（上下文过长、模型不存在、内容审核）不降级，只请求一次
+    for status, message in ((400, "This model's maximum context length is 8192 tokens"),
+                            (404, "The model `gpt-x` does not exist"),
+                            (400, "Input data may contain inappropriate content")):
+        api = FakeOpenAI(error_status=status, error_message=message)
+        backend = Backend("fake", api, "model")
+        try:
+            make_client()._json_completion(backend, MESSAGES, SCHEMA, "translation")
+        except FakeAPIError:
+            pass
+        else:
+            raise AssertionError(f"应当抛出: {message}")
+        assert len(api.requests) == 1 and backend.structured_mode == "json_schema", (message, api.requests)
+    
+    # param 指向 response_format 时即使信息中没有提到也降级
+    llm = make_client()
+    assert llm._is_unsupported_error(FakeAPIError(400, "Invalid value", param="response_format"))
+    assert not llm._is_unsupported_error(FakeAPIError(500, "response_format failed"))
+    
+    # 纯提示词模式也返回 400 时不再降级
+    api = FakeOpenAI(error_status=400, error_message="response_format is not supported")
+    backend = Backend("fake", api, "model", structured_mode="off")
+    try:
+        make_client()._json_completion(backend, MESSAGES, SCHEMA, "translation")
+    except FakeAPIError:
+        pass
+    else:
+        raise AssertionError("off 模式的错误应当抛出")
+    assert len(api.requests) == 1
+
+
+def main():
+    tests = [test_fallback_to_json_object, test_fallback_to_prompt_only, test_other_errors_are_raised]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+    return failed == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
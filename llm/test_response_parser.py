@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LLM 回复解析（JSON 提取与截断补全）的测试脚本
+
+不调用LLM接口
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from llm.response_parser import (ResponseParseError, StreamingJSONParser, extract_json,
+                                 parse_options, parse_translation)
+
+
+def test_extract_with_surrounding_text():
+    """容忍代码块、说明文字中的括号和后面多余的内容"""
+    text = '好的 {这不是JSON}\n```json\n{"translation": "你好", "important_words": {}}\n```\n以上 {"x": 1}'
+    assert extract_json(text) == {"translation": "你好", "important_words": {}}
+    assert extract_json('结果：[1, 2, 3] 完毕', root="[") == [1, 2, 3]
+
+
+def test_repair_truncated():
+    """回复被截断时补全字符串和括号，尽量保留已收到的内容"""
+    truncated = '{"translation": "你好，世界", "important_words": {"hello": "你好", "wor'
+    result = extract_json(truncated)
+    assert result["translation"] == "你好，世界", result
+    assert result["important_words"]["hello"] == "你好", result
+    
+    # 截断在字符串中间：保留部分译文
+    assert extract_json('{"translation": "今天天气') == {"translation": "今天天气"}
+    # 截断在转义符之后
+    assert extract_json('{"translation": "a\\') == {"translation": "a"}
+    # 截断在逗号和键名之后：退回到上一个逗号
+    assert extract_json('{"translation": "好", "important_grammar":') == {"translation": "好"}
+    assert extract_json('{"a": [1, 2, {"b": tr') == {"a": [1, 2, {}]}
+    
+    try:
+        extract_json('{"translation": "好"', repair=False)
+    except ResponseParseError:
+        pass
+    else:
+        raise AssertionError("repair=False 时截断的 JSON 应当报错")
+    
+    for text in ("", "没有JSON"):
+        try:
+            extract_json(text)
+        except ResponseParseError:
+            continue
+        raise AssertionError(f"应当报错: {text!r}")
+
+
+def test_parse_translation_and_options():
+    """翻译结果补齐缺失字段；选项的 is_correct 字符串可以识别"""
+    result = parse_translation('{"translation": "你好", "important_words": null}')
+    assert result == {"translation": "你好", "important_words": {}, "important_grammar": {}}, result
+    
+    try:
+        parse_translation('{"important_words": {}}')
+    except ResponseParseError:
+        pass
+    else:
+        raise AssertionError("缺少 translation 应当报错")
+    
+    options = parse_options('{"options": [{"text": " A ", "is_correct": "true"}, '
+                            '{"text": "", "is_correct": false}, {"text": "B", "is_correct": false}]}')
+    assert options == [{"text": "A", "is_correct": True}, {"text": "B", "is_correct": False}], options
+
+
+def test_streaming():
+    """流式输入：闭合前 partial() 返回补全的结果，闭合后忽略剩余内容"""
+    parser = StreamingJSONParser()
+    assert parser.feed('```json\n{"translation": "你') is None
+    assert parser.partial() == {"translation": "你"}
+    assert parser.feed('好"}') == {"translation": "你好"}
+    assert parser.feed('\n```') == {"translation": "你好"}
+    
+    parser = StreamingJSONParser()
+    parser.feed('{"translation": "截断')
+    assert parser.close() == {"translation": "截断"}
+
+
+def main():
+    tests = [test_extract_with_surrounding_text, test_repair_truncated,
+             test_parse_translation_and_options, test_streaming]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+    return failed == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
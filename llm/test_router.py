@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多接口调度（LLMRouter）的测试脚本
+
+请求函数直接返回接口名称或抛出错误，不发送网络请求
+"""
+
+import os
+import sys
+import time
+import threading
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from llm.router import Backend, LLMRouter
+
+
+def make_router(*names):
+    backends = [Backend(name, None, "model") for name in names]
+    router = LLMRouter(backends)
+    # 缩短对冲等待时间，测试不必等待默认的 3 秒
+    router.DEFAULT_HEDGE_DELAY = 0.1
+    router.MIN_HEDGE_DELAY = 0.05
+    return router, backends
+
+
+def test_failover_without_hedge():
+    """失败的接口记录错误并进入冷却，请求换下一个接口；之后排在最后"""
+    router, (failing, working) = make_router("a", "b")
+    calls = []
+    
+    def request(backend):
+        calls.append(backend.name)
+        if backend.name == "a":
+            raise ConnectionError("a 不可用")
+        return backend.name
+    
+    assert router.call(request) == "b"
+    assert calls == ["a", "b"], calls
+    assert not failing.healthy and working.healthy
+    assert [backend.name for backend in router.ordered()] == ["b", "a"]
+    
+    def always_fail(backend):
+        raise ConnectionError(backend.name)
+    
+    try:
+        router.call(always_fail)
+    except ConnectionError as e:
+        assert str(e) == "a", e
+    else:
+        raise AssertionError("所有接口都失败时应当抛出最后一个错误")
+
+
+def test_hedge_after_delay():
+    """主接口超过对冲等待时间仍未返回时请求下一个接口，取先返回的结果"""
+    router, _ = make_router("a", "b")
+    release = threading.Event()
+    calls = []
+    
+    def request(backend):
+        calls.append(backend.name)
+        if backend.name == "a":
+            release.wait(5)
+        return backend.name
+    
+    try:
+        start = time.perf_counter()
+        assert router.call(request, hedge=True) == "b"
+        elapsed = time.perf_counter() - start
+        assert calls == ["a", "b"], calls
+        assert 0.1 <= elapsed < 2, elapsed
+    finally:
+        release.set()
+        router.shutdown()
+
+
+def test_hedge_failover_without_waiting():
+    """对冲模式下主接口很快失败时立即换下一个接口，不等待对冲时间"""
+    router, _ = make_router("a", "b", "c")
+    router.DEFAULT_HEDGE_DELAY = 5
+    
+    def request(backend):
+        if backend.name == "a":
+            raise ConnectionError("a 不可用")
+        return backend.name
+    
+    try:
+        start = time.perf_counter()
+        assert router.call(request, hedge=True) == "b"
+        assert time.perf_counter() - start < 2
+        
+        def always_fail(backend):
+            raise ConnectionError(backend.name)
+        
+        try:
+            router.call(always_fail, hedge=True)
+        except ConnectionError:
+            pass
+        else:
+            raise AssertionError("所有接口都失败时应当抛出")
+    finally:
+        router.shutdown()
+
+
+def test_recovery_after_cooldown():
+    """短暂故障后，冷却期结束、错误率衰减后接口重新收到请求并恢复健康"""
+    router, (failing, working) = make_router("a", "b")
+    calls = []
+    outage = [True]
+    
+    def request(backend):
+        calls.append(backend.name)
+        if backend.name == "a" and outage[0]:
+            raise ConnectionError("a 不可用")
+        return backend.name
+    
+    # 接口在冷却期内排在最后，不会再收到请求，这里直接记录连续失败
+    assert router.call(request) == "b"
+    failing.record_failure()
+    failing.record_failure()
+    assert failing.current_error_rate() > Backend.MAX_ERROR_RATE
+    
+    # 冷却期刚结束时错误率仍然很高，请求继续发给正常的接口
+    failing.cooldown_until = 0.0
+    calls.clear()
+    assert router.call(request) == "b" and calls == ["b"], calls
+    
+    # 模拟时间经过：错误率衰减后重新尝试该接口，成功后恢复健康
+    failing.error_rate_at -= 2 * Backend.ERROR_RATE_HALF_LIFE
+    outage[0] = False
+    assert failing.healthy
+    calls.clear()
+    assert router.call(request) == "a" and calls == ["a"], calls
+    assert failing.healthy and failing.consecutive_failures == 0
+
+
+def test_ordering_by_latency():
+    """健康的接口按延迟 EWMA 排序，p95 需要足够的样本"""
+    router, (first, second) = make_router("a", "b")
+    for _ in range(Backend.MIN_SAMPLES):
+        first.record_success(0.8)
+        second.record_success(0.2)
+    assert [backend.name for backend in router.ordered()] == ["b", "a"]
+    assert abs(first.p95() - 0.8) < 1e-9
+    assert Backend("c", None, "model").p95() is None
+    assert router._hedge_delay(second) == 0.2
+
+
+def main():
+    tests = [test_failover_without_hedge, test_hedge_after_delay,
+             test_hedge_failover_without_waiting, test_recovery_after_cooldown, test_ordering_by_latency]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+    return failed == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
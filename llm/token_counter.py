@@ -0,0 +1,40 @@
+"""
+本地 token 计数
+
+安装了 tiktoken 时使用 cl100k_base 编码计数；否则按字符类别估算：
+中日韩字符每字约 1 个 token，英文单词每 4 个字母约 1 个 token，数字和标点各算 1 个。
+估算值只用于提示词预算和接口没有返回 usage 时的用量统计，不要求与服务端完全一致。
+"""
+import re
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("cl100k_base")
+    TIKTOKEN_AVAILABLE = True
+except Exception:
+    # 未安装，或离线环境下无法下载编码文件
+    _encoding = None
+    TIKTOKEN_AVAILABLE = False
+
+_TOKEN_PATTERN = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uff00-\uffef]|[A-Za-z]+|\d{1,3}|\S")
+
+
+def estimate_tokens(text: str) -> int:
+    """不依赖分词器的估算"""
+    count = 0
+    for match in _TOKEN_PATTERN.finditer(text):
+        piece = match.group()
+        if piece.isascii() and piece.isalpha():
+            count += (len(piece) + 3) // 4
+        else:
+            count += 1
+    return count
+
+
+def count_tokens(text: str) -> int:
+    """文本的 token 数"""
+    if not text:
+        return 0
+    if _encoding is not None:
+        return len(_encoding.encode(text))
+    return estimate_tokens(text)
@@ -0,0 +1,258 @@
+"""
+批量OCR：对整个截图文件夹、通配符匹配的图片或视频文件做离线识别
+
+用法：
+    python ocr/batch_ocr.py <目录 | 通配符 | 视频文件> -o ocr_results.jsonl [--batch-size 8] [--workers 4] [--frame-interval 1.0]
+
+每张图片（或视频的每个采样帧）输出一行 JSON：
+    {"source", "frame", "timestamp", "text", "rec_texts", "rec_scores", "rec_boxes"}
+其中 text 与 process_image_ocr 相同，是去掉第一个单词（角色名）后的拼接文本。
+"""
+import os
+import sys
+import glob
+import json
+import queue
+import argparse
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, List, Tuple
+
+import cv2
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.utils.tracing import tracer
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".webp")
+VIDEO_EXTENSIONS = (".mp4", ".mkv", ".avi", ".mov", ".flv", ".webm")
+
+
+def is_video_file(path: str) -> bool:
+    return os.path.isfile(path) and path.lower().endswith(VIDEO_EXTENSIONS)
+
+
+def join_rec_texts(rec_texts: List[str]) -> str:
+    """去掉第一个单词（对话框中的角色名）后拼接；只有一段文本时返回全部内容"""
+    if len(rec_texts) > 1:
+        return " ".join(rec_texts[1:])
+    return " ".join(rec_texts)
+
+
+def read_image(path: str) -> np.ndarray:
+    """读取图片（用 imdecode 以支持中文路径）"""
+    image = cv2.imdecode(np.fromfile(path, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        raise ValueError(f"无法读取图片: {path}")
+    return image
+
+
+def list_image_files(source: str) -> List[str]:
+    """目录下的全部图片，或通配符匹配的图片，按文件名排序"""
+    if os.path.isdir(source):
+        paths = [os.path.join(source, name) for name in os.listdir(source)]
+    else:
+        paths = glob.glob(source, recursive=True)
+    return sorted(path for path in paths if path.lower().endswith(IMAGE_EXTENSIONS) and os.path.isfile(path))
+
+
+def iter_video_frames(path: str, frame_interval: float = 1.0) -> Iterator[Tuple[Dict, np.ndarray]]:
+    """
+    按时间间隔采样视频帧
+    
+    Args:
+        path: 视频文件
+        frame_interval: 采样间隔（秒），过场动画的字幕一般停留 1 秒以上
+    """
+    capture = cv2.VideoCapture(path)
+    if not capture.isOpened():
+        raise ValueError(f"无法打开视频: {path}")
+    
+    try:
+        fps = capture.get(cv2.CAP_PROP_FPS) or 30.0
+        step = max(int(round(fps * frame_interval)), 1)
+        frame_index = 0
+        while True:
+            # 跳过的帧只 grab 不解码
+            if frame_index % step:
+                if not capture.grab():
+                    break
+            else:
+                ok, frame = capture.read()
+                if not ok:
+                    break
+                yield {"source": path, "frame": frame_index, "timestamp": round(frame_index / fps, 3)}, frame
+            frame_index += 1
+    finally:
+        capture.release()
+
+
+def iter_sources(source: str, frame_interval: float = 1.0) -> Iterator[Tuple[Dict, Callable[[], np.ndarray]]]:
+    """
+    将输入展开为 (元信息, 加载函数)
+    
+    图片的加载函数在线程池中读取解码；视频帧已经解码，加载函数直接返回。
+    """
+    if is_video_file(source):
+        for meta, frame in iter_video_frames(source, frame_interval):
+            yield meta, (lambda frame=frame: frame)
+        return
+    
+    paths = list_image_files(source)
+    if not paths:
+        raise ValueError(f"没有找到图片: {source}")
+    for path in paths:
+        yield {"source": path, "frame": None, "timestamp": None}, (lambda path=path: read_image(path))
+
+
+def _background(iterator: Iterator, maxsize: int) -> Iterator:
+    """在后台线程中迭代（视频解码与OCR并行），队列有界以限制内存"""
+    items = queue.Queue(maxsize=maxsize)
+    done = object()
+    
+    def produce():
+        try:
+            for item in iterator:
+                items.put(item)
+        except Exception as e:
+            items.put(e)
+        items.put(done)
+    
+    threading.Thread(target=produce, daemon=True).start()
+    while True:
+        item = items.get()
+        if item is done:
+            return
+        if isinstance(item, Exception):
+            raise item
+        yield item
+
+
+class BatchOCR:
+    """
+    批量OCR
+    
+    线程池预先读取解码后面几批图片，当前批次一次性交给 PaddleOCR 识别，
+    结果逐行写入 JSONL（中途中断也能保留已识别的部分）。
+    """
+    
+    def __init__(self, ocr_engine=None, batch_size: int = 8, workers: int = 4, prefetch_batches: int = 2):
+        """
+        Args:
+            ocr_engine: PaddleOCR 对象，默认使用 ocr_download 中的全局对象
+            batch_size: 每次交给 PaddleOCR 的图片数量
+            workers: 读取解码图片的线程数
+            prefetch_batches: 预读的批次数
+        """
+        if ocr_engine is None:
+            from ocr.ocr_download import ocr as ocr_engine
+        self.ocr = ocr_engine
+        self.batch_size = max(int(batch_size), 1)
+        self.workers = max(int(workers), 1)
+        self.prefetch = self.batch_size * max(int(prefetch_batches), 1)
+    
+    def _iter_batches(self, sources: Iterator[Tuple[Dict, Callable]]) -> Iterator[List[Tuple[Dict, np.ndarray]]]:
+        """按顺序取出解码好的图片并分批；读取失败的图片打印错误后跳过"""
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            pending = deque()
+            batch = []
+            sources = iter(sources)
+            exhausted = False
+            
+            while pending or not exhausted:
+                while not exhausted and len(pending) < self.prefetch + self.batch_size:
+                    try:
+                        meta, load = next(sources)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    pending.append((meta, executor.submit(load)))
+                if not pending:
+                    break
+                
+                meta, future = pending.popleft()
+                try:
+                    batch.append((meta, future.result()))
+                except Exception as e:
+                    print(f"读取图片失败 {meta['source']}: {e}")
+                    continue
+                if len(batch) >= self.batch_size:
+                    yield batch
+                    batch = []
+            
+            if batch:
+                yield batch
+    
+    @staticmethod
+    def _to_list(value) -> list:
+        if value is None:
+            return []
+        return value.tolist() if hasattr(value, "tolist") else list(value)
+    
+    def _recognize(self, batch: List[Tuple[Dict, np.ndarray]]) -> List[Dict]:
+        with tracer.span("ocr.batch_predict"):
+            results = self.ocr.predict([image for _, image in batch])
+        
+        records = []
+        for (meta, _), res in zip(batch, results):
+            rec_texts = list(res.get("rec_texts", []))
+            records.append({
+                **meta,
+                "text": join_rec_texts(rec_texts),
+                "rec_texts": rec_texts,
+                "rec_scores": [round(float(score), 4) for score in self._to_list(res.get("rec_scores"))],
+                "rec_boxes": self._to_list(res.get("rec_boxes")),
+            })
+        return records
+    
+    def iter_results(self, source: str, frame_interval: float = 1.0) -> Iterator[Dict]:
+        """逐张返回识别结果，顺序与输入一致"""
+        sources = iter_sources(source, frame_interval)
+        if is_video_file(source):
+            sources = _background(sources, self.prefetch + self.batch_size)
+        
+        for batch in self._iter_batches(sources):
+            try:
+                yield from self._recognize(batch)
+            except Exception as e:
+                print(f"批量OCR失败（{batch[0][0]['source']} 起 {len(batch)} 张）: {e}")
+    
+    def run(self, source: str, output_path: str, frame_interval: float = 1.0) -> int:
+        """
+        识别并逐行写入 JSONL
+        
+        Returns:
+            int: 写入的行数
+        """
+        directory = os.path.dirname(os.path.abspath(output_path))
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        
+        count = 0
+        with open(output_path, "w", encoding="utf-8") as f:
+            for record in self.iter_results(source, frame_interval):
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                f.flush()
+                count += 1
+                if count % 50 == 0:
+                    print(f"已识别 {count} 张")
+        
+        print(f"批量OCR完成，共 {count} 张，结果已写入: {output_path}")
+        return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="批量OCR：截图文件夹 / 通配符 / 视频文件")
+    parser.add_argument("source", help="图片目录、通配符（如 \"shots/**/*.png\"）或视频文件")
+    parser.add_argument("-o", "--output", default="ocr_results.jsonl", help="输出的 JSONL 文件")
+    parser.add_argument("--batch-size", type=int, default=8, help="每批识别的图片数量")
+    parser.add_argument("--workers", type=int, default=4, help="读取解码图片的线程数")
+    parser.add_argument("--frame-interval", type=float, default=1.0, help="视频采样间隔（秒）")
+    args = parser.parse_args(argv)
+    
+    BatchOCR(batch_size=args.batch_size, workers=args.workers).run(args.source, args.output, args.frame_interval)
+
+
+if __name__ == "__main__":
+    main()
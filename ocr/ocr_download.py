@@ -1,8 +1,11 @@
 from paddleocr import PaddleOCR
-import time
+import sys
 import json
 import os
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.utils.tracing import tracer
+
 # 全局OCR对象
 ocr = PaddleOCR(
     use_doc_orientation_classify=False, # 通过 use_doc_orientation_classify 参数指定不使用文档方向分类模型
@@ -23,8 +26,6 @@ def process_image_ocr(image_path: str, output_dir: str = "output") -> str:
     Returns:
         str: 除第一个单词外的拼接文本
     """
-    start_time = time.time()
-    
     # 确保输出目录存在
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
@@ -39,11 +40,13 @@ def process_image_ocr(image_path: str, output_dir: str = "output") -> str:
             print(f"删除旧文件失败 {old_file}: {e}")
     
     # OCR识别
-    result = ocr.predict(image_path)
-    
-    # 保存JSON文件
-    for res in result:
-        res.save_to_json(output_dir)
+    with tracer.span("ocr.predict") as span:
+        result = ocr.predict(image_path)
+        
+        # 保存JSON文件
+        for res in result:
+            res.save_to_json(output_dir)
+    print(f"OCR处理时间: {span.duration:.6f} 秒")
     
     # 只读取刚生成的JSON文件并处理rec_texts
     concatenated_texts = []
@@ -81,11 +84,6 @@ def process_image_ocr(image_path: str, output_dir: str = "output") -> str:
             except:
                 pass
     
-    # 结束计时
-    end_time = time.time()
-    execution_time = end_time - start_time
-    print(f"OCR处理时间: {execution_time:.6f} 秒")
-    
     # 返回第一个结果，如果有多个文件则返回第一个
     return concatenated_texts[0] if concatenated_texts else ""
 
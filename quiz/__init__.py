@@ -4,5 +4,7 @@
 from .quiz_generator import QuizGenerator, QuizSession
 from .quiz_window import QuizWindow, QuizSetupDialog
 from .progress_manager import ProgressManager, WrongQuestionReview
+from .review_scheduler import ReviewScheduler
+from .item_statistics import ItemStatistics
 
-__all__ = ['QuizGenerator', 'QuizSession', 'QuizWindow', 'QuizSetupDialog', 'ProgressManager', 'WrongQuestionReview']
\ No newline at end of file
+__all__ = ['QuizGenerator', 'QuizSession', 'QuizWindow', 'QuizSetupDialog', 'ProgressManager', 'WrongQuestionReview', 'ReviewScheduler', 'ItemStatistics']
\ No newline at end of file
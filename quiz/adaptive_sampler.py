@@ -0,0 +1,189 @@
+import math
+import random
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+class FenwickSampler:
+    """
+    基于树状数组（Fenwick tree）的加权随机抽样
+    
+    抽样和修改单个权重都是 O(log n)；抽中的元素把权重置 0 即可实现不放回抽样。
+    """
+    
+    def __init__(self, weights: List[float], rng: Optional[random.Random] = None):
+        self.rng = rng or random
+        self.reset(weights)
+    
+    def reset(self, weights: List[float]):
+        """O(n) 重新建树"""
+        self.size = len(weights)
+        self.weights = [max(float(w), 0.0) for w in weights]
+        # 权重为正的数量：权重都置 0 后树中可能残留浮点误差，不能只看总和判断是否抽完
+        self.positive = sum(1 for w in self.weights if w > 0)
+        self.tree = [0.0] + self.weights
+        for i in range(1, self.size + 1):
+            parent = i + (i & -i)
+            if parent <= self.size:
+                self.tree[parent] += self.tree[i]
+        self._top_bit = 1 << (self.size.bit_length() - 1) if self.size else 0
+    
+    def update(self, index: int, weight: float):
+        weight = max(float(weight), 0.0)
+        delta = weight - self.weights[index]
+        self.positive += (weight > 0) - (self.weights[index] > 0)
+        self.weights[index] = weight
+        i = index + 1
+        while i <= self.size:
+            self.tree[i] += delta
+            i += i & -i
+    
+    def total(self) -> float:
+        total = 0.0
+        i = self.size
+        while i > 0:
+            total += self.tree[i]
+            i -= i & -i
+        return total
+    
+    def sample(self) -> Optional[int]:
+        """按权重抽取一个下标，所有权重都为 0 时返回 None"""
+        if not self.positive:
+            return None
+        total = self.total()
+        if total <= 0:
+            return max(range(self.size), key=self.weights.__getitem__)
+        
+        for _ in range(3):
+            target = self.rng.random() * total
+            position = 0
+            step = self._top_bit
+            while step:
+                next_position = position + step
+                if next_position <= self.size and self.tree[next_position] <= target:
+                    position = next_position
+                    target -= self.tree[next_position]
+                step >>= 1
+            # 浮点误差可能落到权重为 0 的位置，重新抽取
+            if position < self.size and self.weights[position] > 0:
+                return position
+        
+        return max(range(self.size), key=self.weights.__getitem__)
+
+
+class AdaptiveSampler:
+    """
+    自适应出题抽样
+    
+    每个 (记录, 题型) 的权重 = 学习次数系数 × 记录中最薄弱考查对象的权重，
+    考查对象（单词/语法句子）的权重 = (1 - 掌握程度) × 该难度的薄弱系数；
+    题型按该题型的历史正确率加权。每种题型一棵树状数组，抽中的记录在所有题型中置 0，
+    某题型的记录全部用过后再重新开始，与原先的“避免重复”规则一致。
+    """
+    
+    # 已掌握的考查对象仍保留少量权重，偶尔复习
+    MIN_ITEM_WEIGHT = 0.05
+    
+    def __init__(self, records: List[Dict], question_types: List[str], progress_manager=None,
+                 difficulty_of: Optional[Callable[[str, str], str]] = None,
+                 rng: Optional[random.Random] = None):
+        self.records = records
+        self.progress_manager = progress_manager
+        self.difficulty_of = difficulty_of
+        self.rng = rng or random
+        
+        progress_data = progress_manager.progress_data if progress_manager else {}
+        self.difficulty_factors = self._weakness_factors(progress_data.get("difficulty_stats", {}))
+        type_factors = self._weakness_factors(progress_data.get("question_type_stats", {}))
+        
+        # 题型 -> (记录下标列表, 记录权重列表, 抽样器)
+        self.type_samplers = {}
+        # 题型 -> {记录下标: [(考查对象, 权重)]}
+        self.type_items = {}
+        for q_type in question_types:
+            indices, weights, items = [], [], {}
+            for index, record in enumerate(records):
+                item_weights = self._item_weights(record, q_type)
+                if not item_weights:
+                    continue
+                indices.append(index)
+                weights.append(self._learn_factor(record) * max(weight for _, weight in item_weights))
+                items[index] = item_weights
+            if indices:
+                self.type_samplers[q_type] = (indices, weights, FenwickSampler(weights, self.rng))
+                self.type_items[q_type] = items
+        
+        self.question_types = list(self.type_samplers)
+        self.type_weights = [type_factors.get(q_type, 1.0) for q_type in self.question_types]
+    
+    @staticmethod
+    def _weakness_factors(stats: Dict[str, Dict]) -> Dict[str, float]:
+        """正确率越低系数越大（0.5-1.5），对作答次数少的做平滑"""
+        return {key: 1.5 - (value.get("correct", 0) + 1) / (value.get("total", 0) + 2)
+                for key, value in stats.items()}
+    
+    @staticmethod
+    def _learn_factor(record: Dict) -> float:
+        """反复查阅的句子（learn_count 大）更值得练习"""
+        return 1 + math.log(max(record.get("learn_count", 1), 1))
+    
+    @staticmethod
+    def record_items(record: Dict, q_type: str) -> List[str]:
+        """记录中可以出该题型的考查对象"""
+        if q_type in ("word_spelling", "word_choice"):
+            return list(record.get("important_words", {}))
+        if q_type == "grammar_choice":
+            return list(record.get("grammar_points", {}))
+        if q_type == "translation_choice":
+            if record.get("original_text") and record.get("translation"):
+                return [record["original_text"]]
+        return []
+    
+    def _mastery(self, item: str, q_type: str) -> float:
+        if self.progress_manager is None:
+            return 0.5
+        if q_type in ("word_spelling", "word_choice"):
+            return self.progress_manager.get_word_mastery(item)
+        if q_type == "grammar_choice":
+            return self.progress_manager.get_grammar_mastery(item)
+        return 0.5
+    
+    def _item_weights(self, record: Dict, q_type: str) -> List[Tuple[str, float]]:
+        item_weights = []
+        for item in self.record_items(record, q_type):
+            weight = 1 - self._mastery(item, q_type)
+            if self.difficulty_of:
+                weight *= self.difficulty_factors.get(self.difficulty_of(q_type, item), 1.0)
+            item_weights.append((item, max(weight, self.MIN_ITEM_WEIGHT)))
+        return item_weights
+    
+    def sample(self) -> Optional[Tuple[Dict, str, str]]:
+        """
+        抽取一道题的出题依据
+        
+        Returns:
+            (记录, 题型, 考查对象)，没有可出题的记录时返回 None
+        """
+        if not self.question_types:
+            return None
+        
+        q_type = self.rng.choices(self.question_types, weights=self.type_weights)[0]
+        indices, weights, sampler = self.type_samplers[q_type]
+        
+        position = sampler.sample()
+        if position is None:
+            # 该题型的记录都用过了，重新开始
+            sampler.reset(weights)
+            position = sampler.sample()
+        record_index = indices[position]
+        self._mark_used(record_index)
+        
+        items = self.type_items[q_type][record_index]
+        item = self.rng.choices([item for item, _ in items], weights=[weight for _, weight in items])[0]
+        return self.records[record_index], q_type, item
+    
+    def _mark_used(self, record_index: int):
+        """抽中的记录在所有题型中暂时不再抽取"""
+        for q_type, (indices, _, sampler) in self.type_samplers.items():
+            if record_index in self.type_items[q_type]:
+                sampler.update(bisect_left(indices, record_index), 0)
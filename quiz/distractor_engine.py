@@ -0,0 +1,168 @@
+import random
+import threading
+import zlib
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+def meaning_text(meaning) -> str:
+    """释义的选项文本：字典格式只取中文释义（例句里含有单词本身，不能作为选项）"""
+    if isinstance(meaning, dict):
+        return str(meaning.get("中文释义", "")).strip()
+    return str(meaning).strip()
+
+
+class DistractorEngine:
+    """
+    本地单词释义干扰项
+    
+    从用户自己的 important_words 中选取其他单词的释义作为干扰项，
+    按字符 n-gram（单字 + 双字）TF-IDF 的余弦相似度挑选与正确释义最接近的几个。
+    n-gram 通过哈希映射到固定维度的向量，全部释义构成一个矩阵；
+    构建引擎时按行分块做矩阵乘法，一次算出所有单词的近邻表，出题时直接查表。
+    引擎在出题线程中构建，并按单词表缓存复用。
+    """
+    
+    DIMENSIONS = 1024
+    # 每个单词保留的近邻数量，干扰项从中随机挑选
+    NEIGHBOURS = 8
+    # 相似度过高的释义可能同样正确（近义词），不作为干扰项
+    MAX_SIMILARITY = 0.8
+    # 词性相同的释义更有迷惑性
+    SAME_POS_BONUS = 0.1
+    # 计算近邻表时每次处理的行数（限制相似度矩阵块的内存）
+    BLOCK_ROWS = 512
+    
+    # 最近一次构建的引擎，单词表不变时直接复用
+    _cached_engine = None
+    _cache_lock = threading.Lock()
+    
+    def __init__(self, vocabulary: Dict[str, tuple]):
+        """
+        Args:
+            vocabulary: 单词(小写) -> (释义文本, 词性)
+        """
+        self.vocabulary = vocabulary
+        self.words = list(vocabulary)
+        self.word_index = {word: i for i, word in enumerate(self.words)}
+        self.texts = [vocabulary[word][0] for word in self.words]
+        self.parts_of_speech = [vocabulary[word][1] for word in self.words]
+        self.matrix = self._build_matrix(self.texts)
+        # 单词下标 -> [(近邻下标, 相似度)]
+        self.neighbour_table = self._build_neighbour_table()
+    
+    @classmethod
+    def for_records(cls, records: List[Dict]) -> "DistractorEngine":
+        """根据学习记录获取引擎，单词表与上次相同时复用已有的近邻表"""
+        vocabulary = cls.collect_vocabulary(records)
+        with cls._cache_lock:
+            engine = cls._cached_engine
+            if engine is None or engine.vocabulary != vocabulary:
+                engine = cls._cached_engine = cls(vocabulary)
+            return engine
+    
+    @staticmethod
+    def collect_vocabulary(records: List[Dict]) -> Dict[str, tuple]:
+        """单词(小写) -> (释义文本, 词性)，同一单词取最早出现的释义"""
+        vocabulary = {}
+        for record in records:
+            for word, meaning in record.get("important_words", {}).items():
+                word_lower = word.lower()
+                if word_lower in vocabulary:
+                    continue
+                text = meaning_text(meaning)
+                if text:
+                    part_of_speech = meaning.get("词性", "") if isinstance(meaning, dict) else ""
+                    vocabulary[word_lower] = (text, part_of_speech)
+        return vocabulary
+    
+    @staticmethod
+    def ngrams(text: str) -> List[str]:
+        chars = [char for char in text if not char.isspace()]
+        return chars + [a + b for a, b in zip(chars, chars[1:])]
+    
+    def _build_matrix(self, texts: List[str]) -> np.ndarray:
+        """TF-IDF 向量（哈希到固定维度，按行归一化）"""
+        rows, cols, values = [], [], []
+        document_frequency = np.zeros(self.DIMENSIONS, dtype=np.float32)
+        for row, text in enumerate(texts):
+            counts = {}
+            for gram in self.ngrams(text):
+                column = zlib.crc32(gram.encode("utf-8")) % self.DIMENSIONS
+                counts[column] = counts.get(column, 0) + 1
+            for column, count in counts.items():
+                rows.append(row)
+                cols.append(column)
+                values.append(count)
+            document_frequency[list(counts)] += 1
+        
+        matrix = np.zeros((len(texts), self.DIMENSIONS), dtype=np.float32)
+        if values:
+            matrix[rows, cols] = values
+            idf = np.log((1 + len(texts)) / (1 + document_frequency)) + 1
+            matrix *= idf
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            matrix /= np.maximum(norms, 1e-12)
+        return matrix
+    
+    def _build_neighbour_table(self) -> Dict[int, List[tuple]]:
+        """所有单词的近邻 [(下标, 相似度)]，按相似度降序，去掉释义文本重复的"""
+        size = len(self.words)
+        table = {index: [] for index in range(size)}
+        # 多取一些候选，去掉释义文本重复的之后保留 NEIGHBOURS 个
+        count = min(self.NEIGHBOURS * 4, size - 1)
+        if count <= 0:
+            return table
+        
+        # 词性编码，-1 表示没有词性
+        pos_codes = {}
+        codes = np.array([pos_codes.setdefault(pos, len(pos_codes)) if pos else -1
+                          for pos in self.parts_of_speech], dtype=np.int32)
+        
+        for start in range(0, size, self.BLOCK_ROWS):
+            rows = np.arange(start, min(start + self.BLOCK_ROWS, size))
+            similarities = self.matrix[rows] @ self.matrix.T
+            same_pos = (codes[rows, None] == codes[None, :]) & (codes[rows, None] >= 0)
+            scores = similarities + same_pos * self.SAME_POS_BONUS
+            # 排除自身、相同释义和近义释义
+            scores[np.arange(len(rows)), rows] = -np.inf
+            scores[similarities > self.MAX_SIMILARITY] = -np.inf
+            
+            top = np.argpartition(-scores, count - 1, axis=1)[:, :count]
+            for offset, index in enumerate(rows):
+                row_scores = scores[offset]
+                candidates = top[offset][np.argsort(-row_scores[top[offset]])]
+                seen = {self.texts[index]}
+                unique = table[int(index)]
+                for i in candidates:
+                    if not np.isfinite(row_scores[i]) or len(unique) >= self.NEIGHBOURS:
+                        break
+                    if self.texts[i] not in seen:
+                        seen.add(self.texts[i])
+                        unique.append((int(i), float(similarities[offset, i])))
+        return table
+    
+    def neighbours(self, word: str) -> List[tuple]:
+        """与单词释义最相似的其他释义 [(下标, 相似度)]，按相似度降序"""
+        index = self.word_index.get(word.lower())
+        if index is None:
+            return []
+        return self.neighbour_table[index]
+    
+    def distractors(self, word: str, count: int = 3, exclude: Optional[str] = None) -> List[str]:
+        """从最相似的近邻中随机挑选 count 个释义，数量不足时返回空列表"""
+        candidates = [self.texts[i] for i, _ in self.neighbours(word) if self.texts[i] != exclude]
+        if len(candidates) < count:
+            return []
+        return random.sample(candidates, count)
+    
+    def word_options(self, word: str, correct_meaning, count: int = 3) -> Optional[List[Dict]]:
+        """单词释义题的选项（未打乱），无法生成足够的干扰项时返回 None"""
+        correct_text = meaning_text(correct_meaning)
+        distractors = self.distractors(word, count, exclude=correct_text)
+        if not distractors:
+            return None
+        options = [{"text": correct_text, "is_correct": True}]
+        options.extend({"text": text, "is_correct": False} for text in distractors)
+        return options
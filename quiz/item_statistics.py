@@ -0,0 +1,91 @@
+import heapq
+import time
+from typing import Dict, List, Optional
+
+
+class ItemStatistics:
+    """
+    单词/语法点的作答统计
+    
+    每个条目只保存几个计数：作答次数、答对次数、最近作答时间和平滑后的作答耗时，
+    按规范化后的单词或语法句子作为键，直接存放在进度数据的字典中。
+    掌握程度的分布随每次作答增量维护，开始页面和出题权重读取时不需要遍历历史记录。
+    """
+    
+    # 作答耗时的指数平滑系数
+    LATENCY_ALPHA = 0.3
+    # 至少作答这么多次且正确率达到 MASTERED_ACCURACY 才算掌握
+    MASTERED_ATTEMPTS = 3
+    MASTERED_ACCURACY = 0.8
+    WEAK_ACCURACY = 0.5
+    
+    def __init__(self, stats: Dict[str, Dict]):
+        self.stats = stats
+        # 掌握程度 -> 条目数
+        self.level_counts = {"mastered": 0, "learning": 0, "weak": 0}
+        for entry in stats.values():
+            self.level_counts[self.level(entry)] += 1
+    
+    @staticmethod
+    def normalize_word(word: str) -> str:
+        return str(word).strip().lower()
+    
+    @staticmethod
+    def normalize_sentence(sentence: str) -> str:
+        """语法点以句子标识，忽略多余空白和大小写"""
+        return " ".join(str(sentence).split()).lower()
+    
+    def record(self, key: str, is_correct: bool, latency: Optional[float] = None,
+               now: Optional[float] = None) -> Dict:
+        """
+        记录一次作答
+        
+        Returns:
+            Dict: 更新后的条目，用于增量保存
+        """
+        entry = self.stats.get(key)
+        if entry is None:
+            entry = self.stats[key] = {"attempts": 0, "correct": 0, "last_seen": 0, "latency": None}
+        else:
+            self.level_counts[self.level(entry)] -= 1
+        
+        entry["attempts"] += 1
+        if is_correct:
+            entry["correct"] += 1
+        entry["last_seen"] = round(time.time() if now is None else now)
+        if latency is not None:
+            if entry["latency"] is None:
+                entry["latency"] = round(latency, 2)
+            else:
+                entry["latency"] = round(entry["latency"] + self.LATENCY_ALPHA * (latency - entry["latency"]), 2)
+        
+        self.level_counts[self.level(entry)] += 1
+        return entry
+    
+    def get(self, key: str) -> Optional[Dict]:
+        return self.stats.get(key)
+    
+    @staticmethod
+    def mastery(entry: Optional[Dict]) -> float:
+        """掌握程度（0-1），对作答次数少的条目做平滑，未作答过的为 0.5"""
+        if not entry:
+            return 0.5
+        return (entry["correct"] + 1) / (entry["attempts"] + 2)
+    
+    @classmethod
+    def level(cls, entry: Dict) -> str:
+        accuracy = entry["correct"] / entry["attempts"] if entry["attempts"] else 0
+        if entry["attempts"] >= cls.MASTERED_ATTEMPTS and accuracy >= cls.MASTERED_ACCURACY:
+            return "mastered"
+        if entry["attempts"] and accuracy < cls.WEAK_ACCURACY:
+            return "weak"
+        return "learning"
+    
+    def summary(self) -> Dict:
+        """汇总：条目数以及各掌握程度的数量"""
+        return {"total": len(self.stats), **self.level_counts}
+    
+    def weakest(self, limit: int = 5) -> List[str]:
+        """掌握程度最低的条目"""
+        return [key for key, _ in heapq.nsmallest(
+            limit, self.stats.items(), key=lambda item: (self.mastery(item[1]), -item[1]["attempts"]))]
@@ -1,16 +1,27 @@
+import heapq
 import json
 import os
 from datetime import datetime
 from typing import List, Dict, Any, Optional
 from collections import defaultdict, Counter
 
+from .item_statistics import ItemStatistics
+from .progress_store import ProgressStore
+from .quiz_aggregates import QuizAggregates
+from .review_scheduler import ReviewScheduler
+
 
 class ProgressManager:
     """学习进度管理器"""
     
     def __init__(self):
         self.progress_file = self._get_progress_file_path()
+        self.store = ProgressStore(self.progress_file)
         self.progress_data = self._load_progress_data()
+        self.scheduler = ReviewScheduler(self.progress_data.get("wrong_questions", {}).values())
+        self.word_stats = ItemStatistics(self.progress_data.setdefault("word_statistics", {}))
+        self.grammar_stats = ItemStatistics(self.progress_data.setdefault("grammar_statistics", {}))
+        self.aggregates = self._load_aggregates()
     
     def _get_progress_file_path(self) -> str:
         """获取进度数据文件路径"""
@@ -18,14 +29,11 @@ class ProgressManager:
         return os.path.join(current_dir, "quiz_progress.json")
     
     def _load_progress_data(self) -> Dict:
-        """加载进度数据"""
+        """加载进度数据（快照 + 增量日志）"""
         try:
-            if os.path.exists(self.progress_file):
-                with open(self.progress_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            return {
+            data = self.store.load({
                 "quiz_history": [],
-                "wrong_questions": [],
+                "wrong_questions": {},
                 "word_statistics": {},
                 "grammar_statistics": {},
                 "difficulty_stats": {
@@ -39,16 +47,59 @@ class ProgressManager:
                     "word_choice": {"total": 0, "correct": 0},
                     "translation_choice": {"total": 0, "correct": 0}
                 }
-            }
+            })
+            
+            # 旧版本的错题是列表，转换为按题目键索引的字典
+            wrong_questions = data.get("wrong_questions", {})
+            if isinstance(wrong_questions, list):
+                data["wrong_questions"] = self._index_wrong_questions(wrong_questions)
+                self.store.compact(data)
+            elif self.store.needs_compaction():
+                self.store.compact(data)
+            
+            return data
         except Exception as e:
             print(f"加载进度数据失败: {e}")
             return {}
     
+    def _load_aggregates(self) -> QuizAggregates:
+        """加载累计统计，旧版本的进度数据从历史记录重建一次并保存"""
+        if "quiz_aggregates" in self.progress_data:
+            return QuizAggregates(self.progress_data["quiz_aggregates"])
+        
+        aggregates = QuizAggregates.from_history(self.progress_data.setdefault("quiz_aggregates", {}),
+                                                 self.progress_data.get("quiz_history", []))
+        if aggregates.quiz_count:
+            self._append_changes([("set", ["quiz_aggregates"], aggregates.data)])
+        return aggregates
+    
+    @staticmethod
+    def _index_wrong_questions(wrong_questions: List[Dict]) -> Dict[str, Dict]:
+        """把错题列表按题目键合并成字典"""
+        indexed = {}
+        for wq in wrong_questions:
+            key = ReviewScheduler.question_key(wq["question"])
+            existing = indexed.get(key)
+            if existing is None:
+                indexed[key] = wq
+            else:
+                existing["error_count"] = existing.get("error_count", 1) + wq.get("error_count", 1)
+                existing["timestamp"] = max(existing.get("timestamp", ""), wq.get("timestamp", ""))
+        return indexed
+    
     def _save_progress_data(self):
-        """保存进度数据"""
+        """完整保存进度数据（合并为新的快照）"""
         try:
-            with open(self.progress_file, 'w', encoding='utf-8') as f:
-                json.dump(self.progress_data, f, ensure_ascii=False, indent=2)
+            self.store.compact(self.progress_data)
+        except Exception as e:
+            print(f"保存进度数据失败: {e}")
+    
+    def _append_changes(self, ops: List):
+        """追加保存本次改动，日志过长时合并为快照"""
+        try:
+            self.store.append(ops)
+            if self.store.needs_compaction():
+                self.store.compact(self.progress_data)
         except Exception as e:
             print(f"保存进度数据失败: {e}")
     
@@ -66,6 +117,12 @@ class ProgressManager:
             }
             
             self.progress_data["quiz_history"].append(quiz_record)
+            self.aggregates.add(quiz_record)
+            ops = [("append", ["quiz_history"], quiz_record),
+                   ("set", ["quiz_aggregates"], self.aggregates.data)]
+            changed_keys = set()
+            changed_words = set()
+            changed_grammar = set()
             
             # 记录错题
             detailed_answers = quiz_results.get("detailed_answers", {})
@@ -87,87 +144,124 @@ class ProgressManager:
                     if is_correct:
                         self.progress_data["question_type_stats"][question_type]["correct"] += 1
                 
-                # 记录错题
+                # 已在错题库中的题目按本次作答结果更新复习时间
+                key = self.scheduler.question_key(question)
+                if self.scheduler.record_answer(question, is_correct):
+                    changed_keys.add(key)
+                
+                # 记录错题（相同题目合并错误次数）
                 if not is_correct:
-                    wrong_question = {
-                        "timestamp": datetime.now().isoformat(),
-                        "question_id": question_id,
-                        "question": question,
-                        "user_answer": answer_data.get("user_answer"),
-                        "error_count": 1
-                    }
-                    
-                    # 检查是否已存在相同题目的错误记录
-                    existing_wrong = None
-                    for wq in self.progress_data["wrong_questions"]:
-                        if self._is_similar_question(wq["question"], question):
-                            existing_wrong = wq
-                            break
-                    
+                    existing_wrong = self.progress_data["wrong_questions"].get(key)
                     if existing_wrong:
                         existing_wrong["error_count"] += 1
                         existing_wrong["timestamp"] = datetime.now().isoformat()
+                        self.scheduler.touch(question)
                     else:
-                        self.progress_data["wrong_questions"].append(wrong_question)
+                        wrong_question = {
+                            "timestamp": datetime.now().isoformat(),
+                            "question_id": question_id,
+                            "question": question,
+                            "user_answer": answer_data.get("user_answer"),
+                            "error_count": 1
+                        }
+                        self.progress_data["wrong_questions"][key] = wrong_question
+                        self.scheduler.add(wrong_question)
+                    changed_keys.add(key)
+                
+                latency = answer_data.get("latency_seconds")
                 
                 # 更新单词统计（如果是单词相关题目）
                 if question_type in ["word_spelling", "word_choice"]:
-                    self._update_word_statistics(question, is_correct)
+                    changed_words.add(self._update_word_statistics(question, is_correct, latency))
                 
                 # 更新语法统计（如果是语法题目）
                 if question_type == "grammar_choice":
-                    self._update_grammar_statistics(question, is_correct)
+                    changed_grammar.add(self._update_grammar_statistics(question, is_correct, latency))
             
-            # 保存数据
-            self._save_progress_data()
+            # 只保存本次改动的条目
+            ops.append(("set", ["difficulty_stats"], self.progress_data["difficulty_stats"]))
+            ops.append(("set", ["question_type_stats"], self.progress_data["question_type_stats"]))
+            for key in changed_keys:
+                ops.append(("set", ["wrong_questions", key], self.progress_data["wrong_questions"][key]))
+            for word in changed_words - {None}:
+                ops.append(("set", ["word_statistics", word], self.word_stats.get(word)))
+            for grammar_key in changed_grammar - {None}:
+                ops.append(("set", ["grammar_statistics", grammar_key], self.grammar_stats.get(grammar_key)))
+            self._append_changes(ops)
             
         except Exception as e:
             print(f"记录测试结果失败: {e}")
     
-    def _is_similar_question(self, q1: Dict, q2: Dict) -> bool:
-        """判断两个题目是否相似（用于合并错题记录）"""
-        # 简单的相似度判断，可以根据需要完善
-        return (q1.get("question_type") == q2.get("question_type") and 
-                q1.get("source_record_id") == q2.get("source_record_id"))
+    def _update_word_statistics(self, question: Dict, is_correct: bool,
+                                latency: Optional[float] = None) -> Optional[str]:
+        """更新单词统计，返回单词键"""
+        if question.get("question_type") == "word_spelling":
+            word = question.get("correct_answer", "")
+        else:
+            word = question.get("word", "")
+        word = ItemStatistics.normalize_word(word)
+        if not word:
+            return None
+        self.word_stats.record(word, is_correct, latency)
+        return word
+    
+    def _update_grammar_statistics(self, question: Dict, is_correct: bool,
+                                   latency: Optional[float] = None) -> Optional[str]:
+        """更新语法统计，返回语法点键"""
+        grammar_key = ItemStatistics.normalize_sentence(question.get("sentence", ""))
+        if not grammar_key:
+            return None
+        self.grammar_stats.record(grammar_key, is_correct, latency)
+        return grammar_key
+    
+    def get_word_mastery(self, word: str) -> float:
+        """单词的掌握程度（0-1），没有作答过的为 0.5"""
+        return ItemStatistics.mastery(self.word_stats.get(ItemStatistics.normalize_word(word)))
     
-    def _update_word_statistics(self, question: Dict, is_correct: bool):
-        """更新单词统计"""
-        # 从题目中提取单词信息
-        question_text = question.get("question", "")
-        # 这里需要根据具体的题目结构来提取单词
-        # 简化处理，后续可以完善
-        pass
+    def get_grammar_mastery(self, sentence: str) -> float:
+        """语法点的掌握程度（0-1），没有作答过的为 0.5"""
+        return ItemStatistics.mastery(self.grammar_stats.get(ItemStatistics.normalize_sentence(sentence)))
     
-    def _update_grammar_statistics(self, question: Dict, is_correct: bool):
-        """更新语法统计"""
-        # 从题目中提取语法信息
-        # 简化处理，后续可以完善
-        pass
+    def get_mastery_summary(self) -> Dict:
+        """单词和语法点的掌握情况汇总（增量维护，不遍历历史记录）"""
+        return {
+            "words": self.word_stats.summary(),
+            "grammar": self.grammar_stats.summary()
+        }
+    
+    def get_weak_words(self, limit: int = 5) -> List[str]:
+        """掌握程度最低的单词"""
+        return self.word_stats.weakest(limit)
     
     def get_wrong_questions(self, limit: Optional[int] = None, 
                           question_type: Optional[str] = None) -> List[Dict]:
         """获取错题列表"""
-        wrong_questions = self.progress_data.get("wrong_questions", [])
+        wrong_questions = self.progress_data.get("wrong_questions", {}).values()
         
         # 按题型筛选
         if question_type:
             wrong_questions = [wq for wq in wrong_questions 
                              if wq["question"].get("question_type") == question_type]
         
-        # 按错误次数排序（错误次数多的排前面）
-        wrong_questions.sort(key=lambda x: x.get("error_count", 0), reverse=True)
-        
-        # 限制数量
+        # 按错误次数排序（错误次数多的排前面），只取前 limit 条时用堆选出
         if limit:
-            wrong_questions = wrong_questions[:limit]
+            return heapq.nlargest(limit, wrong_questions, key=lambda x: x.get("error_count", 0))
+        return sorted(wrong_questions, key=lambda x: x.get("error_count", 0), reverse=True)
         
-        return wrong_questions
+    def get_due_questions(self, limit: Optional[int] = None,
+                          question_type: Optional[str] = None) -> List[Dict]:
+        """获取已到期需要复习的错题（最早到期的在前）"""
+        return self.scheduler.due(limit=limit, question_type=question_type)
+        
+    def get_due_count(self) -> int:
+        """已到期的错题数量"""
+        return self.scheduler.due_count()
     
     def get_statistics_summary(self) -> Dict:
         """获取统计摘要"""
-        history = self.progress_data.get("quiz_history", [])
+        aggregates = self.aggregates
         
-        if not history:
+        if not aggregates.quiz_count:
             return {
                 "total_quizzes": 0,
                 "total_questions": 0,
@@ -177,17 +271,11 @@ class ProgressManager:
                 "strong_areas": []
             }
         
-        total_quizzes = len(history)
-        total_questions = sum(quiz["total_questions"] for quiz in history)
-        total_correct = sum(quiz["correct_answers"] for quiz in history)
-        overall_accuracy = (total_correct / total_questions * 100) if total_questions > 0 else 0
-        
-        # 计算进步趋势（最近5次测试的平均分与之前的对比）
-        improvement_trend = 0
-        if len(history) >= 6:
-            recent_avg = sum(quiz["accuracy"] for quiz in history[-5:]) / 5
-            previous_avg = sum(quiz["accuracy"] for quiz in history[-10:-5]) / 5
-            improvement_trend = recent_avg - previous_avg
+        # 总数与正确率来自累计统计，进步趋势为最近5次测试的平均分与之前的对比
+        total_quizzes = aggregates.quiz_count
+        total_questions = aggregates.data["question_total"]
+        overall_accuracy = aggregates.overall_accuracy()
+        improvement_trend = aggregates.improvement_trend()
         
         # 分析薄弱环节
         weak_areas = []
@@ -226,20 +314,21 @@ class ProgressManager:
             "improvement_trend": round(improvement_trend, 1),
             "weak_areas": weak_areas,
             "strong_areas": strong_areas,
-            "recent_performance": [quiz["accuracy"] for quiz in history[-10:]]  # 最近10次成绩
+            "accuracy_stddev": round(aggregates.accuracy_stddev(), 1),
+            "recent_performance": list(aggregates.recent)  # 最近10次成绩
         }
     
     def generate_review_questions(self, count: int = 10) -> List[Dict]:
         """基于错题生成复习题目"""
-        wrong_questions = self.get_wrong_questions()
+        wrong_questions = self.get_due_questions(limit=count)
         
         if not wrong_questions:
             return []
         
-        # 按错误次数和时间排序，优先复习错误次数多且较新的题目
+        # 按到期时间排序，优先复习最早到期的题目，同时到期时错误次数多的优先
         review_questions = []
         
-        for wq in wrong_questions[:count]:
+        for wq in wrong_questions:
             question = wq["question"].copy()
             question["is_review"] = True
             question["error_count"] = wq.get("error_count", 1)
@@ -279,8 +368,14 @@ class ProgressManager:
             strong_areas_str = "、".join(stats["strong_areas"])
             insights.append(f"✨ 你在这些方面表现优秀：{strong_areas_str}")
         
+        # 薄弱单词
+        weak_words = [word for word in self.get_weak_words(3)
+                      if ItemStatistics.level(self.word_stats.get(word)) == "weak"]
+        if weak_words:
+            insights.append(f"🔤 这些单词还不熟练：{'、'.join(weak_words)}")
+        
         # 错题建议
-        wrong_count = len(self.get_wrong_questions())
+        wrong_count = len(self.progress_data.get("wrong_questions", {}))
         if wrong_count > 10:
             insights.append(f"📝 你有 {wrong_count} 道错题待复习，建议定期进行错题练习。")
         elif wrong_count > 0:
@@ -301,11 +396,12 @@ class ProgressManager:
             ]
             
             # 清理旧的错题记录
-            wrong_questions = self.progress_data.get("wrong_questions", [])
-            self.progress_data["wrong_questions"] = [
-                wq for wq in wrong_questions
+            wrong_questions = self.progress_data.get("wrong_questions", {})
+            self.progress_data["wrong_questions"] = {
+                key: wq for key, wq in wrong_questions.items()
                 if datetime.fromisoformat(wq["timestamp"]).timestamp() > cutoff_date
-            ]
+            }
+            self.scheduler.build(self.progress_data["wrong_questions"].values())
             
             self._save_progress_data()
             
@@ -322,7 +418,7 @@ class WrongQuestionReview:
     def create_review_quiz(self, question_type: Optional[str] = None, 
                           count: int = 10) -> List[Dict]:
         """创建错题复习测试"""
-        wrong_questions = self.progress_manager.get_wrong_questions(
+        wrong_questions = self.progress_manager.get_due_questions(
             limit=count, question_type=question_type
         )
         
@@ -0,0 +1,108 @@
+import json
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class ProgressStore:
+    """
+    学习进度的增量存储
+    
+    进度数据由一份 JSON 快照和一个追加写入的操作日志（JSON Lines）组成：
+    每次测试只把本次改动的条目作为操作追加到日志末尾，不再重写整个文件；
+    加载时在快照上重放日志，日志条数超过阈值后再合并成新的快照。
+    
+    每条操作带递增的序号，快照中记录已经包含的最后一个序号（SEQ_KEY）。
+    合并时如果在写入快照之后、删除日志之前中断，重新加载时会跳过已经包含在快照中的操作，
+    append 之类不幂等的操作不会被重复执行。
+    """
+    
+    # 日志中的操作数超过该值时合并为快照
+    COMPACT_THRESHOLD = 2000
+    # 快照中记录已合并操作序号的键
+    SEQ_KEY = "_journal_seq"
+    
+    def __init__(self, snapshot_path: str, journal_path: Optional[str] = None):
+        self.snapshot_path = snapshot_path
+        self.journal_path = journal_path or os.path.splitext(snapshot_path)[0] + ".log"
+        self.journal_size = 0
+        # 最后一条操作的序号
+        self.seq = 0
+    
+    def load(self, default: Dict) -> Dict:
+        """加载快照并重放操作日志"""
+        data = default
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        snapshot_seq = data.pop(self.SEQ_KEY, 0)
+        self.seq = snapshot_seq
+        
+        self.journal_size = 0
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        op = json.loads(line)
+                    except ValueError:
+                        # 写入中断留下的不完整行
+                        continue
+                    # 已经合并进快照的操作（旧版本写入的无序号操作只在旧快照上重放）
+                    if snapshot_seq and op.get("seq", 0) <= snapshot_seq:
+                        continue
+                    self.apply(data, op)
+                    self.seq = max(self.seq, op.get("seq", 0))
+                    self.journal_size += 1
+        
+        return data
+    
+    def append(self, ops: List[Tuple[str, List[Any], Any]]):
+        """
+        追加一批操作
+        
+        Args:
+            ops: [(操作, 路径, 值)]，操作为 set / append / delete，
+                 路径为从根开始的键列表，例如 ("set", ["wrong_questions", key], wq)
+        """
+        if not ops:
+            return
+        lines = "".join(json.dumps({"seq": self.seq + i, "op": op, "path": path, "value": value},
+                                   ensure_ascii=False) + "\n"
+                        for i, (op, path, value) in enumerate(ops, 1))
+        with open(self.journal_path, 'a', encoding='utf-8') as f:
+            f.write(lines)
+            f.flush()
+        self.seq += len(ops)
+        self.journal_size += len(ops)
+    
+    def needs_compaction(self) -> bool:
+        return self.journal_size > self.COMPACT_THRESHOLD
+    
+    def compact(self, data: Dict):
+        """
+        把完整数据写成新的快照并清空日志（先写临时文件再替换，避免写坏快照）
+        
+        快照记录当前的操作序号，删除日志前中断也不会重复重放日志。
+        """
+        temp_path = self.snapshot_path + ".tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({**data, self.SEQ_KEY: self.seq}, f, ensure_ascii=False)
+        os.replace(temp_path, self.snapshot_path)
+        
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+        self.journal_size = 0
+    
+    @staticmethod
+    def apply(data: Dict, op: Dict):
+        """在数据上执行一条操作"""
+        path = op["path"]
+        parent = data
+        for key in path[:-1]:
+            parent = parent.setdefault(key, {})
+        
+        if op["op"] == "set":
+            parent[path[-1]] = op["value"]
+        elif op["op"] == "append":
+            parent.setdefault(path[-1], []).append(op["value"])
+        elif op["op"] == "delete":
+            parent.pop(path[-1], None)
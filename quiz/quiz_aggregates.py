@@ -0,0 +1,65 @@
+import math
+from collections import deque
+from typing import Dict, List
+
+
+class QuizAggregates:
+    """
+    测试成绩的累计统计
+    
+    保存测试次数、题目总数、答对总数、正确率之和与平方和，以及最近若干次正确率的环形缓冲区，
+    每次测试结束时增量更新。统计摘要不再遍历 quiz_history，历史记录被清理后终身统计也不会丢失。
+    """
+    
+    RECENT_WINDOW = 10
+    
+    def __init__(self, data: Dict):
+        self.data = data
+        for key in ("quiz_count", "question_total", "correct_total", "accuracy_sum", "accuracy_sq_sum"):
+            data.setdefault(key, 0)
+        self.recent = deque(data.get("recent", []), maxlen=self.RECENT_WINDOW)
+        data["recent"] = list(self.recent)
+    
+    @classmethod
+    def from_history(cls, data: Dict, history: List[Dict]) -> "QuizAggregates":
+        """从历史记录重建（旧版本的进度数据没有累计统计）"""
+        data.clear()
+        aggregates = cls(data)
+        for quiz in history:
+            aggregates.add(quiz)
+        return aggregates
+    
+    def add(self, quiz: Dict):
+        """加入一次测试结果"""
+        accuracy = quiz["accuracy"]
+        self.data["quiz_count"] += 1
+        self.data["question_total"] += quiz["total_questions"]
+        self.data["correct_total"] += quiz["correct_answers"]
+        self.data["accuracy_sum"] += accuracy
+        self.data["accuracy_sq_sum"] += accuracy * accuracy
+        self.recent.append(accuracy)
+        self.data["recent"] = list(self.recent)
+    
+    @property
+    def quiz_count(self) -> int:
+        return self.data["quiz_count"]
+    
+    def overall_accuracy(self) -> float:
+        """按题目数计算的总体正确率（百分比）"""
+        total = self.data["question_total"]
+        return self.data["correct_total"] / total * 100 if total > 0 else 0
+    
+    def accuracy_stddev(self) -> float:
+        """各次测试正确率的标准差"""
+        count = self.data["quiz_count"]
+        if count == 0:
+            return 0
+        mean = self.data["accuracy_sum"] / count
+        return math.sqrt(max(self.data["accuracy_sq_sum"] / count - mean * mean, 0))
+    
+    def improvement_trend(self) -> float:
+        """最近5次测试的平均分与之前5次的对比"""
+        if len(self.recent) < 6:
+            return 0
+        recent = list(self.recent)
+        return sum(recent[-5:]) / 5 - sum(recent[-10:-5]) / 5
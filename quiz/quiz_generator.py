@@ -1,5 +1,4 @@
 import random
-import json
 import uuid
 from typing import List, Dict, Any, Optional
 from concurrent.futures import ThreadPoolExecutor, as_completed
@@ -11,7 +10,10 @@ from datetime import datetime
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from llm.call_api import chat
+from llm.call_api import chat_json
+from llm.response_parser import OPTIONS_SCHEMA, parse_options
+from quiz.adaptive_sampler import AdaptiveSampler
+from quiz.distractor_engine import DistractorEngine
 
 
 class QuizGenerator:
@@ -25,10 +27,13 @@ class QuizGenerator:
             "translation_choice" # 翻译选择题
         ]
         self.difficulty_levels = ["easy", "medium", "hard"]
+        # 单词释义题的本地干扰项，生成题目时根据学习记录构建
+        self.distractor_engine = None
         
     def generate_quiz_from_records(self, records: List[Dict], 
                                  question_count: int = 10,
-                                 question_types: Optional[List[str]] = None) -> List[Dict]:
+                                 question_types: Optional[List[str]] = None,
+                                 progress_manager=None) -> List[Dict]:
         """
         从学习记录中生成测试题目
         
@@ -36,6 +41,7 @@ class QuizGenerator:
             records: 学习记录列表
             question_count: 要生成的题目数量
             question_types: 指定题目类型，None表示随机
+            progress_manager: 学习进度管理器，提供时按薄弱程度加权出题
         
         Returns:
             生成的题目列表
@@ -46,57 +52,43 @@ class QuizGenerator:
         if question_types is None:
             question_types = self.question_types
         
+        if "word_choice" in question_types:
+            self.distractor_engine = DistractorEngine.for_records(records)
+        
+        # 按掌握程度、难度/题型正确率和学习次数加权抽取记录与考查对象
+        sampler = AdaptiveSampler(records, question_types, progress_manager, self.determine_item_difficulty)
         questions = []
-        used_records = set()
         
         for _ in range(question_count):
-            # 随机选择题目类型
-            q_type = random.choice(question_types)
-            
-            # 根据题目类型选择合适的记录
-            suitable_records = self._filter_records_for_type(records, q_type)
-            if not suitable_records:
-                continue
-                
-            # 选择一个未使用的记录（避免重复）
-            available_records = [r for r in suitable_records if r.get('id') not in used_records]
-            if not available_records:
-                available_records = suitable_records  # 如果都用过了，重新开始
-                
-            record = random.choice(available_records)
-            used_records.add(record.get('id'))
+            picked = sampler.sample()
+            if picked is None:
+                break
+            record, q_type, item = picked
             
             # 根据类型生成对应的题目
-            question = self._generate_question_by_type(record, q_type)
+            question = self._generate_question_by_type(record, q_type, item)
             if question:
                 questions.append(question)
         
         return questions
     
-    def _filter_records_for_type(self, records: List[Dict], q_type: str) -> List[Dict]:
-        """根据题目类型筛选合适的记录"""
-        filtered = []
-        
-        for record in records:
-            if q_type == "word_spelling" and record.get("important_words"):
-                filtered.append(record)
-            elif q_type == "grammar_choice" and record.get("grammar_points"):
-                filtered.append(record)
-            elif q_type in ["word_choice", "translation_choice"]:
-                if record.get("important_words") or record.get("original_text"):
-                    filtered.append(record)
-        
-        return filtered
-    
-    def _generate_question_by_type(self, record: Dict, q_type: str) -> Optional[Dict]:
-        """根据类型生成具体题目"""
+    def determine_item_difficulty(self, q_type: str, item: str) -> str:
+        """考查对象（单词/语法句子/原文）的难度"""
+        if q_type in ["word_spelling", "word_choice"]:
+            return self._determine_difficulty(item)
+        if q_type == "grammar_choice":
+            return self._determine_grammar_difficulty(item)
+        return self._determine_translation_difficulty(item)
+        
+    def _generate_question_by_type(self, record: Dict, q_type: str, item: Optional[str] = None) -> Optional[Dict]:
+        """根据类型生成具体题目，item 为指定的单词或语法句子（None 表示随机选择）"""
         try:
             if q_type == "word_spelling":
-                return self._generate_word_spelling_question(record)
+                return self._generate_word_spelling_question(record, item)
             elif q_type == "grammar_choice":
-                return self._generate_grammar_choice_question(record)
+                return self._generate_grammar_choice_question(record, item)
             elif q_type == "word_choice":
-                return self._generate_word_choice_question(record)
+                return self._generate_word_choice_question(record, item)
             elif q_type == "translation_choice":
                 return self._generate_translation_choice_question(record)
         except Exception as e:
@@ -105,14 +97,17 @@ class QuizGenerator:
         
         return None
     
-    def _generate_word_spelling_question(self, record: Dict) -> Optional[Dict]:
+    def _generate_word_spelling_question(self, record: Dict, word: Optional[str] = None) -> Optional[Dict]:
         """生成单词默写题"""
         important_words = record.get("important_words", {})
         if not important_words:
             return None
         
-        # 随机选择一个单词
-        word, meaning = random.choice(list(important_words.items()))
+        # 未指定单词时随机选择一个
+        if word in important_words:
+            meaning = important_words[word]
+        else:
+            word, meaning = random.choice(list(important_words.items()))
         
         question = {
             "question_id": str(uuid.uuid4()),
@@ -129,14 +124,17 @@ class QuizGenerator:
         
         return question
     
-    def _generate_grammar_choice_question(self, record: Dict) -> Optional[Dict]:
+    def _generate_grammar_choice_question(self, record: Dict, sentence: Optional[str] = None) -> Optional[Dict]:
         """生成语法选择题（需要LLM生成干扰选项）"""
         grammar_points = record.get("grammar_points", {})
         if not grammar_points:
             return None
         
-        # 随机选择一个语法点
-        sentence, explanation = random.choice(list(grammar_points.items()))
+        # 未指定语法点时随机选择一个
+        if sentence in grammar_points:
+            explanation = grammar_points[sentence]
+        else:
+            sentence, explanation = random.choice(list(grammar_points.items()))
         
         # 不立即调用LLM，先返回题目框架
         question = {
@@ -154,14 +152,17 @@ class QuizGenerator:
         
         return question
     
-    def _generate_word_choice_question(self, record: Dict) -> Optional[Dict]:
+    def _generate_word_choice_question(self, record: Dict, word: Optional[str] = None) -> Optional[Dict]:
         """生成单词释义选择题"""
         important_words = record.get("important_words", {})
         if not important_words:
             return None
         
-        # 随机选择一个单词
-        word, correct_meaning = random.choice(list(important_words.items()))
+        # 未指定单词时随机选择一个
+        if word in important_words:
+            correct_meaning = important_words[word]
+        else:
+            word, correct_meaning = random.choice(list(important_words.items()))
         
         # 不立即调用LLM，先返回题目框架
         question = {
@@ -230,17 +231,7 @@ class QuizGenerator:
 """
         
         try:
-            response = chat(prompt)
-            # 清理响应格式
-            response = response.strip()
-            if response.startswith("```json"):
-                response = response[7:]
-            if response.endswith("```"):
-                response = response[:-3]
-            response = response.strip()
-            
-            result = json.loads(response)
-            return result.get("options", [])
+            return parse_options(chat_json(prompt, OPTIONS_SCHEMA, "quiz_options"))
         except Exception as e:
             print(f"LLM生成语法选项失败: {e}")
             return []
@@ -271,17 +262,7 @@ class QuizGenerator:
 """
         
         try:
-            response = chat(prompt)
-            # 清理响应格式
-            response = response.strip()
-            if response.startswith("```json"):
-                response = response[7:]
-            if response.endswith("```"):
-                response = response[:-3]
-            response = response.strip()
-            
-            result = json.loads(response)
-            return result.get("options", [])
+            return parse_options(chat_json(prompt, OPTIONS_SCHEMA, "quiz_options"))
         except Exception as e:
             print(f"LLM生成单词选项失败: {e}")
             return []
@@ -312,17 +293,7 @@ class QuizGenerator:
 """
         
         try:
-            response = chat(prompt)
-            # 清理响应格式
-            response = response.strip()
-            if response.startswith("```json"):
-                response = response[7:]
-            if response.endswith("```"):
-                response = response[:-3]
-            response = response.strip()
-            
-            result = json.loads(response)
-            return result.get("options", [])
+            return parse_options(chat_json(prompt, OPTIONS_SCHEMA, "quiz_options"))
         except Exception as e:
             print(f"LLM生成翻译选项失败: {e}")
             return []
@@ -338,8 +309,14 @@ class QuizGenerator:
         Returns:
             完善后的题目列表
         """
+        # 单词释义题优先用本地干扰项，不需要调用LLM
+        for question in questions:
+            if question.get("question_type") == "word_choice" and question.get("needs_llm_options", True):
+                self._enhance_word_question_locally(question)
+        
         # 筛选出需要生成选项的题目
-        questions_need_options = [q for q in questions if q.get("question_type") in ["grammar_choice", "word_choice", "translation_choice"]]
+        questions_need_options = [q for q in questions if q.get("question_type") in ["grammar_choice", "word_choice", "translation_choice"]
+                                  and q.get("needs_llm_options", True)]
         
         if not questions_need_options:
             return questions
@@ -409,6 +386,23 @@ class QuizGenerator:
         
         return question
     
+    def _enhance_word_question_locally(self, question: Dict) -> bool:
+        """用学习记录中其他单词的释义生成干扰项，返回是否成功"""
+        if self.distractor_engine is None:
+            return False
+        
+        options = self.distractor_engine.word_options(question.get("word", ""), question.get("correct_meaning", ""))
+        if not options:
+            return False
+        
+        random.shuffle(options)
+        question.update({
+            "options": [option["text"] for option in options],
+            "correct_answer": next(i for i, option in enumerate(options) if option["is_correct"]),
+            "needs_llm_options": False
+        })
+        return True
+    
     def _enhance_word_question_with_llm(self, question: Dict) -> Dict:
         """增强单词题目"""
         word = question.get("word", "")
@@ -537,6 +531,8 @@ class QuizSession:
         self.score = 0
         self.start_time = datetime.now()
         self.end_time = None
+        # 当前题目开始作答的时间，用于统计作答耗时
+        self.question_start_time = self.start_time
         
     def get_current_question(self) -> Optional[Dict]:
         """获取当前题目"""
@@ -557,7 +553,8 @@ class QuizSession:
         self.user_answers[question_id] = {
             "user_answer": answer,
             "is_correct": self._check_answer(answer, correct_answer, current_question.get("question_type")),
-            "question": current_question
+            "question": current_question,
+            "latency_seconds": (datetime.now() - self.question_start_time).total_seconds()
         }
         
         is_correct = self.user_answers[question_id]["is_correct"]
@@ -578,6 +575,7 @@ class QuizSession:
     def next_question(self) -> bool:
         """进入下一题，返回是否还有题目"""
         self.current_question_index += 1
+        self.question_start_time = datetime.now()
         return self.current_question_index < len(self.questions)
     
     def is_completed(self) -> bool:
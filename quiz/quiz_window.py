@@ -424,10 +424,11 @@ class QuizGeneratorThread(QThread):
     error_occurred = pyqtSignal(str)
     progress_updated = pyqtSignal(int, str)  # 进度值, 状态文本
     
-    def __init__(self, records, settings):
+    def __init__(self, records, settings, progress_manager=None):
         super().__init__()
         self.records = records
         self.settings = settings
+        self.progress_manager = progress_manager
         self._is_cancelled = False
     
     def cancel(self):
@@ -450,7 +451,8 @@ class QuizGeneratorThread(QThread):
             questions = generator.generate_quiz_from_records(
                 self.records,
                 question_count=self.settings["question_count"],
-                question_types=self.settings["question_types"]
+                question_types=self.settings["question_types"],
+                progress_manager=self.progress_manager
             )
             
             if self._is_cancelled:
@@ -683,11 +685,12 @@ class QuizWindow(QMainWindow):
         
         # 获取进度统计
         progress_stats = self.progress_manager.get_statistics_summary()
-        wrong_questions_count = len(self.progress_manager.get_wrong_questions())
+        wrong_questions_count = self.progress_manager.get_due_count()
+        word_mastery = self.progress_manager.get_mastery_summary()["words"]
         
         stats_data = [
             ("📚", "学习记录", str(total_records), "#3498db"),
-            ("💎", "重要单词", str(total_words), "#e74c3c"),
+            ("💎", "已掌握单词", f"{word_mastery['mastered']}/{total_words}", "#e74c3c"),
             ("🎯", "总测试次数", str(progress_stats.get("total_quizzes", 0)), "#2ecc71"),
             ("📊", "总体正确率", f"{progress_stats.get('overall_accuracy', 0)}%", "#f39c12"),
             ("❌", "错题待复习", str(wrong_questions_count), "#e67e22"),
@@ -1192,7 +1195,7 @@ class QuizWindow(QMainWindow):
                 
                 if not review_questions:
                     QMessageBox.information(self, "提示", 
-                        "没有找到错题记录！\n请先完成一些标准测试，产生错题后再使用错题复习模式。")
+                        "没有到期需要复习的错题！\n答错的题目会立即进入复习，答对后将按间隔逐步推迟复习时间。")
                     return
                 
                 # 直接创建测试会话
@@ -1209,7 +1212,7 @@ class QuizWindow(QMainWindow):
         self.loading_dialog.show()
         
         # 启动生成线程
-        self.generator_thread = QuizGeneratorThread(self.records, settings)
+        self.generator_thread = QuizGeneratorThread(self.records, settings, self.progress_manager)
         self.generator_thread.questions_generated.connect(self.on_questions_generated)
         self.generator_thread.error_occurred.connect(self.on_generator_error)
         self.generator_thread.progress_updated.connect(self.on_progress_updated)
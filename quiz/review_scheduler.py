@@ -0,0 +1,188 @@
+import heapq
+import json
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+
+class ReviewScheduler:
+    """
+    错题复习调度器（SM-2 算法）
+    
+    每道错题保存到期时间、难度系数(ease)、复习间隔和连续答对次数，
+    内存中用按到期时间排列的小顶堆索引，取"最先到期的 k 道题"只需 O(k log n)。
+    答错的题目立即到期（SM-2 中低于 4 分的题目在本轮需要重复），
+    答对后按间隔 1 天、6 天、之后 间隔×ease 逐步推迟。
+    """
+    
+    DEFAULT_EASE = 2.5
+    MIN_EASE = 1.3
+    DAY_SECONDS = 24 * 60 * 60
+    # 答对/答错对应的 SM-2 评分（0-5）
+    QUALITY_CORRECT = 4
+    QUALITY_WRONG = 1
+    
+    def __init__(self, wrong_questions: Optional[Iterable[Dict]] = None):
+        self.items = {}
+        # [(到期时间戳, -错误次数, 版本号, 题目键)]，条目更新后旧的堆元素按版本号惰性丢弃
+        self._heap = []
+        self._versions = {}
+        if wrong_questions is not None:
+            self.build(wrong_questions)
+    
+    @staticmethod
+    def question_key(question: Dict) -> str:
+        """
+        同一道题的判定键：(题型, 来源记录, 考查对象)
+    
+        考查对象为单词题的单词、语法题的句子；翻译题整句考查，不需要额外区分。
+        以 JSON 数组字符串表示，可以直接作为进度文件中的字典键。
+        """
+        question_type = question.get("question_type", "")
+        if question_type == "word_spelling":
+            item = str(question.get("correct_answer", "")).lower()
+        elif question_type == "word_choice":
+            item = question.get("word", "").lower()
+        elif question_type == "grammar_choice":
+            item = question.get("sentence", "")
+        else:
+            item = ""
+        return json.dumps([question_type, question.get("source_record_id"), item], ensure_ascii=False)
+    
+    def build(self, wrong_questions: Iterable[Dict]):
+        """根据错题列表重新构建，缺少调度信息的旧错题以其记录时间作为到期时间"""
+        self.items = {}
+        self._versions = {}
+        self._heap = []
+        
+        for wq in wrong_questions:
+            review = wq.get("review")
+            if review is None:
+                review = wq["review"] = {
+                    "due_at": wq.get("timestamp") or datetime.now().isoformat(),
+                    "ease": self.DEFAULT_EASE,
+                    "interval": 0,
+                    "repetitions": 0
+                }
+            key = self.question_key(wq["question"])
+            self.items[key] = wq
+            self._versions[key] = 0
+            self._heap.append(self._heap_entry(key, wq))
+        heapq.heapify(self._heap)
+    
+    def get(self, question: Dict) -> Optional[Dict]:
+        """查找与题目对应的错题记录"""
+        return self.items.get(self.question_key(question))
+    
+    def add(self, wrong_question: Dict, now: Optional[float] = None):
+        """加入新的错题，立即到期"""
+        key = self.question_key(wrong_question["question"])
+        wrong_question["review"] = {
+            "due_at": self._to_iso(now),
+            "ease": self.DEFAULT_EASE,
+            "interval": 0,
+            "repetitions": 0
+        }
+        self.items[key] = wrong_question
+        self._push(key)
+    
+    def remove(self, question: Dict):
+        key = self.question_key(question)
+        if self.items.pop(key, None) is not None:
+            # 版本号递增后堆中的旧元素都会被丢弃
+            self._versions[key] = self._versions.get(key, 0) + 1
+    
+    def record_answer(self, question: Dict, is_correct: bool, now: Optional[float] = None) -> bool:
+        """
+        按 SM-2 更新错题的调度信息
+        
+        Returns:
+            bool: 题目是否在错题库中
+        """
+        key = self.question_key(question)
+        wq = self.items.get(key)
+        if wq is None:
+            return False
+        
+        now = time.time() if now is None else now
+        review = wq["review"]
+        quality = self.QUALITY_CORRECT if is_correct else self.QUALITY_WRONG
+        
+        if quality < 3:
+            review["repetitions"] = 0
+            review["interval"] = 0
+        else:
+            review["repetitions"] += 1
+            if review["repetitions"] == 1:
+                review["interval"] = 1
+            elif review["repetitions"] == 2:
+                review["interval"] = 6
+            else:
+                review["interval"] = round(review["interval"] * review["ease"])
+        
+        review["ease"] = max(self.MIN_EASE,
+                             review["ease"] + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+        review["due_at"] = self._to_iso(now + review["interval"] * self.DAY_SECONDS)
+        self._push(key)
+        return True
+    
+    def touch(self, question: Dict):
+        """错题的错误次数变化后更新其在堆中的排序"""
+        key = self.question_key(question)
+        if key in self.items:
+            self._push(key)
+    
+    def due(self, limit: Optional[int] = None, question_type: Optional[str] = None,
+            now: Optional[float] = None) -> List[Dict]:
+        """
+        获取已到期的错题，最早到期的在前，同时到期时错误次数多的在前
+        
+        Args:
+            limit: 最多返回的数量，None 表示全部到期的错题
+            question_type: 只返回指定题型
+            now: 当前时间戳（默认 time.time()）
+        """
+        now = time.time() if now is None else now
+        due_questions = []
+        popped = []
+        
+        while self._heap and (limit is None or len(due_questions) < limit):
+            entry = heapq.heappop(self._heap)
+            due_at, _, version, key = entry
+            if self._versions.get(key) != version:
+                continue
+            popped.append(entry)
+            if due_at > now:
+                break
+            wq = self.items[key]
+            if question_type and wq["question"].get("question_type") != question_type:
+                continue
+            due_questions.append(wq)
+        
+        for entry in popped:
+            heapq.heappush(self._heap, entry)
+        return due_questions
+    
+    def due_count(self, now: Optional[float] = None) -> int:
+        return len(self.due(now=now))
+    
+    def _push(self, key: str):
+        version = self._versions.get(key, -1) + 1
+        self._versions[key] = version
+        heapq.heappush(self._heap, self._heap_entry(key, self.items[key], version))
+        
+        # 过期元素过多时重建，堆的大小保持在错题数量的常数倍
+        if len(self._heap) > 2 * len(self.items) + 64:
+            self._heap = [self._heap_entry(key, wq, self._versions[key]) for key, wq in self.items.items()]
+            heapq.heapify(self._heap)
+    
+    @staticmethod
+    def _heap_entry(key: str, wq: Dict, version: int = 0):
+        due_at = datetime.fromisoformat(wq["review"]["due_at"]).timestamp()
+        return (due_at, -wq.get("error_count", 1), version, key)
+    
+    @staticmethod
+    def _to_iso(timestamp: Optional[float] = None) -> str:
+        if timestamp is None:
+            return datetime.now().isoformat()
+        return datetime.fromtimestamp(timestamp).isoformat()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+自适应出题抽样（树状数组加权抽样）的测试脚本
+
+使用固定种子的随机数生成器，结果可以复现
+"""
+
+import os
+import sys
+import random
+from collections import Counter
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from quiz.adaptive_sampler import FenwickSampler, AdaptiveSampler
+
+
+def test_sample_distribution():
+    """抽中频率与权重成正比，权重为 0 的下标不会被抽中"""
+    weights = [1.0, 0.0, 3.0, 6.0, 0.0, 10.0]
+    sampler = FenwickSampler(weights, random.Random(42))
+    assert abs(sampler.total() - sum(weights)) < 1e-9
+    
+    draws = 40000
+    counts = Counter(sampler.sample() for _ in range(draws))
+    assert counts[1] == 0 and counts[4] == 0, counts
+    for index, weight in enumerate(weights):
+        expected = draws * weight / sum(weights)
+        # 二项分布标准差的 5 倍以内
+        tolerance = 5 * (expected * (1 - weight / sum(weights))) ** 0.5 + 1
+        assert abs(counts[index] - expected) <= tolerance, (index, counts[index], expected)
+
+
+def test_update_and_exhaust():
+    """修改权重后按新权重抽样；逐个置 0 可以不放回地抽完全部下标"""
+    sampler = FenwickSampler([1.0] * 7, random.Random(1))
+    sampler.update(3, 0)
+    sampler.update(5, 12.0)
+    assert abs(sampler.total() - 17.0) < 1e-9
+    counts = Counter(sampler.sample() for _ in range(2000))
+    assert counts[3] == 0 and counts[5] > 1000, counts
+    
+    drawn = []
+    while True:
+        index = sampler.sample()
+        if index is None:
+            break
+        drawn.append(index)
+        sampler.update(index, 0)
+    assert sorted(drawn) == [0, 1, 2, 4, 5, 6], drawn
+    
+    # 任意浮点权重逐个置 0 后树中会残留误差，仍然要恰好抽完
+    rng = random.Random(3)
+    sampler = FenwickSampler([rng.random() * 3 for _ in range(50)], rng)
+    drawn = []
+    while len(drawn) <= 50:
+        index = sampler.sample()
+        if index is None:
+            break
+        drawn.append(index)
+        sampler.update(index, 0)
+    assert sorted(drawn) == list(range(50)), drawn
+    assert FenwickSampler([], random.Random(1)).sample() is None
+
+
+def test_records_not_repeated_until_exhausted():
+    """同一条记录在所有记录都用过之前不会重复出题"""
+    records = [
+        {"original_text": f"Sentence {i}.", "translation": "译文",
+         "important_words": {f"word{i}": "单词"}, "learn_count": i % 3 + 1}
+        for i in range(8)
+    ]
+    sampler = AdaptiveSampler(records, ["word_choice", "translation_choice"], rng=random.Random(7))
+    
+    first_round = [sampler.sample()[0]["original_text"] for _ in range(len(records))]
+    assert len(set(first_round)) == len(records), first_round
+    
+    record, q_type, item = sampler.sample()
+    assert record in records and q_type in ("word_choice", "translation_choice")
+    assert item in AdaptiveSampler.record_items(record, q_type)
+
+
+def main():
+    tests = [test_sample_distribution, test_update_and_exhaust, test_records_not_repeated_until_exhausted]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+    return failed == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
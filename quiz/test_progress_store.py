@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+学习进度增量存储（快照 + 操作日志）的测试脚本
+
+使用临时目录，不会修改真实的学习进度文件
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from quiz.progress_store import ProgressStore
+
+
+def make_store():
+    temp_dir = tempfile.mkdtemp()
+    return ProgressStore(os.path.join(temp_dir, "progress.json")), temp_dir
+
+
+def test_replay_journal():
+    """快照加日志重放得到最新数据"""
+    store, temp_dir = make_store()
+    try:
+        store.load({"quiz_history": [], "wrong_questions": {}})
+        store.append([("append", ["quiz_history"], {"score": 80}),
+                      ("set", ["wrong_questions", "w1"], {"count": 1})])
+        store.append([("delete", ["wrong_questions", "w1"], None)])
+        
+        reloaded = ProgressStore(store.snapshot_path).load({"quiz_history": [], "wrong_questions": {}})
+        assert reloaded == {"quiz_history": [{"score": 80}], "wrong_questions": {}}, reloaded
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+def test_partial_compaction_does_not_replay_twice():
+    """写入快照后、删除日志前中断：重新加载时不能重复执行日志中的 append"""
+    store, temp_dir = make_store()
+    try:
+        data = store.load({"quiz_history": []})
+        for score in (60, 70, 80):
+            ops = [("append", ["quiz_history"], {"score": score})]
+            store.append(ops)
+            for op in ops:
+                ProgressStore.apply(data, {"op": op[0], "path": op[1], "value": op[2]})
+        
+        # 模拟中断：快照已经替换，但旧日志还在
+        journal_copy = store.journal_path + ".copy"
+        shutil.copy(store.journal_path, journal_copy)
+        store.compact(data)
+        os.replace(journal_copy, store.journal_path)
+        
+        reloaded_store = ProgressStore(store.snapshot_path)
+        reloaded = reloaded_store.load({"quiz_history": []})
+        assert [item["score"] for item in reloaded["quiz_history"]] == [60, 70, 80], reloaded
+        assert ProgressStore.SEQ_KEY not in reloaded
+        
+        # 中断之后继续追加的操作仍然会被重放
+        reloaded_store.append([("append", ["quiz_history"], {"score": 90})])
+        again = ProgressStore(store.snapshot_path).load({"quiz_history": []})
+        assert [item["score"] for item in again["quiz_history"]] == [60, 70, 80, 90], again
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+def main():
+    tests = [test_replay_journal, test_partial_compaction_does_not_replay_twice]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+    return failed == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
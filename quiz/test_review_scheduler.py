@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+错题复习调度器（SM-2）的测试脚本
+
+所有时间都通过 now 参数指定，结果与运行时间无关
+"""
+
+import os
+import sys
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from quiz.review_scheduler import ReviewScheduler
+
+NOW = datetime(2024, 1, 10, 12, 0, 0).timestamp()
+DAY = ReviewScheduler.DAY_SECONDS
+
+
+def make_wrong_question(word, due_at, error_count=1):
+    return {
+        "question": {"question_type": "word_choice", "word": word, "source_record_id": 1},
+        "error_count": error_count,
+        "review": {
+            "due_at": datetime.fromtimestamp(due_at).isoformat(),
+            "ease": ReviewScheduler.DEFAULT_EASE,
+            "interval": 0,
+            "repetitions": 0
+        }
+    }
+
+
+def words(wrong_questions):
+    return [wq["question"]["word"] for wq in wrong_questions]
+
+
+def test_due_order():
+    """最早到期的在前，同时到期时错误次数多的在前，未到期的不返回"""
+    scheduler = ReviewScheduler([
+        make_wrong_question("later", NOW - DAY),
+        make_wrong_question("earliest", NOW - 3 * DAY),
+        make_wrong_question("same_time_few_errors", NOW - 2 * DAY, error_count=1),
+        make_wrong_question("same_time_many_errors", NOW - 2 * DAY, error_count=5),
+        make_wrong_question("future", NOW + DAY),
+    ])
+    
+    expected = ["earliest", "same_time_many_errors", "same_time_few_errors", "later"]
+    assert words(scheduler.due(now=NOW)) == expected, words(scheduler.due(now=NOW))
+    assert words(scheduler.due(limit=2, now=NOW)) == expected[:2]
+    # due() 不改变堆，重复调用结果相同
+    assert words(scheduler.due(now=NOW)) == expected
+    assert scheduler.due_count(now=NOW + 2 * DAY) == 5
+
+
+def test_sm2_intervals():
+    """答对后间隔为 1 天、6 天、间隔×ease；答错后立即到期并降低 ease"""
+    wq = make_wrong_question("word", NOW)
+    scheduler = ReviewScheduler([wq])
+    question = wq["question"]
+    
+    intervals = []
+    for _ in range(3):
+        assert scheduler.record_answer(question, True, now=NOW)
+        intervals.append(wq["review"]["interval"])
+    assert intervals[:2] == [1, 6], intervals
+    assert intervals[2] == round(6 * wq["review"]["ease"]), intervals
+    assert scheduler.due(now=NOW) == []
+    
+    ease_before = wq["review"]["ease"]
+    scheduler.record_answer(question, False, now=NOW)
+    assert wq["review"]["interval"] == 0 and wq["review"]["repetitions"] == 0
+    assert wq["review"]["ease"] < ease_before
+    assert words(scheduler.due(now=NOW)) == ["word"]
+    
+    for _ in range(20):
+        scheduler.record_answer(question, False, now=NOW)
+    assert wq["review"]["ease"] == ReviewScheduler.MIN_EASE
+
+
+def test_reschedule_and_remove():
+    """重新调度和删除后堆中的旧元素不再返回"""
+    first = make_wrong_question("first", NOW - 2 * DAY)
+    second = make_wrong_question("second", NOW - DAY)
+    scheduler = ReviewScheduler([first, second])
+    
+    scheduler.record_answer(first["question"], True, now=NOW)
+    assert words(scheduler.due(now=NOW)) == ["second"]
+    assert words(scheduler.due(now=NOW + 2 * DAY)) == ["second", "first"]
+    
+    scheduler.remove(second["question"])
+    assert scheduler.get(second["question"]) is None
+    assert words(scheduler.due(now=NOW + 2 * DAY)) == ["first"]
+    assert not scheduler.record_answer(second["question"], True, now=NOW)
+
+
+def main():
+    tests = [test_due_order, test_sm2_intervals, test_reschedule_and_remove]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+    return failed == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
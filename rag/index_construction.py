@@ -8,8 +8,12 @@ import torch
 from typing import List
 from pathlib import Path
 import os
+import sys
 from modelscope import snapshot_download
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.utils.tracing import tracer
+
 
 class IndexConstructionModule:
     def __init__(self, embeddings_model:str = "BAAI/bge-small-en-v1.5", index_save_path:str = "./vector_index"):
@@ -114,7 +118,11 @@ class IndexConstructionModule:
         if not self.vector_store:
             raise ValueError("请先构建或加载索引")
         
-        return self.vector_store.similarity_search(query, k=top_k)
+        # 分开计时：查询向量化与 FAISS 检索（等价于 vector_store.similarity_search）
+        with tracer.span("rag.embedding"):
+            embedding = self.embeddings.embed_query(query)
+        with tracer.span("rag.faiss_search"):
+            return self.vector_store.similarity_search_by_vector(embedding, k=top_k)
     
 
 if __name__ == "__main__":